@@ -0,0 +1,143 @@
+"""Prueba de carga del servidor IPC: N clientes concurrentes enviando tramas JSON.
+
+Cada cliente abre su propia conexión y manda M peticiones seguidas, esperando la
+respuesta de cada una (petición-respuesta, como la automatización real). Informa de
+mensajes/s en total y de la latencia por mensaje (mediana, p95, p99, máximo), además
+de cuántas tandas necesitó el hilo de la GUI para atenderlos.
+
+Sin --port se levanta un IpcServer en este mismo proceso, con un bucle de eventos Qt
+real y un manejador mínimo: mide el transporte y el paso al hilo de la GUI, no el
+coste de abrir pestañas. Con --port se ataca a un navegador en marcha (por defecto
+con "query-tabs", que no cambia nada).
+
+Uso:
+    python benchmark_ipc.py [-c 100] [-m 50] [--cmd query-tabs] [--port 65432]
+"""
+import argparse
+import json
+import math
+import socket
+import statistics
+import sys
+import threading
+import time
+
+from ipc_server import HEADER, encode_frame
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("el servidor cerró la conexión")
+        data += chunk
+    return bytes(data)
+
+
+def client(host, port, messages, command, start_barrier, latencies, errors):
+    try:
+        sock = socket.create_connection((host, port), timeout=30)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError as e:
+        errors.append(str(e))
+        start_barrier.abort()
+        return
+    with sock:
+        try:
+            start_barrier.wait()
+            for i in range(messages):
+                request = dict(command, id=i)
+                sent = time.perf_counter()
+                sock.sendall(encode_frame(request))
+                length = int.from_bytes(recv_exact(sock, HEADER), "big")
+                reply = json.loads(recv_exact(sock, length).decode("utf-8"))
+                latencies.append((time.perf_counter() - sent) * 1000)
+                if not reply.get("ok") or reply.get("id") != i:
+                    errors.append(reply.get("error", f"respuesta inesperada: {reply}"))
+        except (OSError, ValueError, threading.BrokenBarrierError) as e:
+            errors.append(str(e))
+
+
+def run_load(host, port, clients, messages, command):
+    latencies, errors = [], []
+    barrier = threading.Barrier(clients + 1)
+    threads = [threading.Thread(target=client, daemon=True,
+                                args=(host, port, messages, command, barrier, latencies, errors))
+               for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()  # Todos conectados: empieza la ráfaga
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, errors
+
+
+def start_local_server():
+    """IpcServer en un puerto libre, con el bucle de eventos Qt en el hilo principal"""
+    from PySide6.QtCore import QCoreApplication
+    from ipc_server import IpcServer
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    tabs = [{"index": i, "url": f"https://example.com/{i}", "title": f"Tab {i}",
+             "current": i == 0, "loaded": True} for i in range(20)]
+    server = IpcServer(lambda request: tabs if request.get("cmd") == "query-tabs" else None, port=0)
+    server.start()
+    return app, server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor IPC")
+    parser.add_argument("-c", "--clients", type=int, default=100)
+    parser.add_argument("-m", "--messages", type=int, default=50, help="mensajes por cliente")
+    parser.add_argument("--cmd", default="query-tabs", help="orden a enviar (query-tabs, open-background...)")
+    parser.add_argument("--url", default="https://example.com", help="URL para las órdenes que la usan")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="atacar a un navegador en marcha en este puerto")
+    args = parser.parse_args()
+
+    command = {"cmd": args.cmd}
+    if args.cmd in ("open", "open-background"):
+        command["url"] = args.url
+    elif args.cmd == "batch-open":
+        command["urls"] = [args.url]
+
+    if args.port is None:
+        app, server = start_local_server()
+        result = {}
+
+        def work():
+            result["run"] = run_load(args.host, server.port, args.clients, args.messages, command)
+            app.quit()
+        threading.Thread(target=work, daemon=True).start()
+        app.exec()
+        server.stop()
+        elapsed, latencies, errors = result["run"]
+        stats = server.stats
+    else:
+        elapsed, latencies, errors = run_load(args.host, args.port, args.clients, args.messages, command)
+        stats = None
+
+    total = len(latencies)
+    print(f"{args.clients} clientes x {args.messages} mensajes ({args.cmd}): "
+          f"{total} respuestas en {elapsed:.2f} s")
+    if total:
+        print(f"  rendimiento: {total / elapsed:,.0f} mensajes/s")
+        print(f"  latencia ms: mediana {statistics.median(latencies):.2f}  p95 {percentile(latencies, 95):.2f}  "
+              f"p99 {percentile(latencies, 99):.2f}  máx {max(latencies):.2f}")
+    if stats:
+        print(f"  tandas en la GUI: {stats['batches']} (mayor: {stats['largest_batch']} peticiones)")
+    if errors:
+        print(f"  errores: {len(errors)} (primero: {errors[0]})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Coste del desbloqueo de la bóveda según los parámetros de derivación.
+
+Para cada configuración de scrypt y PBKDF2 mide lo que tarda unwrap_key (lo que
+paga el usuario al escribir la contraseña maestra) y lo compara con descifrar una
+credencial con la sesión ya desbloqueada, que es lo que cuesta cada operación
+después. Sirve para elegir DEFAULT_KDF en password_vault.py: el desbloqueo debería
+quedarse por debajo de ~0,5 s en el equipo más lento en el que se use.
+
+Uso:
+    python benchmark_kdf.py [--repeat 3] [--ops 1000]
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from cryptography.fernet import Fernet
+
+from password_vault import unwrap_key, wrap_key
+
+CONFIGS = [
+    {"algorithm": "scrypt", "n": 2 ** 14, "r": 8, "p": 1},
+    {"algorithm": "scrypt", "n": 2 ** 15, "r": 8, "p": 1},
+    {"algorithm": "scrypt", "n": 2 ** 16, "r": 8, "p": 1},
+    {"algorithm": "scrypt", "n": 2 ** 17, "r": 8, "p": 1},
+    {"algorithm": "pbkdf2-sha256", "iterations": 100_000},
+    {"algorithm": "pbkdf2-sha256", "iterations": 300_000},
+    {"algorithm": "pbkdf2-sha256", "iterations": 600_000},
+    {"algorithm": "pbkdf2-sha256", "iterations": 1_200_000},
+]
+
+
+def describe(params):
+    if params["algorithm"] == "scrypt":
+        memory = 128 * params["n"] * params["r"] // (1024 * 1024)
+        return f"scrypt n=2^{params['n'].bit_length() - 1} r={params['r']} p={params['p']} ({memory} MB)"
+    return f"pbkdf2-sha256 {params['iterations']:,} iteraciones"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste del desbloqueo según los parámetros del KDF")
+    parser.add_argument("--repeat", type=int, default=3, help="desbloqueos por configuración")
+    parser.add_argument("--ops", type=int, default=1000, help="descifrados con la sesión abierta")
+    args = parser.parse_args()
+
+    master_password = "correct horse battery staple"
+    data_key = Fernet.generate_key()
+    session = Fernet(data_key)
+    token = session.encrypt(b"hunter2-hunter2")
+
+    started = time.perf_counter()
+    for _ in range(args.ops):
+        session.decrypt(token)
+    per_op_ms = (time.perf_counter() - started) * 1000 / args.ops
+    print(f"Descifrar con la sesión desbloqueada: {per_op_ms:.3f} ms por credencial")
+    print()
+    print(f"{'parámetros':<42} {'desbloqueo (mediana)':>21} {'equivale a':>16}")
+
+    for params in CONFIGS:
+        stored, wrapped = wrap_key(data_key, master_password, params)
+        times = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            if unwrap_key(wrapped, master_password, stored) != data_key:
+                print(f"{describe(params)}: la clave desenvuelta no coincide")
+                return 1
+            times.append((time.perf_counter() - started) * 1000)
+        median = statistics.median(times)
+        print(f"{describe(params):<42} {median:>18.0f} ms {median / per_op_ms:>10,.0f} ops")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Scripts del gestor de contraseñas tras muchas navegaciones en la misma pestaña.
+
+Carga N páginas con un formulario de inicio de sesión (servidas en local) en una sola
+pestaña configurada con PasswordPageBridge.setup_browser, como hace tabs.py, y comprueba
+tras cada navegación que:
+
+- el perfil tiene exactamente un script "tron-password-manager",
+- el número de scripts del perfil y de la página no crece,
+
+e informa del tiempo de inyección (ejecutar qwebchannel.js + password_form.js en cada
+documento) de la primera y de la última navegación. Ese tiempo se mide con dos scripts
+de marca en el mismo mundo y punto de inyección, registrados justo antes y justo
+después del del gestor. Termina con código 1 si alguna comprobación falla.
+
+Uso:
+    python benchmark_page_scripts.py [-n 100] [--timeout 15]
+
+Usa un perfil sin disco y un directorio temporal para QSettings: no toca los datos
+del navegador.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PySide6.QtCore import QCoreApplication, QEvent, QEventLoop, QSettings, QTimer, QUrl
+from PySide6.QtWebEngineCore import QWebEnginePage, QWebEngineProfile, QWebEngineScript
+from PySide6.QtWebEngineWidgets import QWebEngineView
+from PySide6.QtWidgets import QApplication
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+LOGIN_PAGE = b"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Login</title></head>
+<body>
+<form action="/login" method="post" id="login-form">
+  <input type="text" name="username" autocomplete="username">
+  <input type="password" name="password">
+  <button type="submit">Entrar</button>
+</form>
+</body></html>
+"""
+
+
+class LoginPageHandler(BaseHTTPRequestHandler):
+    """Devuelve la misma página de login para cualquier ruta"""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(LOGIN_PAGE)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(LOGIN_PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def marker_script(name, source):
+    script = QWebEngineScript()
+    script.setName(name)
+    script.setSourceCode(source)
+    script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+    script.setWorldId(QWebEngineScript.ApplicationWorld)
+    script.setRunsOnSubFrames(False)
+    return script
+
+
+def wait_for(signal, timeout_ms):
+    """Espera a que se emita `signal`; devuelve sus argumentos o None si vence el plazo"""
+    loop = QEventLoop()
+    result = []
+
+    def done(*args):
+        result.append(args)
+        loop.quit()
+
+    signal.connect(done)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    signal.disconnect(done)
+    return result[0] if result else None
+
+
+def run_js(page, source, timeout_ms):
+    """Ejecuta `source` en el mundo de la aplicación y devuelve su resultado"""
+    loop = QEventLoop()
+    result = []
+
+    def done(value):
+        result.append(value)
+        loop.quit()
+
+    page.runJavaScript(source, QWebEngineScript.ApplicationWorld, done)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+    return result[0] if result else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scripts del gestor de contraseñas tras N navegaciones")
+    parser.add_argument("-n", "--navigations", type=int, default=100, help="páginas a cargar en la pestaña")
+    parser.add_argument("--timeout", type=float, default=15, help="segundos máximos por navegación")
+    args = parser.parse_args()
+    timeout_ms = int(args.timeout * 1000)
+
+    workdir = tempfile.mkdtemp(prefix="tron_page_scripts_")
+    QSettings.setPath(QSettings.NativeFormat, QSettings.UserScope, workdir)
+    QSettings.setPath(QSettings.IniFormat, QSettings.UserScope, workdir)
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841 (vive hasta el final)
+    from password_manager import PASSWORD_SCRIPT_NAME, PasswordPageBridge
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LoginPageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    profile = QWebEngineProfile()  # Sin nombre: perfil sin disco
+    password_pages = PasswordPageBridge()
+    # Marcas alrededor del script del gestor: se inyectan en el orden en que se registran
+    profile.scripts().insert(marker_script(
+        "benchmark-start", "window.__scriptsStart = performance.now();"))
+    view = QWebEngineView()
+    view.setPage(QWebEnginePage(profile, view))
+    password_pages.setup_browser(view)
+    profile.scripts().insert(marker_script(
+        "benchmark-end", "window.__scriptsEnd = performance.now();"))
+    page = view.page()
+
+    failures = []
+    baseline = None
+    injection_ms = []
+    load_ms = []
+    for i in range(1, args.navigations + 1):
+        started = time.perf_counter()
+        view.load(QUrl(f"{base_url}/page/{i}"))
+        finished = wait_for(page.loadFinished, timeout_ms)
+        load_ms.append((time.perf_counter() - started) * 1000)
+        if not finished or not finished[0]:
+            failures.append(f"navegación {i}: la página no terminó de cargar")
+            continue
+
+        counts = (len(profile.scripts().find(PASSWORD_SCRIPT_NAME)),
+                  len(profile.scripts().toList()),
+                  len(page.scripts().toList()))
+        if baseline is None:
+            baseline = counts
+        if counts[0] != 1:
+            failures.append(f"navegación {i}: {counts[0]} scripts {PASSWORD_SCRIPT_NAME} en el perfil")
+        if counts != baseline:
+            failures.append(f"navegación {i}: scripts (gestor, perfil, página) = {counts}, "
+                            f"al principio {baseline}")
+
+        elapsed = run_js(page, "window.__scriptsEnd - window.__scriptsStart", timeout_ms)
+        if elapsed is None:
+            failures.append(f"navegación {i}: no se pudo medir la inyección")
+        else:
+            injection_ms.append((i, float(elapsed)))
+
+    server.shutdown()
+    # La página tiene que borrarse antes que el perfil
+    password_pages.release_browser(view)
+    view.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    print(f"Navegaciones: {args.navigations} en una pestaña")
+    if baseline is not None:
+        print(f"Scripts (gestor, perfil, página): {baseline}")
+    if injection_ms:
+        first, last = injection_ms[0], injection_ms[-1]
+        print(f"Inyección en la navegación {first[0]}: {first[1]:.2f} ms")
+        print(f"Inyección en la navegación {last[0]}: {last[1]:.2f} ms")
+        print(f"Inyección (mediana): {statistics.median(ms for _, ms in injection_ms):.2f} ms")
+    if load_ms:
+        print(f"Carga completa: primera {load_ms[0]:.0f} ms, última {load_ms[-1]:.0f} ms, "
+              f"mediana {statistics.median(load_ms):.0f} ms")
+    if failures:
+        print(f"\n❌ {len(failures)} comprobaciones fallidas:")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        return 1
+    print("\n✅ Un solo script del gestor y ningún script nuevo tras cada navegación")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""Benchmark de arranque: lanza el navegador N veces sin ventana y resume la traza.
+
+Cada ejecución usa `--startup-trace=<tmp> --startup-trace-exit` con la plataforma Qt
+"offscreen", así que la aplicación se cierra sola tras el primer pintado y el primer
+loadFinished de la pestaña activa. Se informa mediana y p95 (ms) de:
+
+- los hitos (main, first_paint, first_load_finished) desde el arranque de main.py,
+- el arranque del intérprete hasta main.py (interpreter),
+- cada fase de inicialización (QApplication, MainWindow, setup_theme, restaurar_sesion...),
+- las importaciones más lentas, por tiempo propio (sin sus importaciones anidadas).
+
+Uso:
+    python benchmark_startup.py [-n 10] [--top 10] [--json resultados.json]
+
+Se ejecuta en el directorio del navegador: usa (y actualiza) la sesión y las bases de
+datos del perfil actual, igual que un arranque normal.
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MARKS = ("main", "first_paint", "first_load_finished")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def run_once(python, main_script, timeout):
+    """Lanza una vez la aplicación y devuelve {métrica: ms}, o None si no dejó traza"""
+    fd, trace_path = tempfile.mkstemp(prefix="startup_trace_", suffix=".json")
+    os.close(fd)
+    os.remove(trace_path)
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    launched = time.time()
+    try:
+        subprocess.run([python, main_script, f"--startup-trace={trace_path}", "--startup-trace-exit"],
+                       cwd=HERE, env=env, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        print(f"  ejecución cancelada tras {timeout} s")
+    wall = (time.time() - launched) * 1000
+    if not os.path.exists(trace_path):
+        return None
+    try:
+        with open(trace_path, "r", encoding="utf-8") as f:
+            trace = json.load(f)
+    finally:
+        os.remove(trace_path)
+
+    metrics = {"wall (proceso completo)": wall}
+    other = trace.get("otherData", {})
+    metrics["interpreter"] = (other.get("started_epoch", launched) - launched) * 1000
+    for name in MARKS:
+        if name in other.get("marks_ms", {}):
+            metrics[f"mark:{name}"] = other["marks_ms"][name]
+
+    # Fases e importaciones; a cada importación se le descuenta el tiempo de las anidadas
+    imports = []
+    for event in trace.get("traceEvents", []):
+        if event.get("ph") != "X":
+            continue
+        if event.get("cat") == "phase":
+            key = f"phase:{event['name']}"
+            metrics[key] = metrics.get(key, 0.0) + event["dur"] / 1000
+        elif event.get("cat") == "import":
+            imports.append(event)
+    imports.sort(key=lambda e: (e["tid"], e["ts"], -e["dur"]))
+    stack = []  # (tid, fin, clave) de las importaciones abiertas
+    for event in imports:
+        while stack and (stack[-1][0] != event["tid"] or event["ts"] >= stack[-1][1]):
+            stack.pop()
+        key = f"import:{event['name']}"
+        metrics[key] = metrics.get(key, 0.0) + event["dur"] / 1000
+        if stack:
+            metrics[stack[-1][2]] -= event["dur"] / 1000
+        stack.append((event["tid"], event["ts"] + event["dur"], key))
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide el arranque del navegador (offscreen) N veces")
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="importaciones más lentas a mostrar")
+    parser.add_argument("--timeout", type=int, default=60, help="segundos por ejecución")
+    parser.add_argument("--python", default=sys.executable)
+    parser.add_argument("--main", default=os.path.join(HERE, "main.py"))
+    parser.add_argument("--json", help="guardar los resultados por ejecución en este fichero")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.runs):
+        metrics = run_once(args.python, args.main, args.timeout)
+        if metrics is None:
+            print(f"Ejecución {i + 1}/{args.runs}: sin traza")
+            continue
+        runs.append(metrics)
+        print(f"Ejecución {i + 1}/{args.runs}: primer pintado "
+              f"{metrics.get('mark:first_paint', float('nan')):.0f} ms")
+    if not runs:
+        print("Ninguna ejecución produjo traza")
+        return 1
+
+    names = {name for metrics in runs for name in metrics}
+    imports = sorted((name for name in names if name.startswith("import:")),
+                     key=lambda name: -statistics.median(m.get(name, 0.0) for m in runs))[:args.top]
+    rows = sorted(name for name in names if not name.startswith("import:")) + imports
+
+    print(f"\n{'métrica':<42}{'mediana':>10}{'p95':>10}{'n':>5}")
+    for name in rows:
+        values = [metrics[name] for metrics in runs if name in metrics]
+        print(f"{name:<42}{statistics.median(values):>10.1f}{percentile(values, 95):>10.1f}{len(values):>5}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
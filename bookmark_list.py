@@ -0,0 +1,227 @@
+"""Lista de marcadores en modelo/vista para bookmarks.py.
+
+BookmarkListModel guarda los marcadores como datos (sin un QWidget por fila) y un
+índice de búsqueda: título+URL en minúsculas y las filas de cada tag. Las altas,
+ediciones y bajas del almacén entran fila a fila (insert/update/remove_bookmark).
+BookmarkFilterProxy filtra con ese índice (si el texto nuevo amplía el anterior,
+solo revisa las filas que ya pasaban) y BookmarkDelegate pinta cada fila con altura
+fija, así que QListView solo dibuja las visibles.
+"""
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QSize, QRect
+from PySide6.QtGui import QIcon, QPixmap, QFont
+from PySide6.QtWidgets import QStyledItemDelegate, QStyle, QApplication
+
+BookmarkIdRole = Qt.UserRole + 1
+UrlRole = Qt.UserRole + 2
+TagsRole = Qt.UserRole + 3
+NotesRole = Qt.UserRole + 4
+
+
+class BookmarkListModel(QAbstractListModel):
+    """Marcadores del almacén (dicts de BookmarkStore) con su índice de búsqueda"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self.search_keys = []   # "título url" en minúsculas, por fila
+        self.tag_rows = {}      # tag en minúsculas -> filas con ese tag
+        self._icon = None
+
+    def set_bookmarks(self, bookmarks):
+        self.beginResetModel()
+        self._rows = list(bookmarks)
+        self.search_keys = [self._search_key(data) for data in self._rows]
+        self._index_tags()
+        self.endResetModel()
+
+    def insert_bookmark(self, data):
+        """Inserta un marcador en su sitio (orden por título, como BookmarkStore.bookmarks)"""
+        row = self._sorted_row(data)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, data)
+        self.search_keys.insert(row, self._search_key(data))
+        self._index_tags()
+        self.endInsertRows()
+
+    def update_bookmark(self, data):
+        """Reemplaza la fila del marcador; si cambia de sitio en el orden, la mueve"""
+        row = self.row_of(data['id'])
+        if row is None:
+            self.insert_bookmark(data)
+            return
+        if self._rows[row]['title'].lower() != data['title'].lower():
+            self.remove_bookmark(data['id'])
+            self.insert_bookmark(data)
+            return
+        self._rows[row] = data
+        self.search_keys[row] = self._search_key(data)
+        self._index_tags()
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_bookmark(self, bookmark_id):
+        row = self.row_of(bookmark_id)
+        if row is None:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self.search_keys[row]
+        self._index_tags()
+        self.endRemoveRows()
+
+    def row_of(self, bookmark_id):
+        for row, data in enumerate(self._rows):
+            if data['id'] == bookmark_id:
+                return row
+        return None
+
+    def bookmark(self, row):
+        return self._rows[row]
+
+    @staticmethod
+    def _search_key(data):
+        return f"{data['title']} {data['url']}".lower()
+
+    def _sorted_row(self, data):
+        title = data['title'].lower()
+        for row, other in enumerate(self._rows):
+            if other['title'].lower() > title:
+                return row
+        return len(self._rows)
+
+    def _index_tags(self):
+        # Las filas de cada tag se desplazan con cada alta o baja: se rehace el índice (solo datos)
+        self.tag_rows = {}
+        for row, data in enumerate(self._rows):
+            for tag in data['tags']:
+                self.tag_rows.setdefault(tag.lower(), set()).add(row)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        data = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return data['title'] or data['url']
+        if role == UrlRole:
+            return data['url']
+        if role == TagsRole:
+            return data['tags']
+        if role == NotesRole:
+            return data['notes']
+        if role == BookmarkIdRole:
+            return data['id']
+        if role == Qt.ToolTipRole:
+            return f"{data['title']}\n{data['url']}"
+        if role == Qt.DecorationRole:
+            return self._default_icon()
+        return None
+
+    def _default_icon(self):
+        # Un solo icono para todas las filas (los favicons no se descargan aquí)
+        if self._icon is None:
+            pixmap = QPixmap()
+            if not pixmap.load("icons/bookmark.png"):
+                pixmap = QPixmap(16, 16)
+                pixmap.fill()
+            self._icon = QIcon(pixmap)
+        return self._icon
+
+
+class BookmarkFilterProxy(QSortFilterProxyModel):
+    """Filtro por texto y tag sobre el índice del modelo, sin llamar a data() por fila"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._text = ""
+        self._tag = ""
+        self._accepted = None   # None = todas las filas
+
+    def set_filter(self, text, tag=""):
+        text = (text or "").lower()
+        tag = (tag or "").lower()
+        if text == self._text and tag == self._tag:
+            return
+        model = self.sourceModel()
+        if tag == self._tag and self._accepted is not None and self._text and text.startswith(self._text):
+            candidates = self._accepted     # Búsqueda más estrecha: solo lo que ya pasaba
+        elif tag:
+            candidates = model.tag_rows.get(tag, set())
+        else:
+            candidates = range(len(model.search_keys))
+        if text:
+            keys = model.search_keys
+            accepted = {row for row in candidates if text in keys[row]}
+        else:
+            accepted = set(candidates) if tag else None
+        self._text, self._tag, self._accepted = text, tag, accepted
+        self.invalidateFilter()
+
+    def refresh(self, text, tag=""):
+        """Recalcula el filtro tras recargar el modelo (el índice de filas anterior ya no vale)"""
+        self._text, self._tag, self._accepted = None, None, None
+        self.set_filter(text, tag)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self._accepted is None or source_row in self._accepted
+
+
+class BookmarkDelegate(QStyledItemDelegate):
+    """Pinta favicon, título, URL y tags/notas de una fila; altura fija para toda la lista"""
+
+    PADDING = 6
+    ICON_SIZE = 16
+
+    def _row_height(self, option):
+        return option.fontMetrics.height() * 3 + self.PADDING * 2 + 2
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self._row_height(option))
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        style = option.widget.style() if option.widget else QApplication.style()
+        # Fondo (selección, hover) según el tema, sin el texto por defecto
+        option.text = ""
+        option.icon = QIcon()
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+
+        painter.save()
+        rect = option.rect.adjusted(self.PADDING, self.PADDING, -self.PADDING, -self.PADDING)
+        line_height = option.fontMetrics.height()
+        selected = bool(option.state & QStyle.State_Selected)
+        text_color = option.palette.highlightedText().color() if selected else option.palette.text().color()
+        dim_color = text_color if selected else option.palette.placeholderText().color()
+
+        icon = index.data(Qt.DecorationRole)
+        if icon:
+            icon.paint(painter, QRect(rect.left(), rect.top() + (line_height - self.ICON_SIZE) // 2,
+                                      self.ICON_SIZE, self.ICON_SIZE))
+        text_left = rect.left() + self.ICON_SIZE + self.PADDING
+        text_width = rect.right() - text_left
+
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.setPen(text_color)
+        title = painter.fontMetrics().elidedText(index.data(Qt.DisplayRole) or "", Qt.ElideRight, text_width)
+        painter.drawText(QRect(text_left, rect.top(), text_width, line_height), Qt.AlignVCenter, title)
+
+        painter.setFont(option.font)
+        painter.setPen(dim_color)
+        metrics = option.fontMetrics
+        url = metrics.elidedText(index.data(UrlRole) or "", Qt.ElideMiddle, text_width)
+        painter.drawText(QRect(text_left, rect.top() + line_height, text_width, line_height), Qt.AlignVCenter, url)
+
+        tags = index.data(TagsRole) or []
+        notes = (index.data(NotesRole) or "").replace("\n", " ")
+        details = "  ".join(f"#{tag}" for tag in tags)
+        if notes:
+            details = f"{details}  {notes}" if details else notes
+        if details:
+            details = metrics.elidedText(details, Qt.ElideRight, text_width)
+            painter.drawText(QRect(text_left, rect.top() + line_height * 2, text_width, line_height),
+                             Qt.AlignVCenter, details)
+        painter.restore()
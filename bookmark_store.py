@@ -0,0 +1,433 @@
+"""Almacén único de marcadores en SQLite (bookmarks.db).
+
+Lo comparten el gestor de marcadores (maintag.py), el gestor ligero (bookmarks.py)
+y la barra de favoritos. Esquema normalizado:
+
+    bookmarks(id, title, url, category, notes, show_in_bar, created_at, updated_at)
+    categories(id, name)
+    tags(id, name, usage)               nombres únicos sin distinguir mayúsculas;
+                                        usage lo mantienen triggers de bookmark_tags
+    bookmark_tags(bookmark_id, tag_id)  con borrado en cascada
+    bookmarks_fts(title, url, notes)    FTS5 sobre bookmarks, sincronizado por triggers
+
+Cada alta, edición o baja toca solo sus filas en una transacción propia y emite
+added/updated/removed(id) para que las vistas toquen solo esa fila; `changed` queda
+para las categorías y etiquetas nuevas. La primera vez migra la tabla antigua
+(etiquetas en una columna de texto y la barra marcada con "[barra]"/"barra") y el
+JSON que bookmarks.py guardaba en QSettings.
+"""
+import json
+import re
+import sqlite3
+import time
+from PySide6.QtCore import QObject, Signal, QSettings
+
+DB_PATH = "bookmarks.db"
+SCHEMA_VERSION = 2
+DEFAULT_CATEGORIES = [
+    "All bookmarks", "Buy", "Trash", "Work",
+    "Design Inspiration", "Interior", "Interface", "Icons",
+    "Apps", "Home", "Movies", "Plan next trip"
+]
+# Marcas con las que el esquema antiguo indicaba "mostrar en la barra" (no son etiquetas)
+LEGACY_BAR_MARKERS = {"barra", "[barra]"}
+LEGACY_EMPTY_TAGS = {"no tags"}
+
+_SELECT_BOOKMARKS = '''
+    SELECT b.id, b.title, b.url, b.category, b.notes, b.show_in_bar,
+           (SELECT group_concat(t.name, ',') FROM bookmark_tags bt
+            JOIN tags t ON t.id = bt.tag_id WHERE bt.bookmark_id = b.id)
+    FROM bookmarks b
+'''
+
+
+def parse_tags(tags):
+    """Lista de etiquetas limpia a partir de "a, b" o de una lista (sin duplicados ni marcas antiguas)"""
+    if not tags:
+        return []
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    result, seen = [], set()
+    for tag in tags:
+        tag = str(tag).strip()
+        key = tag.lower()
+        if not tag or key in seen or key in LEGACY_BAR_MARKERS or key in LEGACY_EMPTY_TAGS:
+            continue
+        seen.add(key)
+        result.append(tag)
+    return result
+
+
+def fts_query(text):
+    """Consulta FTS5 con cada palabra como prefijo ("pyth org" -> "pyth"* "org"*), o None"""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+def _row_to_dict(row):
+    bookmark_id, title, url, category, notes, show_in_bar, tags = row
+    return {
+        'id': bookmark_id,
+        'title': title,
+        'url': url,
+        'category': category,
+        'notes': notes or "",
+        'tags': sorted(tags.split(","), key=str.lower) if tags else [],
+        'show_in_bar': bool(show_in_bar),
+    }
+
+
+class BookmarkStore(QObject):
+    """Marcadores, categorías y etiquetas en una conexión SQLite compartida"""
+
+    added = Signal(int)     # id del marcador nuevo
+    updated = Signal(int)   # id del marcador editado (también al entrar o salir de la barra)
+    removed = Signal(int)   # id del marcador eliminado
+    changed = Signal()      # Categorías o etiquetas nuevas (no cambia ningún marcador)
+    # (url, título, sigue en marcadores): para quien solo sigue URLs, p. ej. las sugerencias
+    url_bookmarked = Signal(str, str, bool)
+
+    def __init__(self, db_path=DB_PATH):
+        super().__init__()
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.migrate()
+        self.migrate_settings_blob()
+
+    # --- Esquema ---
+
+    def migrate(self):
+        """Crea o migra el esquema según PRAGMA user_version"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            started = time.perf_counter()
+            migrated = self._migrate_v1() if version < 1 else 0
+            if version < 2:
+                self._migrate_v2()
+            if migrated:
+                print(f"📚 Marcadores migrados a v{SCHEMA_VERSION}: {migrated} en "
+                      f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        self.fts = self._ensure_fts()
+
+    def _migrate_v1(self):
+        """v1: tablas normalizadas; pasa la tabla antigua si la hay"""
+        migrated = 0
+        with self.conn:
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS categories (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL
+                )
+            ''')
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(bookmarks)")]
+            if "tags" in columns:
+                self.conn.execute("ALTER TABLE bookmarks RENAME TO bookmarks_legacy")
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS bookmarks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    category TEXT NOT NULL DEFAULT '',
+                    notes TEXT,
+                    show_in_bar INTEGER NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS tags (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL COLLATE NOCASE
+                )
+            ''')
+            self.conn.execute('''
+                CREATE TABLE IF NOT EXISTS bookmark_tags (
+                    bookmark_id INTEGER NOT NULL REFERENCES bookmarks (id) ON DELETE CASCADE,
+                    tag_id INTEGER NOT NULL REFERENCES tags (id) ON DELETE CASCADE,
+                    PRIMARY KEY (bookmark_id, tag_id)
+                ) WITHOUT ROWID
+            ''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_url ON bookmarks (url)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_category ON bookmarks (category)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmarks_bar ON bookmarks (show_in_bar) WHERE show_in_bar = 1")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_bookmark_tags_tag ON bookmark_tags (tag_id, bookmark_id)")
+            if "tags" in columns:
+                migrated = self._migrate_legacy_table()
+            self.conn.executemany("INSERT OR IGNORE INTO categories (name) VALUES (?)",
+                                  [(name,) for name in DEFAULT_CATEGORIES])
+            self.conn.execute("PRAGMA user_version = 1")
+        return migrated
+
+    def _migrate_v2(self):
+        """v2: nº de marcadores por tag mantenido por triggers (la lista de tags no agrega nada)"""
+        with self.conn:
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(tags)")]
+            if "usage" not in columns:
+                self.conn.execute("ALTER TABLE tags ADD COLUMN usage INTEGER NOT NULL DEFAULT 0")
+            self.conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS bookmark_tags_ai AFTER INSERT ON bookmark_tags BEGIN
+                    UPDATE tags SET usage = usage + 1 WHERE id = new.tag_id;
+                END
+            ''')
+            self.conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS bookmark_tags_ad AFTER DELETE ON bookmark_tags BEGIN
+                    UPDATE tags SET usage = usage - 1 WHERE id = old.tag_id;
+                END
+            ''')
+            self.conn.execute('''
+                UPDATE tags SET usage = (SELECT COUNT(*) FROM bookmark_tags WHERE tag_id = tags.id)
+            ''')
+            self.conn.execute("PRAGMA user_version = 2")
+
+    def _ensure_fts(self):
+        """Índice FTS5 de título/URL/notas; False si este SQLite no trae FTS5 (se busca con LIKE)"""
+        try:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bookmarks_fts'").fetchone()
+            if exists:
+                return True
+            with self.conn:
+                self.conn.execute('''
+                    CREATE VIRTUAL TABLE bookmarks_fts USING fts5(
+                        title, url, notes,
+                        content = 'bookmarks', content_rowid = 'id',
+                        tokenize = 'unicode61 remove_diacritics 2'
+                    )
+                ''')
+                self.conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS bookmarks_fts_ai AFTER INSERT ON bookmarks BEGIN
+                        INSERT INTO bookmarks_fts (rowid, title, url, notes)
+                        VALUES (new.id, new.title, new.url, new.notes);
+                    END
+                ''')
+                self.conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS bookmarks_fts_ad AFTER DELETE ON bookmarks BEGIN
+                        INSERT INTO bookmarks_fts (bookmarks_fts, rowid, title, url, notes)
+                        VALUES ('delete', old.id, old.title, old.url, old.notes);
+                    END
+                ''')
+                self.conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS bookmarks_fts_au AFTER UPDATE OF title, url, notes ON bookmarks BEGIN
+                        INSERT INTO bookmarks_fts (bookmarks_fts, rowid, title, url, notes)
+                        VALUES ('delete', old.id, old.title, old.url, old.notes);
+                        INSERT INTO bookmarks_fts (rowid, title, url, notes)
+                        VALUES (new.id, new.title, new.url, new.notes);
+                    END
+                ''')
+                self.conn.execute("INSERT INTO bookmarks_fts (bookmarks_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Búsqueda de marcadores sin FTS5 ({e}): se usará LIKE")
+            return False
+
+    def _migrate_legacy_table(self):
+        """Pasa las filas de la tabla antigua (etiquetas en texto, barra por marcas) al esquema nuevo"""
+        rows = self.conn.execute(
+            "SELECT id, title, url, category, notes, tags FROM bookmarks_legacy").fetchall()
+        for bookmark_id, title, url, category, notes, tags in rows:
+            notes = notes or ""
+            in_bar = any("barra" in (value or "").lower() for value in (notes, tags, category))
+            self.conn.execute('''
+                INSERT INTO bookmarks (id, title, url, category, notes, show_in_bar)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (bookmark_id, title, url, category or "", notes.replace("[barra]", "").strip(), int(in_bar)))
+            self._set_tags(bookmark_id, parse_tags(tags))
+        self.conn.execute("DROP TABLE bookmarks_legacy")
+        return len(rows)
+
+    def migrate_settings_blob(self):
+        """Importa una sola vez el JSON que bookmarks.py guardaba en QSettings y lo borra"""
+        settings = QSettings("TronBrowser", "Bookmarks")
+        if not settings.contains("bookmarks"):
+            return
+        try:
+            bookmarks = json.loads(settings.value("bookmarks", "{}") or "{}")
+            imported = 0
+            with self.conn:
+                for url, data in bookmarks.items():
+                    if not isinstance(data, dict) or self.find_by_url(url):
+                        continue
+                    self._insert(url, data.get('title') or url, "", data.get('notes', ""),
+                                 parse_tags(data.get('tags')), bool(data.get('show_in_bar')))
+                    imported += 1
+            settings.remove("bookmarks")
+            settings.sync()
+            print(f"📚 {imported} marcadores importados desde la configuración antigua")
+        except Exception as e:
+            print(f"Error migrando marcadores de QSettings: {str(e)}")
+
+    # --- Lectura ---
+
+    def bookmarks(self, category=None, tag=None):
+        """Marcadores ordenados por título, opcionalmente de una categoría o etiqueta"""
+        query, params, where = _SELECT_BOOKMARKS, [], []
+        if category:
+            where.append("b.category = ?")
+            params.append(category)
+        if tag:
+            where.append("b.id IN (SELECT bt.bookmark_id FROM bookmark_tags bt "
+                         "JOIN tags t ON t.id = bt.tag_id WHERE t.name = ?)")
+            params.append(tag)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY b.title COLLATE NOCASE"
+        return [_row_to_dict(row) for row in self.conn.execute(query, params)]
+
+    def get(self, bookmark_id):
+        row = self.conn.execute(_SELECT_BOOKMARKS + " WHERE b.id = ?", (bookmark_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def find_by_url(self, url):
+        """Primer marcador con esa URL (por el índice de url), o None"""
+        row = self.conn.execute(_SELECT_BOOKMARKS + " WHERE b.url = ? ORDER BY b.id LIMIT 1", (url,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def is_bookmarked(self, url):
+        return self.conn.execute("SELECT 1 FROM bookmarks WHERE url = ? LIMIT 1", (url,)).fetchone() is not None
+
+    def bar_bookmarks(self):
+        """Marcadores de la barra de favoritos (índice parcial sobre show_in_bar)"""
+        return [_row_to_dict(row) for row in self.conn.execute(
+            _SELECT_BOOKMARKS + " WHERE b.show_in_bar = 1 ORDER BY b.title COLLATE NOCASE")]
+
+    def tags(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM tags ORDER BY name COLLATE NOCASE")]
+
+    def tag_counts(self):
+        """{tag: nº de marcadores}, leído de la columna que mantienen los triggers"""
+        return dict(self.conn.execute("SELECT name, usage FROM tags ORDER BY name COLLATE NOCASE"))
+
+    def search_ids(self, text="", tag=None):
+        """ids de los marcadores que cumplen a la vez el texto y el tag, en una sola consulta.
+
+        El texto se busca por prefijo de palabra en título, URL y notas (FTS5); el tag,
+        por el índice de bookmark_tags. Devuelve None si no hay ningún filtro.
+        """
+        match = fts_query(text) if self.fts else None
+        like = None if self.fts or not (text or "").strip() else f"%{text.strip()}%"
+        if not match and not like and not tag:
+            return None
+        if match:
+            text_query, text_params = "SELECT rowid FROM bookmarks_fts WHERE bookmarks_fts MATCH ?", [match]
+        elif like:
+            text_query = "SELECT id FROM bookmarks WHERE title LIKE ? OR url LIKE ? OR notes LIKE ?"
+            text_params = [like, like, like]
+        if not tag:
+            query, params = text_query, text_params
+        else:
+            # El índice de tags manda y el texto va en un IN sin correlación, que SQLite evalúa
+            # una sola vez (con "rowid IN (tags)" en el lado FTS repetiría el MATCH por fila)
+            query = "SELECT bookmark_id FROM bookmark_tags WHERE tag_id = (SELECT id FROM tags WHERE name = ?)"
+            params = [tag]
+            if match or like:
+                query += f" AND bookmark_id IN ({text_query})"
+                params += text_params
+        return {row[0] for row in self.conn.execute(query, params)}
+
+    def categories(self):
+        return [row[0] for row in self.conn.execute("SELECT name FROM categories ORDER BY name")]
+
+    def category_counts(self):
+        """{categoría: nº de marcadores} en una sola consulta"""
+        return dict(self.conn.execute('''
+            SELECT c.name, COUNT(b.id) FROM categories c
+            LEFT JOIN bookmarks b ON b.category = c.name
+            GROUP BY c.name ORDER BY c.name
+        '''))
+
+    # --- Escritura (una transacción por cambio) ---
+
+    def add(self, url, title, category="", notes="", tags=(), show_in_bar=False):
+        """Crea un marcador y devuelve su id"""
+        with self.conn:
+            bookmark_id = self._insert(url, title or url, category, notes, parse_tags(tags), show_in_bar)
+        self.added.emit(bookmark_id)
+        self.url_bookmarked.emit(url, title or url, True)
+        return bookmark_id
+
+    def update(self, bookmark_id, **fields):
+        """Actualiza solo los campos dados (title, url, category, notes, show_in_bar, tags)"""
+        columns = {key: fields[key] for key in ("title", "url", "category", "notes", "show_in_bar") if key in fields}
+        if "show_in_bar" in columns:
+            columns["show_in_bar"] = int(bool(columns["show_in_bar"]))
+        old = self.get(bookmark_id) if "url" in columns else None
+        with self.conn:
+            if columns:
+                assignments = ", ".join(f"{key} = ?" for key in columns)
+                self.conn.execute(
+                    f"UPDATE bookmarks SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    (*columns.values(), bookmark_id))
+            if "tags" in fields:
+                self._set_tags(bookmark_id, parse_tags(fields["tags"]))
+        self.updated.emit(bookmark_id)
+        if old and old['url'] != columns["url"]:
+            self.url_bookmarked.emit(old['url'], old['title'], self.is_bookmarked(old['url']))
+            self.url_bookmarked.emit(columns["url"], fields.get("title", old['title']), True)
+
+    def set_show_in_bar(self, url, show_in_bar):
+        ids = self._ids_for_url(url)
+        with self.conn:
+            self.conn.execute("UPDATE bookmarks SET show_in_bar = ?, updated_at = CURRENT_TIMESTAMP WHERE url = ?",
+                              (int(bool(show_in_bar)), url))
+        for bookmark_id in ids:
+            self.updated.emit(bookmark_id)
+
+    def remove(self, bookmark_id):
+        old = self.get(bookmark_id)
+        with self.conn:
+            self.conn.execute("DELETE FROM bookmarks WHERE id = ?", (bookmark_id,))
+        if old:
+            self.removed.emit(bookmark_id)
+            self.url_bookmarked.emit(old['url'], old['title'], self.is_bookmarked(old['url']))
+
+    def remove_url(self, url):
+        """Elimina todos los marcadores de una URL; True si había alguno"""
+        ids = self._ids_for_url(url)
+        with self.conn:
+            self.conn.execute("DELETE FROM bookmarks WHERE url = ?", (url,))
+        for bookmark_id in ids:
+            self.removed.emit(bookmark_id)
+        if ids:
+            self.url_bookmarked.emit(url, "", False)
+        return bool(ids)
+
+    def add_category(self, name):
+        """Lanza sqlite3.IntegrityError si la categoría ya existe"""
+        with self.conn:
+            self.conn.execute("INSERT INTO categories (name) VALUES (?)", (name,))
+        self.changed.emit()
+
+    def add_tag(self, name):
+        """Crea una etiqueta aunque aún no la use ningún marcador; False si ya existía"""
+        with self.conn:
+            created = self.conn.execute("INSERT OR IGNORE INTO tags (name) VALUES (?)", (name,)).rowcount
+        if created:
+            self.changed.emit()
+        return created > 0
+
+    def close(self):
+        self.conn.close()
+
+    def _ids_for_url(self, url):
+        return [row[0] for row in self.conn.execute("SELECT id FROM bookmarks WHERE url = ?", (url,))]
+
+    # --- Internos (dentro de una transacción abierta) ---
+
+    def _insert(self, url, title, category, notes, tags, show_in_bar):
+        cursor = self.conn.execute('''
+            INSERT INTO bookmarks (title, url, category, notes, show_in_bar)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (title, url, category or "", notes or "", int(bool(show_in_bar))))
+        self._set_tags(cursor.lastrowid, tags)
+        return cursor.lastrowid
+
+    def _set_tags(self, bookmark_id, tags):
+        self.conn.execute("DELETE FROM bookmark_tags WHERE bookmark_id = ?", (bookmark_id,))
+        if not tags:
+            return
+        self.conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)", [(tag,) for tag in tags])
+        self.conn.executemany('''
+            INSERT OR IGNORE INTO bookmark_tags (bookmark_id, tag_id)
+            SELECT ?, id FROM tags WHERE name = ?
+        ''', [(bookmark_id, tag) for tag in tags])
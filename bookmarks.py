@@ -1,14 +1,15 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-                              QLabel, QLineEdit, QListWidget, QListWidgetItem,
+                              QLabel, QLineEdit, QListView, QAbstractItemView,
                               QDialog, QTextEdit, QComboBox, QMenu, QInputDialog,
                               QMessageBox, QFrame, QScrollArea, QCheckBox)
-from PySide6.QtCore import Qt, Signal, QObject, QSettings, QUrl, QSize
+from PySide6.QtCore import Qt, Signal, QObject, QUrl, QSize
 from PySide6.QtGui import QIcon, QPixmap, QColor
-import json
 import os
 import urllib.request
 from urllib.parse import urlparse
 import re
+from bookmark_store import BookmarkStore
+from bookmark_list import BookmarkListModel, BookmarkFilterProxy, BookmarkDelegate, BookmarkIdRole
 
 class BookmarkManager(QObject):
     bookmark_added = Signal(str, str)
@@ -18,10 +19,15 @@ class BookmarkManager(QObject):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
-        self.bookmarks = {}
-        self.tags = set()
+        # Mismo almacén SQLite que maintag.py y la barra de favoritos
+        self.store = getattr(parent, 'bookmark_store', None) or BookmarkStore()
         self.favicon_cache = {}
         self.init_ui()
+        # Cada alta, edición o baja toca solo su fila; changed = categorías o tags nuevos
+        self.store.added.connect(self.on_bookmark_added)
+        self.store.updated.connect(self.on_bookmark_updated)
+        self.store.removed.connect(self.on_bookmark_removed)
+        self.store.changed.connect(self.update_tag_filter)
         self.load_bookmarks()
 
     def init_ui(self):
@@ -43,8 +49,16 @@ class BookmarkManager(QObject):
         
         layout.addLayout(search_layout)
         
-        # Lista de marcadores
-        self.bookmarks_list = QListWidget()
+        # Lista de marcadores: modelo + proxy de filtro + delegado que pinta solo las filas visibles
+        self.bookmarks_model = BookmarkListModel(self.widget)
+        self.bookmarks_proxy = BookmarkFilterProxy(self.widget)
+        self.bookmarks_proxy.setSourceModel(self.bookmarks_model)
+        self.bookmarks_list = QListView()
+        self.bookmarks_list.setModel(self.bookmarks_proxy)
+        self.bookmarks_list.setItemDelegate(BookmarkDelegate(self.bookmarks_list))
+        self.bookmarks_list.setUniformItemSizes(True)  # Altura fija: el layout no mide cada fila
+        self.bookmarks_list.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.bookmarks_list.setEditTriggers(QAbstractItemView.NoEditTriggers)
         # Eliminar estilos hardcodeados para heredar tema global
         layout.addWidget(self.bookmarks_list)
         
@@ -68,18 +82,8 @@ class BookmarkManager(QObject):
         self.widget.setLayout(layout)
 
     def load_bookmarks(self):
-        """Carga los marcadores guardados"""
+        """Refresca el filtro de tags y la lista desde el almacén"""
         try:
-            settings = QSettings("TronBrowser", "Bookmarks")
-            bookmarks_data = settings.value("bookmarks", "{}")
-            self.bookmarks = json.loads(bookmarks_data)
-            
-            # Cargar tags
-            self.tags = set()
-            for bookmark in self.bookmarks.values():
-                if 'tags' in bookmark:
-                    self.tags.update(bookmark['tags'])
-            
             # Actualizar filtro de tags
             self.update_tag_filter()
             
@@ -89,26 +93,19 @@ class BookmarkManager(QObject):
         except Exception as e:
             print(f"Error al cargar marcadores: {str(e)}")
 
-    def save_bookmarks(self):
-        """Guarda los marcadores"""
-        try:
-            settings = QSettings("TronBrowser", "Bookmarks")
-            settings.setValue("bookmarks", json.dumps(self.bookmarks))
-            settings.sync()
-        except Exception as e:
-            print(f"Error al guardar marcadores: {str(e)}")
-
     def update_tag_filter(self):
         """Actualiza el filtro de tags"""
         current_tag = self.tag_filter.currentData()
+        self.tag_filter.blockSignals(True)
         self.tag_filter.clear()
         self.tag_filter.addItem("Todos los tags", "")
-        for tag in sorted(self.tags):
+        for tag in self.store.tags():
             self.tag_filter.addItem(tag, tag)
         if current_tag:
             index = self.tag_filter.findData(current_tag)
             if index >= 0:
                 self.tag_filter.setCurrentIndex(index)
+        self.tag_filter.blockSignals(False)
 
     def get_favicon(self, url):
         """Obtiene el favicon de una URL"""
@@ -140,80 +137,46 @@ class BookmarkManager(QObject):
             
         return default_pixmap
 
-    def create_bookmark_item(self, url, data):
-        """Crea un item de marcador con favicon y tags"""
-        item = QListWidgetItem()
-        
-        # Crear widget personalizado
-        widget = QWidget()
-        layout = QVBoxLayout(widget)
-        
-        # Primera fila: favicon y título
-        title_layout = QHBoxLayout()
-        
-        # Favicon
-        favicon_label = QLabel()
-        favicon = self.get_favicon(url)
-        favicon_label.setPixmap(favicon.scaled(16, 16, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        title_layout.addWidget(favicon_label)
-        
-        # Título
-        title_label = QLabel(data.get('title', url))
-        # Eliminar estilos inline para heredar tema global
-        title_layout.addWidget(title_label)
-        
-        layout.addLayout(title_layout)
-        
-        # Segunda fila: URL
-        url_label = QLabel(url)
-        # Eliminar estilos inline para heredar tema global
-        layout.addWidget(url_label)
-        
-        # Tercera fila: tags
-        if 'tags' in data and data['tags']:
-            tags_layout = QHBoxLayout()
-            for tag in data['tags']:
-                tag_label = QLabel(tag)
-                # Eliminar estilos inline para heredar tema global
-                tags_layout.addWidget(tag_label)
-            layout.addLayout(tags_layout)
-        
-        # Cuarta fila: notas
-        if 'notes' in data and data['notes']:
-            notes_label = QLabel(data['notes'])
-            # Eliminar estilos inline para heredar tema global
-            notes_label.setWordWrap(True)
-            layout.addWidget(notes_label)
-        
-        widget.setLayout(layout)
-        item.setSizeHint(widget.sizeHint())
-        
-        return item, widget
-
     def update_bookmarks_list(self):
-        """Actualiza la lista de marcadores"""
-        self.bookmarks_list.clear()
-        
-        # Filtrar marcadores
-        search_text = self.search_input.text().lower()
-        selected_tag = self.tag_filter.currentData()
-        
-        for url, data in self.bookmarks.items():
-            # Aplicar filtros
-            if search_text and search_text not in data.get('title', '').lower() and search_text not in url.lower():
-                continue
-                
-            if selected_tag and selected_tag not in data.get('tags', []):
-                continue
-            
-            # Crear item
-            item, widget = self.create_bookmark_item(url, data)
-            self.bookmarks_list.addItem(item)
-            self.bookmarks_list.setItemWidget(item, widget)
+        """Recarga el modelo desde el almacén y vuelve a aplicar el filtro actual"""
+        self.bookmarks_model.set_bookmarks(self.store.bookmarks())
+        self.bookmarks_proxy.refresh(self.search_input.text(), self.tag_filter.currentData())
+
+    def on_bookmark_added(self, bookmark_id):
+        try:
+            data = self.store.get(bookmark_id)
+            if data:
+                self.bookmarks_model.insert_bookmark(data)
+                self._refresh_after_row_change()
+        except Exception as e:
+            print(f"Error al añadir marcador a la lista: {str(e)}")
+
+    def on_bookmark_updated(self, bookmark_id):
+        try:
+            data = self.store.get(bookmark_id)
+            if data:
+                self.bookmarks_model.update_bookmark(data)
+            else:
+                self.bookmarks_model.remove_bookmark(bookmark_id)
+            self._refresh_after_row_change()
+        except Exception as e:
+            print(f"Error al actualizar marcador en la lista: {str(e)}")
+
+    def on_bookmark_removed(self, bookmark_id):
+        try:
+            self.bookmarks_model.remove_bookmark(bookmark_id)
+            self._refresh_after_row_change()
+        except Exception as e:
+            print(f"Error al quitar marcador de la lista: {str(e)}")
+
+    def _refresh_after_row_change(self):
+        # Los tags pueden haber cambiado y las filas aceptadas por el filtro se han desplazado
+        self.update_tag_filter()
+        self.bookmarks_proxy.refresh(self.search_input.text(), self.tag_filter.currentData())
 
     def filter_bookmarks(self):
-        """Filtra los marcadores según el texto de búsqueda y tags"""
-        self.update_bookmarks_list()
+        """Filtra los marcadores según el texto de búsqueda y tags (sin reconstruir la lista)"""
+        self.bookmarks_proxy.set_filter(self.search_input.text(), self.tag_filter.currentData())
 
     def add_bookmark_dialog(self):
         """Añade un nuevo marcador mediante diálogo"""
@@ -276,24 +239,19 @@ class BookmarkManager(QObject):
         except Exception as e:
             print(f"Error al añadir marcador: {str(e)}")
 
+    def _selected_bookmark(self):
+        index = self.bookmarks_list.currentIndex()
+        if not index.isValid():
+            return None
+        return self.store.get(index.data(BookmarkIdRole))
+
     def edit_bookmark(self):
         """Edita un marcador existente"""
         try:
-            current_item = self.bookmarks_list.currentItem()
-            if not current_item:
-                return
-            
-            # Obtener datos del marcador
-            url = None
-            for bookmark_url, data in self.bookmarks.items():
-                if data.get('title') == current_item.text():
-                    url = bookmark_url
-                    break
-            
-            if not url:
+            data = self._selected_bookmark()
+            if not data:
                 return
-            
-            data = self.bookmarks[url]
+            url = data['url']
             
             # Diálogo para editar marcador
             dialog = QDialog(self.parent)
@@ -301,7 +259,7 @@ class BookmarkManager(QObject):
             layout = QVBoxLayout(dialog)
             
             # Campos
-            title_input = QLineEdit(data.get('title', ''))
+            title_input = QLineEdit(data['title'])
             layout.addWidget(QLabel("Título:"))
             layout.addWidget(title_input)
             
@@ -309,18 +267,18 @@ class BookmarkManager(QObject):
             layout.addWidget(QLabel("URL:"))
             layout.addWidget(url_input)
             
-            tags_input = QLineEdit(', '.join(data.get('tags', [])))
+            tags_input = QLineEdit(', '.join(data['tags']))
             layout.addWidget(QLabel("Tags (separados por comas):"))
             layout.addWidget(tags_input)
             
             notes_input = QTextEdit()
-            notes_input.setPlainText(data.get('notes', ''))
+            notes_input.setPlainText(data['notes'])
             layout.addWidget(QLabel("Notas:"))
             layout.addWidget(notes_input)
             
             # Checkbox para mostrar en barra
             show_in_bar_checkbox = QCheckBox("Mostrar en barra de favoritos")
-            show_in_bar_checkbox.setChecked(bool(data.get('show_in_bar', False)))
+            show_in_bar_checkbox.setChecked(data['show_in_bar'])
             layout.addWidget(show_in_bar_checkbox)
             
             # Botones
@@ -334,32 +292,11 @@ class BookmarkManager(QObject):
             layout.addLayout(buttons_layout)
             
             if dialog.exec():
-                # Procesar tags
-                tags = [tag.strip() for tag in tags_input.text().split(',') if tag.strip()]
-                self.tags.update(tags)
-                
-                # Actualizar marcador
-                new_url = url_input.text()
-                if new_url != url:
-                    del self.bookmarks[url]
-                    url = new_url
-                
-                self.bookmarks[url] = {
-                    'title': title_input.text(),
-                    'tags': tags,
-                    'notes': notes_input.toPlainText(),
-                    'show_in_bar': show_in_bar_checkbox.isChecked(),
-                    'favicon': self.get_favicon(url)
-                }
-                
-                self.save_bookmarks()
-                self.update_tag_filter()
-                self.update_bookmarks_list()
-                self.bookmark_updated.emit(url, self.bookmarks[url])
-                
-                # Actualizar barra de favoritos si existe
-                if hasattr(self.parent, 'update_favorites_bar'):
-                    self.parent.update_favorites_bar()
+                # Solo se reescribe la fila de este marcador y sus tags
+                self.store.update(data['id'], title=title_input.text(), url=url_input.text(),
+                                  tags=tags_input.text(), notes=notes_input.toPlainText(),
+                                  show_in_bar=show_in_bar_checkbox.isChecked())
+                self.bookmark_updated.emit(url_input.text(), self.store.get(data['id']))
                 
         except Exception as e:
             print(f"Error al editar marcador: {str(e)}")
@@ -369,81 +306,45 @@ class BookmarkManager(QObject):
         try:
             if url:
                 # Eliminar por URL específica (llamado desde UI)
-                if url in self.bookmarks:
-                    del self.bookmarks[url]
-                    self.save_bookmarks()
-                    self.update_tag_filter()
-                    self.update_bookmarks_list()
+                if self.store.remove_url(url):
                     self.bookmark_removed.emit(url)
                     return True
                 return False
             else:
                 # Eliminar el marcador seleccionado en la lista
-                current_item = self.bookmarks_list.currentItem()
-                if not current_item:
-                    return
-                
-                # Obtener URL del marcador
-                url = None
-                for bookmark_url, data in self.bookmarks.items():
-                    if data.get('title') == current_item.text():
-                        url = bookmark_url
-                        break
-                
-                if not url:
+                data = self._selected_bookmark()
+                if not data:
                     return
                 
                 # Confirmar eliminación
                 reply = QMessageBox.question(
                     self.parent,
                     "Confirmar eliminación",
-                    f"¿Estás seguro de que quieres eliminar el marcador '{self.bookmarks[url].get('title')}'?",
+                    f"¿Estás seguro de que quieres eliminar el marcador '{data['title']}'?",
                     QMessageBox.Yes | QMessageBox.No,
                     QMessageBox.No
                 )
                 
                 if reply == QMessageBox.Yes:
-                    del self.bookmarks[url]
-                    self.save_bookmarks()
-                    self.update_tag_filter()
-                    self.update_bookmarks_list()
-                    self.bookmark_removed.emit(url)
+                    self.store.remove(data['id'])
+                    self.bookmark_removed.emit(data['url'])
                 
         except Exception as e:
             print(f"Error al eliminar marcador: {str(e)}")
 
     def is_bookmarked(self, url):
         """Verifica si una URL está marcada como favorito"""
-        return url in self.bookmarks
+        return self.store.is_bookmarked(url)
 
     def add_bookmark(self, url, title, notes="", tags="", show_in_bar=False):
         """Añade un marcador desde código (para el botón de estrella)"""
         try:
-            if url in self.bookmarks:
+            if self.store.is_bookmarked(url):
                 return False  # Ya existe
             
-            self.bookmarks[url] = {
-                'title': title or url,
-                'notes': notes,
-                'tags': tags,
-                'show_in_bar': show_in_bar,
-                'favicon': self.get_favicon(url)
-            }
-            
-            # Actualizar tags
-            if tags:
-                tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-                self.tags.update(tag_list)
-            
-            self.save_bookmarks()
-            self.update_tag_filter()
-            self.update_bookmarks_list()
+            self.store.add(url, title or url, notes=notes, tags=tags, show_in_bar=show_in_bar)
             self.bookmark_added.emit(url, title or url)
             
-            # Actualizar barra de favoritos si existe
-            if hasattr(self.parent, 'update_favorites_bar'):
-                self.parent.update_favorites_bar()
-            
             return True
             
         except Exception as e:
@@ -457,11 +358,10 @@ class BookmarkManager(QObject):
     def get_favorites_for_bar(self):
         """Devuelve una lista de favoritos marcados para mostrar en la barra de favoritos"""
         favs = []
-        for url, data in self.bookmarks.items():
-            if data.get('show_in_bar'):
-                favs.append({
-                    'url': url,
-                    'title': data.get('title', url),
-                    'icon': data.get('favicon', ':/icons/bookmark.png')
-                })
-        return favs 
\ No newline at end of file
+        for data in self.store.bar_bookmarks():
+            favs.append({
+                'url': data['url'],
+                'title': data['title'],
+                'icon': self.get_favicon(data['url'])
+            })
+        return favs
\ No newline at end of file
@@ -8,7 +8,7 @@ from PySide6.QtWidgets import (QToolBar, QMenu, QDialog, QVBoxLayout,
                                QPushButton, QMessageBox, QCheckBox, QWidget)
 from PySide6.QtCore import Qt, Signal, QUrl
 from PySide6.QtGui import QIcon, QPixmap, QAction
-import sqlite3
+from bookmark_store import BookmarkStore
 import os
 from urllib.parse import urlparse
 import urllib.request
@@ -16,7 +16,7 @@ import urllib.request
 class FavoriteDialog(QDialog):
     """Diálogo para añadir/editar favoritos en la barra"""
     
-    def __init__(self, parent=None, title="", url="", category="", show_in_bar=True):
+    def __init__(self, parent=None, title="", url="", category="", show_in_bar=True, categories=()):
         super().__init__(parent)
         self.setWindowTitle("Añadir a Favoritos")
         self.setModal(True)
@@ -42,7 +42,7 @@ class FavoriteDialog(QDialog):
         category_layout = QHBoxLayout()
         category_layout.addWidget(QLabel("Categoría:"))
         self.category_combo = QComboBox()
-        self.load_categories()
+        self.load_categories(categories)
         if category:
             index = self.category_combo.findText(category)
             if index >= 0:
@@ -65,21 +65,11 @@ class FavoriteDialog(QDialog):
         button_layout.addWidget(cancel_button)
         layout.addLayout(button_layout)
     
-    def load_categories(self):
+    def load_categories(self, categories):
         """Carga las categorías disponibles"""
-        try:
-            conn = sqlite3.connect('bookmarks.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM categories ORDER BY name")
-            categories = cursor.fetchall()
-            
-            self.category_combo.addItem("Sin categoría")
-            for category in categories:
-                self.category_combo.addItem(category[0])
-            
-            conn.close()
-        except Exception as e:
-            print(f"Error cargando categorías: {e}")
+        self.category_combo.addItem("Sin categoría")
+        for category in categories:
+            self.category_combo.addItem(category)
     
     def get_values(self):
         """Obtiene los valores del diálogo"""
@@ -107,48 +97,40 @@ class FavoritesBar(QToolBar):
         
         # Cache de favicons
         self.favicon_cache = {}
+        self._default_icon = None
+        self.favorite_actions = {}  # id del marcador -> acción en la barra
+        
+        # Almacén de marcadores compartido con el gestor de marcadores: cada cambio
+        # añade, reemplaza o quita solo la acción de ese marcador
+        self.store = getattr(parent, 'bookmark_store', None) or BookmarkStore()
+        self.store.added.connect(self.on_bookmark_changed)
+        self.store.updated.connect(self.on_bookmark_changed)
+        self.store.removed.connect(self.remove_favorite_action)
         
         # Cargar favoritos
         self.load_favorites()
     
     def load_favorites(self):
-        """Carga los favoritos desde la base de datos"""
+        """Carga los favoritos marcados para la barra"""
         try:
-            conn = sqlite3.connect('bookmarks.db')
-            cursor = conn.cursor()
-            
-            # Obtener favoritos marcados para la barra
-            cursor.execute("""
-                SELECT title, url, category, notes, tags 
-                FROM bookmarks 
-                WHERE notes LIKE '%[barra]%' 
-                   OR tags LIKE '%[barra]%' 
-                   OR category LIKE '%Barra%' 
-                   OR tags LIKE '%barra%' 
-                   OR notes LIKE '%barra%'
-                   OR category = 'Barra de Favoritos'
-                ORDER BY title
-            """)
-            
-            favorites = cursor.fetchall()
-            conn.close()
+            favorites = self.store.bar_bookmarks()
             
             # Limpiar barra actual
             self.clear()
+            self.favorite_actions = {}
             
             # Añadir favoritos a la barra
             for favorite in favorites:
-                title, url, category, notes, tags = favorite
-                self.add_favorite_to_bar(title, url)
+                self.favorite_actions[favorite['id']] = self.add_favorite_to_bar(favorite['title'], favorite['url'])
             
             # Añadir botón para añadir favorito actual
-            self.add_add_favorite_action()
+            self.add_favorite_action = self.add_add_favorite_action()
             
         except Exception as e:
             print(f"Error cargando favoritos: {e}")
     
-    def add_favorite_to_bar(self, title, url):
-        """Añade un favorito a la barra"""
+    def add_favorite_to_bar(self, title, url, before=None):
+        """Añade un favorito a la barra (delante de `before` si se da) y devuelve su acción"""
         try:
             # Obtener favicon
             icon = self.get_favicon(url)
@@ -163,10 +145,42 @@ class FavoritesBar(QToolBar):
             action.setMenu(self.create_favorite_menu(title, url))
             
             # Añadir a la barra
-            self.addAction(action)
+            if before is not None:
+                self.insertAction(before, action)
+            else:
+                self.addAction(action)
+            return action
             
         except Exception as e:
             print(f"Error añadiendo favorito a la barra: {e}")
+            return None
+    
+    def on_bookmark_changed(self, bookmark_id):
+        """Alta o edición de un marcador: rehace solo su acción (o la quita si ya no va en la barra)"""
+        try:
+            self.remove_favorite_action(bookmark_id)
+            bookmark = self.store.get(bookmark_id)
+            if not bookmark or not bookmark['show_in_bar']:
+                return
+            # Mismo orden que bar_bookmarks(): por título, y siempre antes del botón ⭐
+            title = bookmark['title'].lower()
+            favorites = set(self.favorite_actions.values())
+            before = self.add_favorite_action
+            for action in self.actions():
+                if action in favorites and action.text().lower() > title:
+                    before = action
+                    break
+            action = self.add_favorite_to_bar(bookmark['title'], bookmark['url'], before)
+            if action is not None:
+                self.favorite_actions[bookmark_id] = action
+        except Exception as e:
+            print(f"Error actualizando favorito en la barra: {e}")
+    
+    def remove_favorite_action(self, bookmark_id):
+        action = self.favorite_actions.pop(bookmark_id, None)
+        if action is not None:
+            self.removeAction(action)
+            action.deleteLater()
     
     def create_favorite_menu(self, title, url):
         """Crea el menú contextual para un favorito"""
@@ -204,6 +218,7 @@ class FavoritesBar(QToolBar):
         add_action.setToolTip("Añadir página actual a favoritos")
         add_action.triggered.connect(self.add_current_page)
         self.addAction(add_action)
+        return add_action
     
     def add_current_page(self):
         """Añade la página actual a favoritos"""
@@ -217,7 +232,7 @@ class FavoritesBar(QToolBar):
                     title = current_tab.page().title()
                     
                     # Mostrar diálogo
-                    dialog = FavoriteDialog(self, title, url)
+                    dialog = FavoriteDialog(self, title, url, categories=self.store.categories())
                     if dialog.exec():
                         values = dialog.get_values()
                         self.save_favorite(values)
@@ -226,26 +241,10 @@ class FavoritesBar(QToolBar):
             print(f"Error añadiendo página actual: {e}")
     
     def save_favorite(self, values):
-        """Guarda un favorito en la base de datos"""
+        """Guarda un favorito (la barra se recarga con la señal del almacén)"""
         try:
-            conn = sqlite3.connect('bookmarks.db')
-            cursor = conn.cursor()
-            
-            # Preparar notas y tags según si se muestra en barra
-            notes = "[barra]" if values['show_in_bar'] else ""
-            tags = "barra" if values['show_in_bar'] else ""
-            
-            # Insertar en la base de datos
-            cursor.execute("""
-                INSERT INTO bookmarks (title, url, category, notes, tags) 
-                VALUES (?, ?, ?, ?, ?)
-            """, (values['title'], values['url'], values['category'], notes, tags))
-            
-            conn.commit()
-            conn.close()
-            
-            # Recargar la barra
-            self.load_favorites()
+            category = "" if values['category'] == "Sin categoría" else values['category']
+            self.store.add(values['url'], values['title'], category, show_in_bar=values['show_in_bar'])
             
             QMessageBox.information(self, "Éxito", "Favorito guardado correctamente")
             
@@ -255,54 +254,24 @@ class FavoritesBar(QToolBar):
     def edit_favorite(self, title, url):
         """Edita un favorito existente"""
         try:
-            conn = sqlite3.connect('bookmarks.db')
-            cursor = conn.cursor()
-            
-            # Obtener datos actuales
-            cursor.execute("""
-                SELECT title, url, category, notes, tags 
-                FROM bookmarks 
-                WHERE url = ?
-            """, (url,))
-            
-            result = cursor.fetchone()
-            if result:
-                current_title, current_url, current_category, current_notes, current_tags = result
-                show_in_bar = "[barra]" in current_notes or "barra" in current_tags
-                
+            bookmark = self.store.find_by_url(url)
+            if bookmark:
                 # Mostrar diálogo de edición
-                dialog = FavoriteDialog(self, current_title, current_url, current_category, show_in_bar)
+                dialog = FavoriteDialog(self, bookmark['title'], bookmark['url'], bookmark['category'],
+                                        bookmark['show_in_bar'], self.store.categories())
                 if dialog.exec():
                     values = dialog.get_values()
-                    self.update_favorite(url, values)
-            
-            conn.close()
+                    self.update_favorite(bookmark['id'], values)
             
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error editando favorito: {e}")
     
-    def update_favorite(self, old_url, values):
+    def update_favorite(self, bookmark_id, values):
         """Actualiza un favorito existente"""
         try:
-            conn = sqlite3.connect('bookmarks.db')
-            cursor = conn.cursor()
-            
-            # Preparar notas y tags
-            notes = "[barra]" if values['show_in_bar'] else ""
-            tags = "barra" if values['show_in_bar'] else ""
-            
-            # Actualizar en la base de datos
-            cursor.execute("""
-                UPDATE bookmarks 
-                SET title = ?, url = ?, category = ?, notes = ?, tags = ?
-                WHERE url = ?
-            """, (values['title'], values['url'], values['category'], notes, tags, old_url))
-            
-            conn.commit()
-            conn.close()
-            
-            # Recargar la barra
-            self.load_favorites()
+            category = "" if values['category'] == "Sin categoría" else values['category']
+            self.store.update(bookmark_id, title=values['title'], url=values['url'],
+                              category=category, show_in_bar=values['show_in_bar'])
             
             QMessageBox.information(self, "Éxito", "Favorito actualizado correctamente")
             
@@ -312,22 +281,7 @@ class FavoritesBar(QToolBar):
     def remove_from_bar(self, title, url):
         """Quita un favorito de la barra (pero no lo elimina)"""
         try:
-            conn = sqlite3.connect('bookmarks.db')
-            cursor = conn.cursor()
-            
-            # Actualizar para quitar de la barra
-            cursor.execute("""
-                UPDATE bookmarks 
-                SET notes = REPLACE(notes, '[barra]', ''), 
-                    tags = REPLACE(tags, 'barra', '')
-                WHERE url = ?
-            """, (url,))
-            
-            conn.commit()
-            conn.close()
-            
-            # Recargar la barra
-            self.load_favorites()
+            self.store.set_show_in_bar(url, False)
             
             QMessageBox.information(self, "Éxito", "Favorito quitado de la barra")
             
@@ -344,16 +298,7 @@ class FavoritesBar(QToolBar):
         
         if reply == QMessageBox.Yes:
             try:
-                conn = sqlite3.connect('bookmarks.db')
-                cursor = conn.cursor()
-                
-                cursor.execute("DELETE FROM bookmarks WHERE url = ?", (url,))
-                
-                conn.commit()
-                conn.close()
-                
-                # Recargar la barra
-                self.load_favorites()
+                self.store.remove_url(url)
                 
                 QMessageBox.information(self, "Éxito", "Favorito eliminado correctamente")
                 
@@ -375,28 +320,24 @@ class FavoritesBar(QToolBar):
             if url in self.favicon_cache:
                 return self.favicon_cache[url]
             
-            parsed_url = urlparse(url)
-            favicon_url = f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
-            
             # No descargar favicons durante la inicialización para evitar bloqueos
             # TODO: Implementar descarga asíncrona de favicons en el futuro
             
-            # Favicon por defecto
-            try:
-                default_icon = QIcon("icons/bookmark.png")
-                if default_icon.isNull():
-                    # Crear un ícono simple si no hay archivo
+            # Favicon por defecto: un único icono, leído del disco una sola vez
+            if self._default_icon is None:
+                try:
+                    self._default_icon = QIcon("icons/bookmark.png")
+                    if self._default_icon.isNull():
+                        # Crear un ícono simple si no hay archivo
+                        pixmap = QPixmap(16, 16)
+                        pixmap.fill()
+                        self._default_icon = QIcon(pixmap)
+                except:
+                    # Último recurso: ícono vacío
                     pixmap = QPixmap(16, 16)
                     pixmap.fill()
-                    default_icon = QIcon(pixmap)
-            except:
-                # Último recurso: ícono vacío
-                pixmap = QPixmap(16, 16)
-                pixmap.fill()
-                default_icon = QIcon(pixmap)
-                
-            self.favicon_cache[url] = default_icon
-            return default_icon
+                    self._default_icon = QIcon(pixmap)
+            return self._default_icon
             
         except Exception as e:
             print(f"Error obteniendo favicon: {e}")
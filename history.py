@@ -1,14 +1,122 @@
-from datetime import datetime
+import queue
+import threading
+import time
+from collections import deque, OrderedDict
+from PySide6.QtCore import QUrl
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QListWidget, QLabel
 
 class HistoryManager:
-    def __init__(self):
-        self.history = []
+    """Registro de navegación en memoria, acotado, que alimenta el historial persistente.
+
+    Guarda las últimas visitas en un buffer circular, agrupa los cambios de URL repetidos
+    o que solo cambian el fragmento (#...) dentro de una ventana de tiempo, y envía las
+    visitas deduplicadas al almacén persistente (privacy.HistoryManager) desde un hilo.
+    """
+
+    MAX_ENTRIES = 500          # Tamaño del buffer circular en memoria
+    COALESCE_WINDOW = 30       # Segundos en los que una misma URL (sin fragmento) cuenta una vez
+    RECENT_KEYS = 256          # URLs recientes recordadas para agrupar
+    WRITE_BATCH = 200          # Máximo de operaciones por transacción del escritor
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.history = deque(maxlen=max_entries)
+        self.store = None
+        self.suggestions = None
+        self._recent = OrderedDict()  # url sin fragmento -> instante de la última visita registrada
+        self._queue = queue.Queue()
+        self._writer = None
+
+    def attach_store(self, store):
+        """Conecta el almacén persistente y arranca el hilo que escribe en él"""
+        self.store = store
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+
+    def attach_suggestions(self, index):
+        """Conecta el índice de sugerencias de la barra de direcciones (suggestions.SuggestionIndex)"""
+        self.suggestions = index
 
     def record_history(self, url):
-        self.history.append({"url": url.toString(), "timestamp": datetime.now()})
+        if isinstance(url, QUrl):
+            url = url.toString()
+        key = url.split("#", 1)[0]
+        if not url or url.startswith("about:"):
+            return
+
+        now = time.time()
+        last = self._recent.get(key)
+        if last is not None and now - last < self.COALESCE_WINDOW:
+            # Misma página (o solo cambia el fragmento): actualizar la entrada existente
+            self._recent[key] = now
+            self._recent.move_to_end(key)
+            if self.history and self.history[-1][0].split("#", 1)[0] == key:
+                self.history[-1] = (url, now)
+            return
+
+        self._recent[key] = now
+        self._recent.move_to_end(key)
+        if len(self._recent) > self.RECENT_KEYS:
+            self._recent.popitem(last=False)
+
+        self.history.append((url, now))
+        if self.suggestions is not None:
+            self.suggestions.add_visit(key, when=now)
+        if self.store is not None:
+            self._queue.put(("visit", key, "", int(now * 1000000)))
+
+    def record_title(self, url, title):
+        """Actualiza el título de una URL ya registrada en el almacén persistente"""
+        if isinstance(url, QUrl):
+            url = url.toString()
+        url = url.split("#", 1)[0]
+        if self.suggestions is not None and url and title:
+            self.suggestions.set_title(url, title)
+        if self.store is not None and url and title:
+            self._queue.put(("title", url, title))
+
+    def _write_loop(self):
+        """Hilo escritor: vacía la cola en lotes, una transacción por lote"""
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.WRITE_BATCH:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            visits = [item[1:] for item in batch if item[0] == "visit"]
+            titles = [item[1:] for item in batch if item[0] == "title"]
+            try:
+                if visits:
+                    self.store.add_visits(visits)
+                if titles:
+                    self.store.update_titles(titles)
+            except Exception as e:
+                print(f"Error guardando historial: {e}")
+
+    def close(self, timeout=2):
+        """Termina el hilo escritor tras guardar lo pendiente"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=timeout)
 
     def show_history(self, tab_manager):
+        if self.store is not None:
+            # Diálogo completo sobre el historial persistente (carga perezosa y búsqueda)
+            from privacy import HistoryDialog
+            dialog = HistoryDialog(self.store, tab_manager.parent)
+            dialog.exec()
+            return
+
         dialog = QDialog()
         dialog.setWindowTitle("History")
         dialog.resize(600, 400)
@@ -18,8 +126,8 @@ class HistoryManager:
         layout.addWidget(label)
 
         history_list = QListWidget()
-        for entry in self.history:
-            history_list.addItem(f"{entry['url']} - {entry['timestamp']}")
+        for url, timestamp in self.history:
+            history_list.addItem(f"{url} - {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))}")
         history_list.itemClicked.connect(lambda item: tab_manager.add_new_tab(item.text().split(' - ')[0]))
         layout.addWidget(history_list)
 
@@ -0,0 +1,191 @@
+import os
+import threading
+import weakref
+from PySide6.QtCore import QObject, QSettings, Signal, QTimer
+from PySide6.QtWebEngineCore import QWebEngineProfile
+
+
+class HttpCachePolicy(QObject):
+    """Política de caché HTTP por perfil, aplicada una sola vez a cada QWebEngineProfile.
+
+    Modos (QSettings "TronBrowser/Settings", clave http_cache_mode):
+    - "disk": caché en disco con tope de http_cache_max_mb, en http_cache_path si se
+      indica (si no, la ruta de caché propia del perfil). Sobrevive a los reinicios.
+    - "memory": solo en memoria.
+    - "none": sin caché.
+    Los perfiles sin persistencia (ventanas privadas) usan siempre memoria.
+
+    El tamaño en disco se mide y la caché se borra fuera del hilo de la GUI; el
+    resultado llega por las señales size_ready y cleared. Al dejar el modo "disk" la
+    caché se vacía con clearHttpCache y el nuevo tipo se aplica cuando Chromium termina
+    (los ficheros son suyos: no se borra el directorio a mano).
+    """
+
+    MODES = ("disk", "memory", "none")
+    DEFAULT_MODE = "disk"
+    DEFAULT_MAX_MB = 512
+    CLEAR_FALLBACK_MS = 3000    # Sin clearHttpCacheCompleted (Qt < 6.7): medir pasado este tiempo
+
+    size_ready = Signal(int)    # bytes en disco de la caché
+    cleared = Signal(int)       # bytes liberados
+
+    def __init__(self, settings=None):
+        super().__init__()
+        self.settings = settings or QSettings("TronBrowser", "Settings")
+        self.mode = self.settings.value("http_cache_mode", self.DEFAULT_MODE)
+        if self.mode not in self.MODES:
+            self.mode = self.DEFAULT_MODE
+        self.max_mb = int(self.settings.value("http_cache_max_mb", self.DEFAULT_MAX_MB))
+        self.cache_path = self.settings.value("http_cache_path", "") or ""
+        self._profiles = weakref.WeakSet()
+        self.last_size = None   # Último tamaño medido, para saber cuánto libera clear()
+        self._clearing = 0
+        self._clear_after_measure = False
+        self._notify_clear = True
+        self._reconfigure_after_clear = False
+        self.size_ready.connect(self._remember_size)
+
+    def apply(self, profile):
+        """Configura la caché del perfil si aún no se ha hecho (barato si ya está aplicada)"""
+        if profile in self._profiles:
+            return
+        self._configure(profile)
+        self._profiles.add(profile)
+        if hasattr(profile, "clearHttpCacheCompleted"):
+            profile.clearHttpCacheCompleted.connect(self._on_clear_completed)
+
+    def _configure(self, profile):
+        try:
+            if profile.isOffTheRecord():
+                profile.setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
+            elif self.mode == "disk":
+                if self.cache_path:
+                    os.makedirs(self.cache_path, exist_ok=True)
+                    profile.setCachePath(self.cache_path)
+                profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+                profile.setHttpCacheMaximumSize(self.max_mb * 1024 * 1024)
+            elif self.mode == "memory":
+                profile.setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
+            else:
+                profile.setHttpCacheType(QWebEngineProfile.NoCache)
+        except Exception as e:
+            print(f"Error configurando la caché HTTP: {e}")
+
+    def set_policy(self, mode, max_mb=None, cache_path=None):
+        """Cambia la política, la guarda y la vuelve a aplicar a los perfiles ya configurados"""
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de caché desconocido: {mode}")
+        leaving_disk = self.mode == "disk" and mode != "disk"
+        self.mode = mode
+        if max_mb is not None:
+            self.max_mb = int(max_mb)
+        if cache_path is not None:
+            self.cache_path = cache_path
+        self.settings.setValue("http_cache_mode", self.mode)
+        self.settings.setValue("http_cache_max_mb", self.max_mb)
+        self.settings.setValue("http_cache_path", self.cache_path)
+        if leaving_disk and self._profiles:
+            # Lo escrito en disco ya no se usará: vaciarlo mientras sigue siendo la caché
+            # activa y cambiar el tipo cuando termine (_on_clear_completed)
+            self._reconfigure_after_clear = True
+            self.clear(notify=False)
+            return
+        self._configure_all()
+
+    def _configure_all(self):
+        for profile in list(self._profiles):
+            self._configure(profile)
+
+    def cache_paths(self):
+        paths = []
+        for profile in list(self._profiles):
+            if not profile.isOffTheRecord() and profile.cachePath():
+                paths.append(profile.cachePath())
+        return paths
+
+    @staticmethod
+    def _disk_usage(paths):
+        total = 0
+        stack = [path for path in paths if os.path.isdir(path)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                            elif entry.is_file(follow_symlinks=False):
+                                total += entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return total
+
+    def _remember_size(self, size):
+        # Conectada desde el hilo de trabajo: se ejecuta en el hilo de la GUI
+        self.last_size = size
+        if self._clear_after_measure:
+            self._clear_after_measure = False
+            self.clear(notify=self._notify_clear)
+
+    def measure(self, on_done=None):
+        """Calcula en segundo plano el tamaño de la caché en disco y emite size_ready"""
+        paths = self.cache_paths()
+
+        def work():
+            size = self._disk_usage(paths)
+            self._emit(self.size_ready, size)
+            if on_done:
+                on_done(size)
+        threading.Thread(target=work, daemon=True).start()
+
+    def clear(self, notify=True):
+        """Vacía la caché de todos los perfiles sin bloquear la GUI; al terminar emite cleared(bytes)
+
+        Chromium borra la caché en su propio hilo de E/S (clearHttpCache vuelve enseguida);
+        aquí solo se mide, también en segundo plano, lo que queda al acabar. Con
+        notify=False (cambio de política) no se emite cleared, solo se informa por consola.
+        """
+        profiles = list(self._profiles)
+        if not profiles:
+            return
+        if self._clearing or self._clear_after_measure:
+            self._notify_clear = self._notify_clear or notify
+            return
+        self._notify_clear = notify
+        before = self.last_size
+        if before is None:
+            # Medir antes de borrar y, entonces sí, pedir el borrado
+            self._clear_after_measure = True
+            self.measure()
+            return
+        self._clearing = len(profiles)
+        self._cleared_from = before
+        for profile in profiles:
+            profile.clearHttpCache()
+            if not hasattr(profile, "clearHttpCacheCompleted"):
+                QTimer.singleShot(self.CLEAR_FALLBACK_MS, self, self._on_clear_completed)
+
+    def _on_clear_completed(self):
+        if not self._clearing:
+            return
+        self._clearing -= 1
+        if self._clearing:
+            return
+        before = self._cleared_from
+        if self._reconfigure_after_clear:
+            self._reconfigure_after_clear = False
+            self._configure_all()
+        if self._notify_clear:
+            self.measure(on_done=lambda after: self._emit(self.cleared, max(before - after, 0)))
+        else:
+            self.measure(on_done=lambda after: print(
+                f"🧹 Caché HTTP en disco vaciada ({max(before - after, 0) // (1024 * 1024)} MB)"))
+
+    @staticmethod
+    def _emit(signal, value):
+        try:
+            signal.emit(value)
+        except RuntimeError:
+            pass  # El objeto Qt ya no existe (cierre de la aplicación)
@@ -0,0 +1,337 @@
+"""Servidor IPC local para automatización (sustituye al antiguo BookmarkListener).
+
+Escucha en 127.0.0.1:PORT. Cada mensaje es una trama con 4 bytes de longitud
+(big-endian) seguidos de un objeto JSON en UTF-8; cada petición recibe una respuesta
+con el mismo formato y el mismo "id":
+
+    {"id": 1, "cmd": "open", "url": "https://..."}              pestaña nueva al frente
+    {"id": 2, "cmd": "open-background", "url": "https://..."}   pestaña nueva sin cambiar de pestaña
+    {"id": 3, "cmd": "batch-open", "urls": [...], "background": true}
+    {"id": 4, "cmd": "query-tabs"}
+    -> {"id": 4, "ok": true, "result": [{"index": 0, "url": ..., "title": ..., "current": true, "loaded": true}]}
+
+Los clientes antiguos que mandaban la URL en texto plano siguen funcionando: la URL
+se abre en la pestaña actual, como antes, y no reciben respuesta.
+
+Toda la red va en un único hilo con `selectors` (muchos clientes a la vez, sin
+sondeos). Las peticiones se acumulan y llegan al hilo de la GUI por una señal en
+cola: una ráfaga de cientos de mensajes se atiende en una sola pasada del bucle de
+eventos, y las respuestas vuelven al hilo de red de una vez.
+"""
+import json
+import selectors
+import socket
+import threading
+import traceback
+from collections import deque
+from PySide6.QtCore import QObject, Signal, QUrl
+
+HOST = "127.0.0.1"
+PORT = 65432
+MAX_FRAME = 1024 * 1024     # Bytes máximos de un mensaje
+HEADER = 4
+
+
+def encode_frame(message):
+    payload = json.dumps(message, ensure_ascii=False).encode("utf-8")
+    return len(payload).to_bytes(HEADER, "big") + payload
+
+
+class _Connection:
+    __slots__ = ("sock", "conn_id", "inbuf", "outbuf", "legacy", "received")
+
+    def __init__(self, sock, conn_id):
+        self.sock = sock
+        self.conn_id = conn_id
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.legacy = False     # Cliente antiguo: URL en texto plano hasta cerrar
+        self.received = 0       # Tramas recibidas
+
+
+class IpcServer(QObject):
+    """Servidor de tramas JSON en un hilo de red; `handler(request)` se llama en el hilo de la GUI.
+
+    handler devuelve el "result" de la respuesta o lanza una excepción, que se
+    contesta como {"ok": false, "error": ...}.
+    """
+
+    _requests_ready = Signal()
+
+    def __init__(self, handler, host=HOST, port=PORT):
+        super().__init__()
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.stats = {"connections": 0, "requests": 0, "batches": 0, "largest_batch": 0}
+        self._inbox = deque()           # (id de conexión, petición) pendientes de la GUI
+        self._outbox = deque()          # (id de conexión, bytes) pendientes de enviar
+        self._lock = threading.Lock()
+        self._batch_scheduled = False
+        self._stop_event = threading.Event()
+        self._connections = {}
+        self._next_conn_id = 1
+        self._thread = None
+        self._requests_ready.connect(self._process_batch)  # Emitida desde el hilo de red: en cola
+
+    def start(self):
+        """Abre el puerto y arranca el hilo de red (lanza OSError si el puerto está ocupado)"""
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.server_socket.bind((self.host, self.port))
+        except OSError:
+            self.server_socket.close()
+            raise
+        self.port = self.server_socket.getsockname()[1]
+        self.server_socket.listen(128)
+        self.server_socket.setblocking(False)
+        # Par de sockets para despertar al selector cuando hay respuestas o hay que parar
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.server_socket, selectors.EVENT_READ, "accept")
+        self.selector.register(self._wake_recv, selectors.EVENT_READ, "wake")
+        self._thread = threading.Thread(target=self._run, name="IpcServer", daemon=True)
+        self._thread.start()
+        print(f"🔌 Servidor IPC escuchando en {self.host}:{self.port}")
+
+    def stop(self):
+        """Detiene el hilo de red y cierra todas las conexiones"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._wake()
+        self._thread.join(timeout=2)
+        self._thread = None
+
+    # --- Hilo de red ---
+
+    def _wake(self):
+        try:
+            self._wake_send.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass  # Ya hay un despertar pendiente en el buffer
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                for key, mask in self.selector.select():
+                    if key.data == "accept":
+                        self._accept()
+                    elif key.data == "wake":
+                        self._drain_wake()
+                    else:
+                        if mask & selectors.EVENT_READ:
+                            self._read(key.data)
+                        if mask & selectors.EVENT_WRITE and key.data.conn_id in self._connections:
+                            self._write(key.data)
+        except Exception as e:
+            if not self._stop_event.is_set():
+                print(f"Error en el servidor IPC: {e}")
+                traceback.print_exc()
+        finally:
+            for connection in list(self._connections.values()):
+                self._close(connection)
+            self.selector.close()
+            self.server_socket.close()
+            self._wake_recv.close()
+            self._wake_send.close()
+
+    def _accept(self):
+        while True:
+            try:
+                sock, _ = self.server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            sock.setblocking(False)
+            connection = _Connection(sock, self._next_conn_id)
+            self._next_conn_id += 1
+            self._connections[connection.conn_id] = connection
+            self.selector.register(sock, selectors.EVENT_READ, connection)
+            self.stats["connections"] += 1
+
+    def _drain_wake(self):
+        try:
+            while self._wake_recv.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+        with self._lock:
+            replies = list(self._outbox)
+            self._outbox.clear()
+        for conn_id, data in replies:
+            connection = self._connections.get(conn_id)
+            if connection is not None:
+                connection.outbuf += data
+                self._write(connection)
+
+    def _read(self, connection):
+        try:
+            data = connection.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            if connection.inbuf and (connection.legacy or
+                                     (not connection.received and self._looks_like_text(connection.inbuf))):
+                self._enqueue(connection, [{"cmd": "navigate",
+                                            "url": connection.inbuf.decode("utf-8", "replace").strip()}])
+            self._close(connection)
+            return
+        connection.inbuf += data
+        if connection.legacy:
+            return
+        requests = []
+        while len(connection.inbuf) >= HEADER:
+            length = int.from_bytes(connection.inbuf[:HEADER], "big")
+            if length > MAX_FRAME:
+                if not connection.received and self._looks_like_text(connection.inbuf):
+                    connection.legacy = True    # "http..." leído como longitud: cliente antiguo
+                    break
+                print("Servidor IPC: trama demasiado grande, conexión cerrada")
+                self._close(connection)
+                return
+            if len(connection.inbuf) < HEADER + length:
+                break
+            payload = bytes(connection.inbuf[HEADER:HEADER + length])
+            del connection.inbuf[:HEADER + length]
+            connection.received += 1
+            try:
+                request = json.loads(payload.decode("utf-8"))
+                if not isinstance(request, dict):
+                    raise ValueError("se esperaba un objeto JSON")
+            except ValueError as e:
+                connection.outbuf += encode_frame({"ok": False, "error": f"JSON no válido: {e}"})
+                self._write(connection)
+                continue
+            requests.append(request)
+        if requests:
+            self._enqueue(connection, requests)
+
+    @staticmethod
+    def _looks_like_text(data):
+        return all(32 <= byte < 127 for byte in data[:HEADER])
+
+    def _enqueue(self, connection, requests):
+        with self._lock:
+            for request in requests:
+                self._inbox.append((connection.conn_id, request))
+            schedule = not self._batch_scheduled
+            self._batch_scheduled = True
+        self.stats["requests"] += len(requests)
+        if schedule:
+            self._requests_ready.emit()
+
+    def _write(self, connection):
+        if connection.outbuf:
+            try:
+                sent = connection.sock.send(connection.outbuf)
+                del connection.outbuf[:sent]
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError:
+                self._close(connection)
+                return
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if connection.outbuf else 0)
+        try:
+            self.selector.modify(connection.sock, events, connection)
+        except (KeyError, ValueError):
+            pass
+
+    def _close(self, connection):
+        self._connections.pop(connection.conn_id, None)
+        try:
+            self.selector.unregister(connection.sock)
+        except (KeyError, ValueError):
+            pass
+        connection.sock.close()
+
+    # --- Hilo de la GUI ---
+
+    def _process_batch(self):
+        """Atiende de una vez todas las peticiones acumuladas y devuelve las respuestas"""
+        with self._lock:
+            batch = list(self._inbox)
+            self._inbox.clear()
+            self._batch_scheduled = False
+        if not batch:
+            return
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        replies = []
+        for conn_id, request in batch:
+            reply = {"id": request.get("id")}
+            try:
+                reply["result"] = self.handler(request)
+                reply["ok"] = True
+            except Exception as e:
+                reply["ok"] = False
+                reply["error"] = str(e)
+            if request.get("cmd") != "navigate":   # Los clientes antiguos no esperan respuesta
+                replies.append((conn_id, encode_frame(reply)))
+        if replies:
+            with self._lock:
+                self._outbox.extend(replies)
+            self._wake()
+
+
+class BrowserCommands:
+    """Ejecuta las órdenes IPC sobre la ventana principal (siempre en el hilo de la GUI)"""
+
+    def __init__(self, window):
+        self.window = window
+
+    def __call__(self, request):
+        command = request.get("cmd")
+        method = getattr(self, "cmd_" + str(command).replace("-", "_"), None)
+        if method is None:
+            raise ValueError(f"Orden desconocida: {command}")
+        return method(request)
+
+    @staticmethod
+    def _url(value):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError("Falta la URL")
+        return QUrl.fromUserInput(value.strip()).toString()
+
+    def cmd_navigate(self, request):
+        url = self._url(request.get("url"))
+        print(f"URL recibida: {url}")
+        self.window.navigation_manager.navigate_to_url(url)
+
+    def cmd_open(self, request):
+        self.window.tab_manager.add_new_tab(self._url(request.get("url")))
+        return self.window.tab_manager.tabs.currentIndex()
+
+    def cmd_open_background(self, request):
+        return self.window.tab_manager.add_background_tab(self._url(request.get("url")))
+
+    def cmd_batch_open(self, request):
+        urls = request.get("urls")
+        if not isinstance(urls, list):
+            raise ValueError("'urls' debe ser una lista")
+        urls = [self._url(url) for url in urls]
+        tabs = self.window.tab_manager.tabs
+        tabs.setUpdatesEnabled(False)   # Un solo repintado para toda la tanda
+        try:
+            indexes = [self.window.tab_manager.add_background_tab(url) for url in urls]
+            if urls and not request.get("background", True):
+                tabs.setCurrentIndex(indexes[0])
+        finally:
+            tabs.setUpdatesEnabled(True)
+        return indexes
+
+    def cmd_query_tabs(self, request):
+        tab_manager = self.window.tab_manager
+        current = tab_manager.tabs.currentIndex()
+        result = []
+        for index in range(tab_manager.tabs.count()):
+            widget = tab_manager.tabs.widget(index)
+            result.append({"index": index, "url": widget.url().toString(),
+                           "title": widget.title() or tab_manager.tabs.tabText(index),
+                           "current": index == current,
+                           "loaded": not tab_manager.is_placeholder(widget)})
+        return result
@@ -1,10 +1,22 @@
+import time
+STARTED_AT = time.perf_counter()  # Antes de cualquier import pesado: base del tiempo hasta el primer pintado
+
+import startup_trace
+startup_trace.install(STARTED_AT)  # --startup-trace[=FICHERO] o TRON_STARTUP_TRACE
+
 import sys
-import socket
+from single_instance import InstanceServer, command_from_args, forward_to_running_instance
+
+# Si ya hay un navegador abierto, le pasamos los argumentos y salimos sin cargar Qt WebEngine
+if __name__ == "__main__" and "--new-instance" not in sys.argv and not startup_trace.enabled():
+    if forward_to_running_instance(sys.argv[1:]):
+        sys.exit(0)
+
 import traceback
-import time
-from threading import Thread, Event
+from PySide6.QtCore import QUrl
 from PySide6.QtWidgets import QApplication
 from ui import MainWindow
+from ipc_server import IpcServer, BrowserCommands
 
 # Manejo global de excepciones antes de cualquier inicialización
 def exception_handler(type, value, tb):
@@ -13,65 +25,44 @@ def exception_handler(type, value, tb):
 
 sys.excepthook = exception_handler
 
-class BookmarkListener(Thread):
-    def __init__(self, navigation_manager):
-        super().__init__()
-        self.navigation_manager = navigation_manager
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.server_socket.bind(("localhost", 65432))
-        self.server_socket.settimeout(1)  # Timeout para permitir verificar el flag de salida
-        self.server_socket.listen(1)
-        self._stop_event = Event()  # Evento para controlar la parada del thread
-        self.daemon = True  # Thread demonio para terminar con el programa principal
-
-    def run(self):
-        while not self._stop_event.is_set():
-            try:
-                client_socket, _ = self.server_socket.accept()
-                with client_socket:
-                    url = client_socket.recv(1024).decode("utf-8").strip()
-                    if url:
-                        print(f"URL recibida: {url}")
-                        try:
-                            self.navigation_manager.navigate_to_url(url)
-                        except Exception as e:
-                            print(f"Error al manejar la URL: {e}")
-            except socket.timeout:
-                continue  # Timeout normal para verificar stop_event
-            except Exception as e:
-                if not self._stop_event.is_set():
-                    print(f"Error en BookmarkListener: {e}")
-                    traceback.print_exc()
-
-    def stop(self):
-        """Detiene el thread de manera segura"""
-        self._stop_event.set()
-        try:
-            # Conexión temporal para desbloquear el accept()
-            temp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            temp_socket.connect(("localhost", 65432))
-            temp_socket.close()
-        except Exception:
-            pass
-        if self.is_alive():
-            self.join(timeout=2)
-        try:
-            self.server_socket.close()
-        except Exception:
-            pass
+def handle_instance_command(window, command):
+    """Atiende un mensaje de otra instancia: abre sus URLs en pestañas nuevas y trae la ventana al frente"""
+    try:
+        if command.get("cmd") == "open":
+            for url in command.get("urls", []):
+                if isinstance(url, str) and url.strip():
+                    window.tab_manager.add_new_tab(QUrl.fromUserInput(url).toString())
+        if window.isMinimized():
+            window.showNormal()
+        window.raise_()
+        window.activateWindow()
+    except Exception as e:
+        print(f"Error atendiendo a otra instancia: {e}")
 
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    # Iniciar el socket listener para URLs después de verificar que navigation_manager existe
-    bookmark_listener = None
-    if hasattr(window, 'navigation_manager') and window.navigation_manager:
-        bookmark_listener = BookmarkListener(window.navigation_manager)
-        bookmark_listener.start()
+    startup_trace.mark("main")
+    with startup_trace.phase("QApplication"):
+        app = QApplication(sys.argv)
+    with startup_trace.phase("MainWindow"):
+        window = MainWindow(started_at=STARTED_AT)
+    # Instancia única: las siguientes ejecuciones nos mandan sus URLs por el socket local
+    instance_server = InstanceServer()
+    if instance_server.listen():
+        instance_server.command_received.connect(lambda command: handle_instance_command(window, command))
     else:
-        print("Advertencia: Navigation manager no disponible, socket listener deshabilitado")
-    window.show()
+        print("Advertencia: ya hay otra instancia escuchando; esta no recibirá enlaces externos")
+    initial_command = command_from_args(sys.argv[1:])
+    if initial_command["cmd"] == "open":
+        handle_instance_command(window, initial_command)
+    # Servidor IPC para automatización: las órdenes se ejecutan por tandas en el hilo de la GUI
+    ipc_server = IpcServer(BrowserCommands(window))
+    try:
+        ipc_server.start()
+    except OSError as e:
+        print(f"Advertencia: servidor IPC deshabilitado (puerto ocupado): {e}")
+    with startup_trace.phase("window.show"):
+        window.show()
+    startup_trace.watch_first_load(window.tab_manager.tabs)
     try:
         exit_code = app.exec()
     except Exception as e:
@@ -79,8 +70,11 @@ def main():
         traceback.print_exc()
         exit_code = 1
     finally:
-        if bookmark_listener:
-            bookmark_listener.stop()
+        ipc_server.stop()
+        instance_server.close()
+        window.history_manager.close()
+        window.bookmark_store.close()
+        window.suggestion_index.save_snapshot()
     sys.exit(exit_code)
 
 if __name__ == "__main__":
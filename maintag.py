@@ -1,17 +1,18 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                               QLineEdit, QTreeWidget, QTreeWidgetItem, QDialog,
                               QLabel, QComboBox, QMessageBox, QMenu, QInputDialog,
-                              QMainWindow, QTextEdit)
+                              QMainWindow, QTextEdit, QCheckBox)
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QIcon, QPixmap
 import sqlite3
+from bookmark_store import BookmarkStore
 import os
 from PySide6.QtCore import QUrl
 import urllib.request
 from urllib.parse import urlparse
 
 class BookmarkDialog(QDialog):
-    def __init__(self, parent=None, values=None):
+    def __init__(self, parent=None, values=None, categories=()):
         super().__init__(parent)
         self.setWindowTitle("Add Bookmark" if not values else "Edit Bookmark")
         self.setModal(True)
@@ -40,8 +41,10 @@ class BookmarkDialog(QDialog):
         category_layout = QHBoxLayout()
         category_layout.addWidget(QLabel("Category:"))
         self.category_combo = QComboBox()
+        self.category_combo.setEditable(True)
+        self.category_combo.addItems(list(categories))
         if values:
-            self.category_combo.addItem(values[2])
+            self.category_combo.setCurrentText(values[2])
         category_layout.addWidget(self.category_combo)
         layout.addLayout(category_layout)
         
@@ -62,6 +65,12 @@ class BookmarkDialog(QDialog):
             self.notes_edit.setPlainText(values[4])
         notes_layout.addWidget(self.notes_edit)
         layout.addLayout(notes_layout)
+
+        # Favorites bar
+        self.show_in_bar_check = QCheckBox("Show in favorites bar")
+        if values and len(values) > 5:
+            self.show_in_bar_check.setChecked(bool(values[5]))
+        layout.addWidget(self.show_in_bar_check)
         
         # Buttons
         button_layout = QHBoxLayout()
@@ -79,16 +88,20 @@ class BookmarkDialog(QDialog):
             self.url_edit.text(),
             self.category_combo.currentText(),
             self.tags_edit.text(),
-            self.notes_edit.toPlainText()
+            self.notes_edit.toPlainText(),
+            self.show_in_bar_check.isChecked()
         )
 
 class BookmarkManager(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.favicon_cache = {}
+        self._default_favicon = None
+        self.bookmark_items = {}  # id -> item, para filtrar sin recorrer textos
+        self.category_items = {}  # categoría -> item de primer nivel
+        self._loaded = False      # El árbol se construye la primera vez que se muestra
         self.init_ui()
         self.init_database()
-        self.load_bookmarks()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -152,43 +165,15 @@ class BookmarkManager(QWidget):
         layout.addWidget(self.tree)
 
     def init_database(self):
+        """Usa el almacén de marcadores compartido de la ventana (o uno propio si no lo hay)"""
         try:
-            self.conn = sqlite3.connect('bookmarks.db')
-            self.cursor = self.conn.cursor()
-            
-            # Create tables
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bookmarks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    url TEXT NOT NULL,
-                    category TEXT NOT NULL,
-                    notes TEXT,
-                    tags TEXT
-                )
-            ''')
-            
-            self.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS categories (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT UNIQUE NOT NULL
-                )
-            ''')
-            
-            # Insert initial categories
-            initial_categories = [
-                "All bookmarks", "Buy", "Trash", "Work",
-                "Design Inspiration", "Interior", "Interface", "Icons",
-                "Apps", "Home", "Buy", "Movies", "Plan next trip"
-            ]
-            
-            for category in initial_categories:
-                try:
-                    self.cursor.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (category,))
-                except sqlite3.Error:
-                    continue
-            
-            self.conn.commit()
+            parent = self.parent()
+            self.store = getattr(parent, 'bookmark_store', None) or BookmarkStore()
+            # Los cambios (desde aquí, la barra de favoritos o bookmarks.py) tocan solo su fila
+            self.store.added.connect(self.on_bookmark_added)
+            self.store.updated.connect(self.on_bookmark_updated)
+            self.store.removed.connect(self.on_bookmark_removed)
+            self.store.changed.connect(self.on_store_changed)
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Error initializing database: {str(e)}")
 
@@ -204,121 +189,231 @@ class BookmarkManager(QWidget):
         except Exception as e:
             print(f"Error al obtener favicon: {str(e)}")
         
-        # Favicon por defecto siempre
-        default_pixmap = QPixmap()
-        try:
-            if not default_pixmap.load("icons/bookmark.png"):
-                # Crear un pixmap simple si no hay archivo
+        # Favicon por defecto siempre: se lee del disco una sola vez
+        if self._default_favicon is None:
+            default_pixmap = QPixmap()
+            try:
+                if not default_pixmap.load("icons/bookmark.png"):
+                    # Crear un pixmap simple si no hay archivo
+                    default_pixmap = QPixmap(16, 16)
+                    default_pixmap.fill()
+            except:
+                # Último recurso: pixmap vacío
                 default_pixmap = QPixmap(16, 16)
                 default_pixmap.fill()
-        except:
-            # Último recurso: pixmap vacío
-            default_pixmap = QPixmap(16, 16)
-            default_pixmap.fill()
+            self._default_favicon = (default_pixmap, QIcon(default_pixmap))
             
-        return default_pixmap
+        return self._default_favicon[0]
+
+    def get_favicon_icon(self, url):
+        """Icono para el árbol; el por defecto es un único QIcon compartido por todas las filas"""
+        if url in self.favicon_cache:
+            return QIcon(self.favicon_cache[url])
+        self.get_favicon(url)
+        return self._default_favicon[1]
+
+    def showEvent(self, event):
+        self.ensure_loaded()
+        super().showEvent(event)
+
+    def ensure_loaded(self):
+        """Construye el árbol la primera vez que hace falta (no al arrancar el navegador)"""
+        if not self._loaded:
+            self.load_bookmarks()
 
     def load_bookmarks(self):
+        self._loaded = True
         self.tree.clear()
+        self.bookmark_items = {}
+        self.category_items = {}
         try:
-            # First, get all categories
-            self.cursor.execute("SELECT name FROM categories ORDER BY name")
-            categories = self.cursor.fetchall()
-            
             # Create category items
-            category_items = {}
-            for category in categories:
-                category_name = category[0]
-                category_item = QTreeWidgetItem(self.tree)
-                category_item.setText(0, category_name)
-                category_item.setExpanded(True)
-                category_items[category_name] = category_item
+            for category_name in self.store.categories():
+                self._add_category_item(category_name)
             
             # Load bookmarks under their categories
-            self.cursor.execute("SELECT id, title, url, category, tags, notes FROM bookmarks ORDER BY title")
-            for bookmark in self.cursor.fetchall():
-                item = QTreeWidgetItem(category_items.get(bookmark[3], self.tree))
-                
-                # Set favicon
-                favicon = self.get_favicon(bookmark[2])
-                item.setIcon(0, QIcon(favicon))
-                
-                item.setText(0, bookmark[1])  # Title
-                item.setText(1, bookmark[2])  # URL
-                item.setText(2, bookmark[3])  # Category
-                item.setText(3, bookmark[4] if bookmark[4] else "")  # Tags
-                item.setText(4, bookmark[5] if bookmark[5] else "")  # Notes
-                item.setData(0, Qt.UserRole, bookmark[0])  # Store ID
+            for bookmark in self.store.bookmarks():
+                item = QTreeWidgetItem(self.category_items.get(bookmark['category'], self.tree))
+                self._fill_item(item, bookmark)
+                self.bookmark_items[bookmark['id']] = item
                 
             # Update tag filter
             self.update_tag_filter()
+            self.apply_filters()
                 
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Error loading bookmarks: {str(e)}")
 
+    def _fill_item(self, item, bookmark):
+        # Set favicon
+        item.setIcon(0, self.get_favicon_icon(bookmark['url']))
+        
+        item.setText(0, bookmark['title'])
+        item.setText(1, bookmark['url'])
+        item.setText(2, bookmark['category'])
+        item.setText(3, ", ".join(bookmark['tags']))
+        item.setText(4, bookmark['notes'])
+        item.setData(0, Qt.UserRole, bookmark['id'])  # Store ID
+        item.setData(1, Qt.UserRole, bookmark['show_in_bar'])
+
+    def _add_category_item(self, category_name):
+        """Item de categoría en su sitio: por nombre y antes de los marcadores sin categoría"""
+        index = 0
+        while index < self.tree.topLevelItemCount():
+            item = self.tree.topLevelItem(index)
+            if item.data(0, Qt.UserRole) is not None or item.text(0) > category_name:
+                break
+            index += 1
+        category_item = QTreeWidgetItem()
+        category_item.setText(0, category_name)
+        self.tree.insertTopLevelItem(index, category_item)
+        category_item.setExpanded(True)
+        self.category_items[category_name] = category_item
+        return category_item
+
+    def _place_item(self, item, bookmark):
+        """Coloca el item bajo su categoría, en orden de título (como BookmarkStore.bookmarks)"""
+        parent = self.category_items.get(bookmark['category'])
+        title = bookmark['title'].lower()
+        if parent is not None:
+            index = 0
+            while index < parent.childCount() and parent.child(index).text(0).lower() <= title:
+                index += 1
+            parent.insertChild(index, item)
+        else:
+            # Sin categoría conocida: al final del primer nivel, tras las categorías
+            index = len(self.category_items)
+            while (index < self.tree.topLevelItemCount()
+                   and self.tree.topLevelItem(index).text(0).lower() <= title):
+                index += 1
+            self.tree.insertTopLevelItem(index, item)
+
+    def _take_item(self, item):
+        parent = item.parent()
+        if parent is not None:
+            parent.removeChild(item)
+        else:
+            self.tree.takeTopLevelItem(self.tree.indexOfTopLevelItem(item))
+
+    def on_bookmark_added(self, bookmark_id):
+        if not self._loaded:
+            return  # Se leerá al construir el árbol
+        try:
+            bookmark = self.store.get(bookmark_id)
+            if not bookmark or bookmark_id in self.bookmark_items:
+                return
+            item = QTreeWidgetItem()
+            self._fill_item(item, bookmark)
+            self._place_item(item, bookmark)
+            self.bookmark_items[bookmark_id] = item
+            self._refresh_after_row_change()
+        except sqlite3.Error as e:
+            print(f"Error adding bookmark to tree: {str(e)}")
+
+    def on_bookmark_updated(self, bookmark_id):
+        if not self._loaded:
+            return
+        try:
+            bookmark = self.store.get(bookmark_id)
+            item = self.bookmark_items.get(bookmark_id)
+            if item is None or bookmark is None:
+                if item is not None:
+                    self.on_bookmark_removed(bookmark_id)
+                elif bookmark is not None:
+                    self.on_bookmark_added(bookmark_id)
+                return
+            moved = (item.text(0).lower() != bookmark['title'].lower()
+                     or item.text(2) != bookmark['category'])
+            self._fill_item(item, bookmark)
+            if moved:
+                self._take_item(item)
+                self._place_item(item, bookmark)
+            self._refresh_after_row_change()
+        except sqlite3.Error as e:
+            print(f"Error updating bookmark in tree: {str(e)}")
+
+    def on_bookmark_removed(self, bookmark_id):
+        if not self._loaded:
+            return
+        item = self.bookmark_items.pop(bookmark_id, None)
+        if item is not None:
+            self._take_item(item)
+            self._refresh_after_row_change()
+
+    def on_store_changed(self):
+        """Categorías o tags nuevos: añadir solo lo que falta"""
+        if not self._loaded:
+            return
+        try:
+            for category_name in self.store.categories():
+                if category_name not in self.category_items:
+                    self._add_category_item(category_name)
+            self.update_tag_filter()
+        except sqlite3.Error as e:
+            print(f"Error updating categories: {str(e)}")
+
+    def _refresh_after_row_change(self):
+        self.update_tag_filter()
+        if self.search_bar.text() or self.tag_filter.currentData():
+            self.apply_filters()  # Sin filtro activo no hay nada que ocultar
+
     def update_tag_filter(self):
-        """Actualiza el filtro de tags"""
+        """Sincroniza el filtro de tags con la tabla de tags: solo añade, quita o renombra lo que cambió"""
         try:
+            counts = self.store.tag_counts()  # Nº por tag mantenido por triggers: sin agregar nada
+            self.tag_filter.blockSignals(True)
             current_tag = self.tag_filter.currentData()
-            self.tag_filter.clear()
-            self.tag_filter.addItem("All Tags", "")
-            
-            # Get all unique tags
-            self.cursor.execute("SELECT DISTINCT tags FROM bookmarks WHERE tags IS NOT NULL AND tags != ''")
-            tags = set()
-            for row in self.cursor.fetchall():
-                if row[0]:
-                    tags.update(tag.strip() for tag in row[0].split(','))
-            
-            # Add tags to filter
-            for tag in sorted(tags):
-                self.tag_filter.addItem(tag, tag)
-            
-            # Restore previous selection
-            if current_tag:
-                index = self.tag_filter.findData(current_tag)
-                if index >= 0:
-                    self.tag_filter.setCurrentIndex(index)
+            # Quitar los tags que ya no existen
+            for index in range(self.tag_filter.count() - 1, 0, -1):
+                if self.tag_filter.itemData(index) not in counts:
+                    self.tag_filter.removeItem(index)
+            # Añadir los nuevos en su sitio (orden alfabético) y actualizar los contadores
+            index = 1
+            for tag, count in counts.items():
+                label = f"{tag} ({count})"
+                if index < self.tag_filter.count() and self.tag_filter.itemData(index) == tag:
+                    if self.tag_filter.itemText(index) != label:
+                        self.tag_filter.setItemText(index, label)
+                else:
+                    self.tag_filter.insertItem(index, label, tag)
+                index += 1
+            if current_tag and self.tag_filter.findData(current_tag) < 0:
+                self.tag_filter.setCurrentIndex(0)  # El tag seleccionado ya no existe
+            self.tag_filter.blockSignals(False)
                     
         except sqlite3.Error as e:
             print(f"Error updating tag filter: {str(e)}")
 
-    def filter_by_tag(self):
-        """Filtra los marcadores por tag seleccionado"""
-        selected_tag = self.tag_filter.currentData()
-        if not selected_tag:
-            # Show all bookmarks
-            for i in range(self.tree.topLevelItemCount()):
-                item = self.tree.topLevelItem(i)
-                item.setHidden(False)
-                for j in range(item.childCount()):
-                    item.child(j).setHidden(False)
-        else:
-            # Filter by tag
+    def apply_filters(self):
+        """Aplica a la vez el tag y el texto de búsqueda con una sola consulta indexada (FTS5 + bookmark_tags)"""
+        try:
+            ids = self.store.search_ids(self.search_bar.text(), self.tag_filter.currentData() or None)
+        except sqlite3.Error as e:
+            print(f"Error filtering bookmarks: {str(e)}")
+            return
+        self.tree.setUpdatesEnabled(False)
+        try:
+            for bookmark_id, item in self.bookmark_items.items():
+                item.setHidden(ids is not None and bookmark_id not in ids)
             for i in range(self.tree.topLevelItemCount()):
                 item = self.tree.topLevelItem(i)
-                show_category = False
-                for j in range(item.childCount()):
-                    child = item.child(j)
-                    tags = child.text(3).split(',')
-                    if selected_tag in [tag.strip() for tag in tags]:
-                        child.setHidden(False)
-                        show_category = True
-                    else:
-                        child.setHidden(True)
-                item.setHidden(not show_category)
+                if item.data(0, Qt.UserRole) is not None:
+                    continue  # Marcador sin categoría conocida
+                visible = any(not item.child(j).isHidden() for j in range(item.childCount()))
+                item.setHidden(ids is not None and not visible)
+        finally:
+            self.tree.setUpdatesEnabled(True)
+
+    def filter_by_tag(self):
+        """Filtra los marcadores por tag seleccionado"""
+        self.apply_filters()
 
     def add_bookmark(self):
-        dialog = BookmarkDialog(self)
+        dialog = BookmarkDialog(self, categories=self.store.categories())
         if dialog.exec():
-            title, url, category, tags, notes = dialog.get_values()
+            title, url, category, tags, notes, show_in_bar = dialog.get_values()
             try:
-                self.cursor.execute(
-                    "INSERT INTO bookmarks (title, url, category, tags, notes) VALUES (?, ?, ?, ?, ?)",
-                    (title, url, category, tags, notes)
-                )
-                self.conn.commit()
-                self.load_bookmarks()
+                self.store.add(url, title, category, notes, tags, show_in_bar)
             except sqlite3.Error as e:
                 QMessageBox.critical(self, "Database Error", f"Error adding bookmark: {str(e)}")
 
@@ -326,8 +421,7 @@ class BookmarkManager(QWidget):
         category, ok = QInputDialog.getText(self, "Add Category", "Category Name:")
         if ok and category:
             try:
-                self.cursor.execute("INSERT INTO categories (name) VALUES (?)", (category,))
-                self.conn.commit()
+                self.store.add_category(category)
                 QMessageBox.information(self, "Success", f"Category '{category}' added successfully!")
             except sqlite3.IntegrityError:
                 QMessageBox.warning(self, "Error", "This category already exists.")
@@ -336,10 +430,9 @@ class BookmarkManager(QWidget):
 
     def show_categories(self):
         try:
-            self.cursor.execute("SELECT name FROM categories ORDER BY name")
-            categories = self.cursor.fetchall()
+            counts = self.store.category_counts()
             
-            if not categories:
+            if not counts:
                 QMessageBox.information(self, "Categories", "No categories found.")
                 return
                 
@@ -355,12 +448,7 @@ class BookmarkManager(QWidget):
             list_widget.setHeaderLabels(["Category", "Bookmark Count"])
             list_widget.setColumnWidth(0, 200)
             
-            for category in categories:
-                category_name = category[0]
-                # Get bookmark count for this category
-                self.cursor.execute("SELECT COUNT(*) FROM bookmarks WHERE category = ?", (category_name,))
-                count = self.cursor.fetchone()[0]
-                
+            for category_name, count in counts.items():
                 item = QTreeWidgetItem(list_widget)
                 item.setText(0, category_name)
                 item.setText(1, str(count))
@@ -416,17 +504,14 @@ class BookmarkManager(QWidget):
 
     def edit_bookmark(self, item):
         bookmark_id = item.data(0, Qt.UserRole)
-        values = (item.text(0), item.text(1), item.text(2), item.text(3), item.text(4))
-        dialog = BookmarkDialog(self, values)
+        values = (item.text(0), item.text(1), item.text(2), item.text(3), item.text(4),
+                  item.data(1, Qt.UserRole))
+        dialog = BookmarkDialog(self, values, self.store.categories())
         if dialog.exec():
-            title, url, category, tags, notes = dialog.get_values()
+            title, url, category, tags, notes, show_in_bar = dialog.get_values()
             try:
-                self.cursor.execute(
-                    "UPDATE bookmarks SET title=?, url=?, category=?, tags=?, notes=? WHERE id=?",
-                    (title, url, category, tags, notes, bookmark_id)
-                )
-                self.conn.commit()
-                self.load_bookmarks()
+                self.store.update(bookmark_id, title=title, url=url, category=category,
+                                  tags=tags, notes=notes, show_in_bar=show_in_bar)
             except sqlite3.Error as e:
                 QMessageBox.critical(self, "Database Error", f"Error updating bookmark: {str(e)}")
 
@@ -437,21 +522,13 @@ class BookmarkManager(QWidget):
         if reply == QMessageBox.Yes:
             bookmark_id = item.data(0, Qt.UserRole)
             try:
-                self.cursor.execute("DELETE FROM bookmarks WHERE id=?", (bookmark_id,))
-                self.conn.commit()
-                self.load_bookmarks()
+                self.store.remove(bookmark_id)
             except sqlite3.Error as e:
                 QMessageBox.critical(self, "Database Error", f"Error deleting bookmark: {str(e)}")
 
     def search_bookmarks(self, text):
-        for i in range(self.tree.topLevelItemCount()):
-            item = self.tree.topLevelItem(i)
-            show = False
-            for j in range(item.columnCount()):
-                if text.lower() in item.text(j).lower():
-                    show = True
-                    break
-            item.setHidden(not show)
+        """Filtra por texto en título, URL y notas (combinado con el tag seleccionado)"""
+        self.apply_filters()
 
     def add_new_tag(self):
         """Añade un nuevo tag al sistema"""
@@ -466,23 +543,12 @@ class BookmarkManager(QWidget):
             if ok and tag:
                 tag = tag.strip()
                 if tag:
-                    # Verificar si el tag ya existe
-                    self.cursor.execute("SELECT DISTINCT tags FROM bookmarks WHERE tags IS NOT NULL AND tags != ''")
-                    existing_tags = set()
-                    for row in self.cursor.fetchall():
-                        if row[0]:
-                            existing_tags.update(tag.strip() for tag in row[0].split(','))
-                    
-                    if tag in existing_tags:
+                    # La tabla de etiquetas la guarda aunque aún no la use ningún marcador
+                    if not self.store.add_tag(tag):
                         QMessageBox.warning(self, "Warning", f"Tag '{tag}' already exists!")
                         return
                     
-                    # Añadir el tag al filtro
-                    self.tag_filter.addItem(tag, tag)
-                    self.tag_filter.setCurrentText(tag)
-                    
-                    # Actualizar la base de datos si es necesario
-                    # (Aquí podrías añadir una tabla específica para tags si lo prefieres)
+                    self.tag_filter.setCurrentIndex(self.tag_filter.findData(tag))
                     
                     QMessageBox.information(self, "Success", f"Tag '{tag}' added successfully!")
                     
@@ -491,19 +557,23 @@ class BookmarkManager(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Unexpected error: {str(e)}")
 
+    def is_bookmarked(self, url):
+        """Verifica si una URL está en marcadores (consulta por el índice de url)"""
+        try:
+            return self.store.is_bookmarked(url)
+        except sqlite3.Error as e:
+            print(f"Error comprobando marcador: {str(e)}")
+            return False
+
     def get_favorites_for_bar(self):
         """Devuelve una lista de favoritos marcados para mostrar en la barra de favoritos"""
         favs = []
         try:
-            self.cursor.execute("SELECT title, url, notes, tags FROM bookmarks WHERE notes LIKE '%[barra]%' OR tags LIKE '%[barra]%' OR category LIKE '%Barra%' OR tags LIKE '%barra%' OR notes LIKE '%barra%'")
-            for row in self.cursor.fetchall():
-                title, url, notes, tags = row
-                # Obtener favicon
-                icon = self.get_favicon(url)
+            for bookmark in self.store.bar_bookmarks():
                 favs.append({
-                    'url': url,
-                    'title': title,
-                    'icon': icon
+                    'url': bookmark['url'],
+                    'title': bookmark['title'],
+                    'icon': self.get_favicon(bookmark['url'])
                 })
         except Exception as e:
             print(f"Error al obtener favoritos para barra: {str(e)}")
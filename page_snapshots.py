@@ -0,0 +1,100 @@
+import time
+from PySide6.QtCore import QObject, QTimer
+
+
+class PageSnapshotCache(QObject):
+    """Instantáneas del HTML de las pestañas, tomadas solo cuando alguien las pide.
+
+    page().toHtml() serializa el DOM entero y lo copia por IPC desde el proceso de
+    renderizado, así que no se llama al navegar ni al cambiar de pestaña, sino cuando
+    el panel de scraping necesita contenido. Cada pestaña guarda su última instantánea
+    con la clave (url, generación de carga); la generación sube en cada loadStarted,
+    de modo que recargar la misma URL invalida la copia anterior.
+
+    schedule() agrupa las peticiones: al cambiar de pestaña varias veces seguidas solo
+    se serializa la pestaña en la que se acaba, DEBOUNCE_MS después del último cambio.
+    """
+
+    DEBOUNCE_MS = 250
+
+    def __init__(self):
+        super().__init__()
+        self.stats = {"requests": 0, "hits": 0, "snapshots": 0, "bytes": 0, "ms": 0.0}
+        self._scheduled = None      # (navegador, callback) pendiente del debounce
+        self._pending = {}          # id(navegador) -> (clave, [callbacks]) esperando toHtml
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(self.DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self._run_scheduled)
+
+    def track(self, browser):
+        """Lleva la generación de carga del navegador (una vez por pestaña)"""
+        browser.load_generation = 0
+        browser.page_snapshot = None
+        browser.loadStarted.connect(lambda: self._invalidate(browser))
+
+    @staticmethod
+    def _invalidate(browser):
+        browser.load_generation = getattr(browser, "load_generation", 0) + 1
+        browser.page_snapshot = None    # Liberar el HTML viejo en cuanto deja de valer
+
+    @staticmethod
+    def key(browser):
+        return browser.url().toString(), getattr(browser, "load_generation", 0)
+
+    def schedule(self, browser, callback):
+        """Pide la instantánea tras el debounce; una petición nueva sustituye a la anterior"""
+        self._scheduled = (browser, callback)
+        self.debounce_timer.start()
+
+    def cancel(self):
+        self._scheduled = None
+        self.debounce_timer.stop()
+
+    def _run_scheduled(self):
+        if self._scheduled is not None:
+            browser, callback = self._scheduled
+            self._scheduled = None
+            self.request(browser, callback)
+
+    def request(self, browser, callback):
+        """Entrega callback(html, url) desde la caché o, si no vale, con un único toHtml"""
+        self.stats["requests"] += 1
+        key = self.key(browser)
+        snapshot = getattr(browser, "page_snapshot", None)
+        if snapshot is not None and snapshot[0] == key:
+            self.stats["hits"] += 1
+            callback(snapshot[1], key[0])
+            return
+
+        pending = self._pending.get(id(browser))
+        if pending is not None and pending[0] == key:
+            pending[1].append(callback)     # Ya hay un toHtml en curso para esta carga
+            return
+        self._pending[id(browser)] = (key, [callback])
+        started = time.perf_counter()
+
+        def on_html(html):
+            entry = self._pending.get(id(browser))
+            if entry is None or entry[0] != key:
+                return  # Llegó tarde: otra carga ya ha pedido su propia instantánea
+            del self._pending[id(browser)]
+            elapsed = (time.perf_counter() - started) * 1000
+            size = len(html.encode("utf-8"))
+            self.stats["snapshots"] += 1
+            self.stats["bytes"] += size
+            self.stats["ms"] += elapsed
+            print(f"📸 Instantánea de {key[0]}: {size / 1024:.0f} KB en {elapsed:.0f} ms")
+            try:
+                if self.key(browser) == key:
+                    browser.page_snapshot = (key, html)
+            except RuntimeError:
+                pass  # La pestaña se cerró mientras se serializaba
+            for pending_callback in entry[1]:
+                pending_callback(html, key[0])
+
+        try:
+            browser.page().toHtml(on_html)
+        except Exception as e:
+            self._pending.pop(id(browser), None)
+            print(f"Error pidiendo el HTML de la página: {e}")
@@ -0,0 +1,101 @@
+import json
+import weakref
+from PySide6.QtWebEngineCore import QWebEngineScript
+
+
+STYLE_ID = "tron-scrollbar-style"
+
+DARK_SCROLLBAR_CSS = """
+::-webkit-scrollbar { width: 12px; background: #23272f; }
+::-webkit-scrollbar-thumb { background: #5a5f6a; border-radius: 6px; }
+::-webkit-scrollbar-thumb:hover { background: #6c7a89; }
+"""
+
+# Se ejecuta al crear cada documento, antes de que exista <head>: si aún no hay raíz
+# donde colgar el <style>, espera al primer nodo con un MutationObserver.
+_INSTALL_JS = """
+(function() {
+    var css = %s;
+    function install() {
+        if (document.getElementById('%s')) return true;
+        var root = document.head || document.documentElement;
+        if (!root) return false;
+        var style = document.createElement('style');
+        style.id = '%s';
+        style.textContent = css;
+        root.appendChild(style);
+        return true;
+    }
+    if (!install()) {
+        new MutationObserver(function(mutations, observer) {
+            if (install()) observer.disconnect();
+        }).observe(document, {childList: true, subtree: true});
+    }
+})();
+"""
+
+_REMOVE_JS = """
+(function() {
+    var style = document.getElementById('%s');
+    if (style) style.remove();
+})();
+""" % STYLE_ID
+
+
+class PageTheme:
+    """Estilo de las páginas web según el tema (por ahora, el scrollbar oscuro).
+
+    El CSS se registra una sola vez en cada perfil como QWebEngineScript, y Chromium
+    lo aplica al crear cada documento (también en iframes). Navegar no cuesta ninguna
+    llamada a runJavaScript: solo set_theme() toca las páginas ya abiertas, y solo
+    cuando el tema cambia de verdad.
+    """
+
+    SCRIPT_NAME = "tron-page-theme"
+
+    def __init__(self, theme="light"):
+        self.theme = theme
+        self._profiles = weakref.WeakSet()
+
+    def apply(self, profile):
+        """Registra el estilo del tema actual en el perfil si aún no se ha hecho"""
+        if profile in self._profiles:
+            return
+        self._profiles.add(profile)
+        self._install(profile)
+
+    def _install(self, profile):
+        try:
+            scripts = profile.scripts()
+            for script in scripts.find(self.SCRIPT_NAME):
+                scripts.remove(script)
+            if self.theme != "dark":
+                return
+
+            script = QWebEngineScript()
+            script.setName(self.SCRIPT_NAME)
+            script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+            script.setWorldId(QWebEngineScript.ApplicationWorld)
+            script.setRunsOnSubFrames(True)
+            script.setSourceCode(self.install_js())
+            scripts.insert(script)
+        except Exception as e:
+            print(f"Error registrando el estilo de página: {e}")
+
+    @staticmethod
+    def install_js():
+        return _INSTALL_JS % (json.dumps(DARK_SCROLLBAR_CSS), STYLE_ID, STYLE_ID)
+
+    def set_theme(self, theme, browsers=()):
+        """Cambia el script de todos los perfiles y actualiza una vez las páginas abiertas"""
+        if theme == self.theme:
+            return
+        self.theme = theme
+        for profile in list(self._profiles):
+            self._install(profile)
+        js = self.install_js() if theme == "dark" else _REMOVE_JS
+        for browser in browsers:
+            try:
+                browser.page().runJavaScript(js, QWebEngineScript.ApplicationWorld)
+            except Exception as e:
+                print(f"Error actualizando el estilo de la página: {e}")
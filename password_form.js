@@ -0,0 +1,92 @@
+// Detector de formularios de inicio de sesión del gestor de contraseñas.
+//
+// Se inyecta una vez por perfil (password_manager.py) a continuación de qwebchannel.js.
+// No hace nada mientras se escribe: un único listener de "submit" en captura sobre el
+// documento clasifica el formulario cuando se envía, con atributos y un querySelector
+// (sin serializar el HTML), y recuerda en un WeakMap los que son de inicio de sesión:
+// una sola contraseña que no sea "new-password" y un campo de usuario reconocible.
+// Los campos se buscan en el momento del envío, así que los formularios que añade o
+// cambia una SPA no necesitan ningún MutationObserver.
+(function() {
+    var USER_WORDS = /user|email|login|account|identifier/i;
+    var classified = new WeakMap();  // formularios ya reconocidos como de inicio de sesión
+
+    // Un inicio de sesión tiene una sola contraseña que no es nueva (los de cambio de
+    // contraseña, registro, PIN o pago tienen varias o usan autocomplete="new-password")
+    function findPassword(form) {
+        var passwords = form.querySelectorAll('input[type="password"]');
+        if (passwords.length !== 1 || passwords[0].getAttribute('autocomplete') === 'new-password') {
+            return null;
+        }
+        return passwords[0];
+    }
+
+    // Solo un campo que se anuncia como usuario: nunca el primer campo de texto a ciegas
+    function findUsername(form) {
+        var username = form.querySelector('input[autocomplete="username"], input[type="email"]');
+        if (username) {
+            return username;
+        }
+        var inputs = form.querySelectorAll('input[type="text"], input:not([type])');
+        for (var i = 0; i < inputs.length; i++) {
+            var input = inputs[i];
+            if (USER_WORDS.test(input.name + ' ' + input.id + ' ' + (input.getAttribute('placeholder') || ''))) {
+                return input;
+            }
+        }
+        return null;
+    }
+
+    function isLoginForm(form) {
+        if (classified.get(form)) {
+            return true;
+        }
+        var result = findPassword(form) !== null && findUsername(form) !== null;
+        if (result) {
+            classified.set(form, true);  // Un formulario de login no deja de serlo
+        }
+        return result;
+    }
+
+    function findFields(form) {
+        // La SPA puede haber cambiado los campos desde que se clasificó: volver a comprobarlos
+        var password = findPassword(form);
+        var username = password && findUsername(form);
+        if (!username) {
+            return null;
+        }
+        return { username: username, password: password };
+    }
+
+    function onSubmit(e) {
+        var form = e.target;
+        if (!form || form.tagName !== 'FORM' || !isLoginForm(form)) {
+            return;
+        }
+        var fields = findFields(form);
+        if (fields && fields.username && fields.username.value && fields.password.value &&
+            window.passwordBridge && window.passwordBridge.saveCredentials) {
+            window.passwordBridge.saveCredentials(window.location.href, fields.username.value, fields.password.value);
+        }
+    }
+
+    function setupBridge() {
+        try {
+            if (typeof qt === 'undefined' || !qt.webChannelTransport) {
+                return;  // Página sin canal (p. ej. iframe de otro perfil)
+            }
+            new QWebChannel(qt.webChannelTransport, function(channel) {
+                window.passwordBridge = channel.objects.passwordBridge;
+            });
+        } catch (e) {
+            console.error('Error setting up bridge:', e);
+        }
+    }
+
+    document.addEventListener('submit', onSubmit, true);
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', setupBridge);
+    } else {
+        setupBridge();
+    }
+})();
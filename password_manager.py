@@ -3,20 +3,25 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                               QDialog, QMessageBox, QInputDialog, QCheckBox,
                               QSpinBox, QComboBox, QGroupBox, QApplication,
                               QTableWidget, QTableWidgetItem, QHeaderView,
-                              QDialogButtonBox)
-from PySide6.QtCore import Qt, QSettings, Signal, QUrl, QObject, Slot
+                              QDialogButtonBox, QFileDialog)
+from PySide6.QtCore import Qt, QSettings, Signal, QUrl, QObject, Slot, QTimer, QFile, QIODevice
 from PySide6.QtGui import QIcon, QIntValidator
 from PySide6.QtWebEngineCore import QWebEngineScript
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from PySide6.QtWebChannel import QWebChannel
 import json
 import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+import csv
+import threading
+from cryptography.fernet import InvalidToken
 import os
 import sqlite3
+import time
+import weakref
+from collections import OrderedDict
 from datetime import datetime
+from urllib.parse import urlsplit
+from password_vault import VaultSession, VaultLocked
 # Importar password_generator con fallback
 try:
     from password_generator import PasswordGenerator
@@ -35,19 +40,218 @@ except ImportError:
                 "ram_usage": "1MB"
             }
 
+DEFAULT_PORTS = {"http": 80, "https": 443, "ftp": 21}
+
+
+def normalize_origin(url):
+    """Origen de una URL (esquema://host[:puerto]) para indexar credenciales.
+
+    El host va en minúsculas y el puerto solo aparece si no es el del esquema; las
+    URLs sin esquema se toman como https. Así "HTTPS://Example.com:443/login" y
+    "example.com" comparten las mismas credenciales.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "https://" + url
+    try:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url.lower()
+    if not host:
+        return f"{scheme}://{parts.path}".lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6
+    if port and port != DEFAULT_PORTS.get(scheme):
+        return f"{scheme}://{host}:{port}"
+    return f"{scheme}://{host}"
+
+
+PASSWORD_SCRIPT_NAME = "tron-password-manager"
+# Todo token Fernet (versión 0x80 en base64) empieza así; las filas antiguas en claro no
+FERNET_TOKEN_PREFIX = "gAAAAA"
+
+_qwebchannel_js = None
+
+
+def load_qwebchannel_js():
+    """qwebchannel.js incluido en Qt (recurso :/qtwebchannel/qwebchannel.js), leído una vez"""
+    global _qwebchannel_js
+    if _qwebchannel_js is None:
+        resource = QFile(":/qtwebchannel/qwebchannel.js")
+        if resource.open(QIODevice.ReadOnly):
+            _qwebchannel_js = bytes(resource.readAll()).decode("utf-8")
+            resource.close()
+        else:
+            _qwebchannel_js = ""
+    return _qwebchannel_js
+
+
+# Detector de formularios de inicio de sesión: avisa a passwordBridge al enviarlos
+FORM_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "password_form.js")
+
+
+def load_form_script():
+    try:
+        with open(FORM_SCRIPT_PATH, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError as e:
+        print(f"Error leyendo {FORM_SCRIPT_PATH}: {e}")
+        return ""
+
+
+class PlaintextCache(QObject):
+    """Caché pequeña de contraseñas descifradas recientemente.
+
+    Cada entrada caduca a los TTL segundos y nunca hay más de MAX_ENTRIES (se
+    descarta la usada hace más tiempo). Al caducar la última entrada la caché se
+    vacía sola, así que ningún texto en claro se queda en memoria con el
+    navegador inactivo; clear() la vacía al bloquear.
+    """
+
+    TTL = 60            # segundos
+    MAX_ENTRIES = 32
+
+    def __init__(self):
+        super().__init__()
+        self._entries = OrderedDict()   # clave -> (texto en claro, caduca)
+        self.expiry_timer = QTimer(self)
+        self.expiry_timer.setSingleShot(True)
+        self.expiry_timer.timeout.connect(self._expire)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, plaintext):
+        self._entries[key] = (plaintext, time.monotonic() + self.TTL)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.MAX_ENTRIES:
+            self._entries.popitem(last=False)
+        if not self.expiry_timer.isActive():
+            self.expiry_timer.start(int(self.TTL * 1000))
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self.expiry_timer.stop()
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [key for key, (_, expires) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        if self._entries:
+            next_expiry = min(expires for _, expires in self._entries.values())
+            self.expiry_timer.start(max(int((next_expiry - now) * 1000), 0) + 50)
+
+
 class PasswordBridge(QObject):
+    """Objeto que ven las páginas por el canal: reenvía lo que envía el detector de formularios"""
+
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
 
     @Slot(str, str, str)
     def saveCredentials(self, url, username, password):
-        self.parent.show_password_dialog(url, username, password)
+        self.parent.save_requested.emit(url, username, password)
+
+
+class PasswordPageBridge(QObject):
+    """Canal, bridge y scripts de página del gestor de contraseñas, compartidos por las pestañas.
+
+    Es lo único que necesitan las pestañas, así que se crea al arrancar. El panel
+    (PasswordManager: base de datos, bóveda e interfaz) se construye la primera vez que
+    se abre o que una página pide guardar una contraseña (save_requested).
+    """
+
+    save_requested = Signal(str, str, str)  # url, usuario, contraseña
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Un canal y un bridge para todas las pestañas: las llamadas llevan la URL de la página
+        self.bridge = PasswordBridge(self)
+        self.web_channel = QWebChannel(self)
+        self.web_channel.registerObject('passwordBridge', self.bridge)
+        self._channel_pages = set()
+        self._script_profiles = weakref.WeakSet()
+
+    def _install_page_scripts(self, profile):
+        """Registra una sola vez por perfil qwebchannel.js y el detector de formularios"""
+        if profile in self._script_profiles:
+            return
+        self._script_profiles.add(profile)
+        qwebchannel_js = load_qwebchannel_js()
+        form_script = load_form_script()
+        if not qwebchannel_js:
+            print("Error: no se encontró qwebchannel.js en los recursos de Qt")
+            return
+        if not form_script:
+            return
+        scripts = profile.scripts()
+        for old_script in scripts.find(PASSWORD_SCRIPT_NAME):
+            scripts.remove(old_script)
+        # Un único script: qwebchannel.js define QWebChannel y el detector lo usa a continuación
+        script = QWebEngineScript()
+        script.setName(PASSWORD_SCRIPT_NAME)
+        script.setSourceCode(qwebchannel_js + "\n" + form_script)
+        script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+        script.setWorldId(QWebEngineScript.ApplicationWorld)
+        script.setRunsOnSubFrames(True)
+        scripts.insert(script)
+
+    def setup_browser(self, browser):
+        """Conecta la pestaña al canal compartido; los scripts ya están en su perfil"""
+        try:
+            if browser and hasattr(browser, 'page'):
+                page = browser.page()
+                self._install_page_scripts(page.profile())
+                # Mundo aislado: los scripts de la propia página no ven passwordBridge
+                page.setWebChannel(self.web_channel, QWebEngineScript.ApplicationWorld)
+                self._channel_pages.add(id(page))
+                print("Gestor de contraseñas configurado correctamente")
+        except Exception as e:
+            print(f"Error setting up browser: {str(e)}") 
+
+    def release_browser(self, browser):
+        """Libera el canal y el bridge de una pestaña que se cierra"""
+        try:
+            page = browser.page()
+            if id(page) not in self._channel_pages:
+                return
+            self._channel_pages.discard(id(page))
+            page.setWebChannel(None, QWebEngineScript.ApplicationWorld)
+        except Exception as e:
+            print(f"Error releasing browser: {str(e)}")
+
 
 class PasswordManager(QWidget):
     password_saved = Signal(str, str)  # url, username
     password_updated = Signal(str, str)  # url, username
     password_deleted = Signal(str)  # url
+    transfer_progress = Signal(str)
+    transfer_finished = Signal(str)
+
+    IMPORT_BATCH = 2000     # Credenciales por transacción al importar
+    EXPORT_CHUNK = 2000     # Filas por consulta al exportar
+    # Nombres de columna de las exportaciones habituales (Chrome/Edge, Firefox, Safari,
+    # Bitwarden, 1Password, KeePass...), comparados sin mayúsculas, espacios ni "_"
+    IMPORT_URL_FIELDS = {"url", "loginuri", "website", "origin", "hostname", "weburl"}
+    IMPORT_USERNAME_FIELDS = {"username", "loginusername", "user", "login", "email", "userid"}
+    IMPORT_PASSWORD_FIELDS = {"password", "loginpassword", "pass"}
+    IMPORT_NOTES_FIELDS = {"note", "notes", "comments", "extra"}
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -55,11 +259,16 @@ class PasswordManager(QWidget):
         self.password_generator = PasswordGenerator()
         self.settings = QSettings("TronBrowser", "Passwords")
         self.db_path = "passwords.db"
+        self._passwords_loaded = False  # La lista se rellena al mostrarse o en reposo
+        self.plaintext_cache = PlaintextCache()  # Solo se descifra lo que se rellena o se muestra
+        # Clave de datos desbloqueada una vez por sesión (con contraseña maestra, se bloquea sola)
+        self.vault = VaultSession(self.settings)
+        self.vault.locked.connect(self.plaintext_cache.clear)
+        self.vault.locked.connect(self._update_vault_buttons)
+        self.vault.unlocked.connect(self._update_vault_buttons)
         self.init_ui()
         self.init_database()
-        self.load_passwords()
         self.setup_encryption()
-        self._webchannels = {}
 
     def init_ui(self):
         """Inicializa la interfaz de usuario"""
@@ -104,11 +313,39 @@ class PasswordManager(QWidget):
         buttons_layout.addWidget(self.generate_button)
         
         layout.addLayout(buttons_layout)
+
+        # Importar/exportar CSV (en segundo plano, con progreso)
+        transfer_layout = QHBoxLayout()
+        self.import_button = QPushButton("Importar CSV")
+        self.import_button.clicked.connect(self.import_passwords_dialog)
+        transfer_layout.addWidget(self.import_button)
+        self.export_button = QPushButton("Exportar CSV")
+        self.export_button.clicked.connect(self.export_passwords_dialog)
+        transfer_layout.addWidget(self.export_button)
+        layout.addLayout(transfer_layout)
+        self.transfer_label = QLabel()
+        self.transfer_label.setWordWrap(True)
+        self.transfer_label.hide()
+        layout.addWidget(self.transfer_label)
+        self.transfer_progress.connect(self.transfer_label.setText)
+        self.transfer_finished.connect(self._on_transfer_finished)
+
+        # Contraseña maestra y bloqueo de la bóveda
+        vault_layout = QHBoxLayout()
+        self.master_password_button = QPushButton("Contraseña maestra...")
+        self.master_password_button.clicked.connect(self.change_master_password)
+        vault_layout.addWidget(self.master_password_button)
+        self.lock_button = QPushButton("Bloquear")
+        self.lock_button.clicked.connect(self.lock)
+        vault_layout.addWidget(self.lock_button)
+        layout.addLayout(vault_layout)
         
         self.setLayout(layout)
 
+    SCHEMA_VERSION = 1
+
     def init_database(self):
-        """Inicializa la base de datos de contraseñas"""
+        """Inicializa la base de datos de contraseñas (una conexión para toda la sesión)"""
         try:
             self.conn = sqlite3.connect(self.db_path)
             self.conn.execute('''
@@ -123,11 +360,61 @@ class PasswordManager(QWidget):
                 )
             ''')
             self.conn.commit()
+            self.migrate_database()
         except Exception as e:
             print(f"Error inicializando base de datos: {str(e)}")
 
+    def migrate_database(self):
+        """Migra el esquema según PRAGMA user_version.
+
+        v1: columna origin (esquema://host[:puerto]) e índice único (origin, username).
+        Los duplicados que dejaba el antiguo INSERT OR REPLACE se funden conservando
+        la fila más reciente.
+        """
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= self.SCHEMA_VERSION:
+            return
+        with self.conn:
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(passwords)")]
+            if "origin" not in columns:
+                self.conn.execute("ALTER TABLE passwords ADD COLUMN origin TEXT NOT NULL DEFAULT ''")
+            rows = self.conn.execute("SELECT id, url FROM passwords").fetchall()
+            self.conn.executemany("UPDATE passwords SET origin = ? WHERE id = ?",
+                                  [(normalize_origin(url), row_id) for row_id, url in rows])
+            removed = self.conn.execute('''
+                DELETE FROM passwords WHERE id NOT IN (
+                    SELECT MAX(id) FROM passwords GROUP BY origin, username
+                )
+            ''').rowcount
+            self.conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_passwords_origin_username
+                ON passwords (origin, username)
+            ''')
+            self.conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        print(f"Base de datos de contraseñas migrada a v{self.SCHEMA_VERSION} "
+              f"({len(rows)} credenciales, {removed} duplicadas eliminadas)")
+
+    def _upsert_password(self, url, username, password, notes=None):
+        """Guarda la credencial de (origen, usuario): crea la fila o actualiza la existente"""
+        with self.conn:
+            self.conn.execute('''
+                INSERT INTO passwords (url, origin, username, password, notes)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (origin, username) DO UPDATE SET
+                    url = excluded.url,
+                    password = excluded.password,
+                    notes = COALESCE(excluded.notes, passwords.notes),
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (url, normalize_origin(url), username, password, notes))
+
+    def showEvent(self, event):
+        if not self._passwords_loaded:
+            self.load_passwords()
+        super().showEvent(event)
+
     def load_passwords(self):
         """Carga las contraseñas guardadas"""
+        self._passwords_loaded = True
         try:
             self.passwords_list.clear()
             cursor = self.conn.cursor()
@@ -150,6 +437,8 @@ class PasswordManager(QWidget):
     def add_password(self):
         """Añade una nueva contraseña"""
         try:
+            if not self.ensure_unlocked():
+                return
             dialog = QDialog(self)
             dialog.setWindowTitle("Añadir Contraseña")
             layout = QVBoxLayout(dialog)
@@ -183,12 +472,8 @@ class PasswordManager(QWidget):
             layout.addLayout(buttons_layout)
             
             if dialog.exec():
-                cursor = self.conn.cursor()
-                cursor.execute(
-                    "INSERT INTO passwords (url, username, password, notes) VALUES (?, ?, ?, ?)",
-                    (url_input.text(), username_input.text(), password_input.text(), notes_input.text())
-                )
-                self.conn.commit()
+                self._upsert_password(url_input.text(), username_input.text(),
+                                      self._encrypt(password_input.text()), notes_input.text())
                 self.load_passwords()
                 self.password_saved.emit(url_input.text(), username_input.text())
                 
@@ -199,7 +484,7 @@ class PasswordManager(QWidget):
         """Edita una contraseña existente"""
         try:
             current_item = self.passwords_list.currentItem()
-            if not current_item:
+            if not current_item or not self.ensure_unlocked():
                 return
                 
             url, username = current_item.text().split(" - ")
@@ -213,6 +498,12 @@ class PasswordManager(QWidget):
             
             if not row:
                 return
+            current_password = self.get_password(url, username)
+            if current_password is None:
+                # Guardar el diálogo sustituiría la contraseña que no se ha podido descifrar
+                QMessageBox.warning(self, "Editar Contraseña",
+                                    "No se puede descifrar esta contraseña (clave incorrecta o dato dañado).")
+                return
                 
             dialog = QDialog(self)
             dialog.setWindowTitle("Editar Contraseña")
@@ -227,7 +518,7 @@ class PasswordManager(QWidget):
             layout.addWidget(QLabel("Usuario:"))
             layout.addWidget(username_input)
             
-            password_input = QLineEdit(row[0])
+            password_input = QLineEdit(current_password)
             password_input.setEchoMode(QLineEdit.Password)
             layout.addWidget(QLabel("Contraseña:"))
             layout.addWidget(password_input)
@@ -247,11 +538,19 @@ class PasswordManager(QWidget):
             layout.addLayout(buttons_layout)
             
             if dialog.exec():
-                cursor.execute(
-                    "UPDATE passwords SET url = ?, username = ?, password = ?, notes = ?, updated_at = CURRENT_TIMESTAMP WHERE url = ? AND username = ?",
-                    (url_input.text(), username_input.text(), password_input.text(), notes_input.text(), url, username)
-                )
-                self.conn.commit()
+                try:
+                    cursor.execute(
+                        "UPDATE passwords SET url = ?, origin = ?, username = ?, password = ?, notes = ?, updated_at = CURRENT_TIMESTAMP WHERE url = ? AND username = ?",
+                        (url_input.text(), normalize_origin(url_input.text()), username_input.text(),
+                         self._encrypt(password_input.text()), notes_input.text(), url, username)
+                    )
+                    self.conn.commit()
+                    self.plaintext_cache.discard((normalize_origin(url), username))
+                except sqlite3.IntegrityError:
+                    self.conn.rollback()
+                    QMessageBox.warning(self, "Contraseña duplicada",
+                                        f"Ya hay una contraseña de {username_input.text()} para ese sitio.")
+                    return
                 self.load_passwords()
                 self.password_updated.emit(url_input.text(), username_input.text())
                 
@@ -282,6 +581,7 @@ class PasswordManager(QWidget):
                     (url, username)
                 )
                 self.conn.commit()
+                self.plaintext_cache.discard((normalize_origin(url), username))
                 self.load_passwords()
                 self.password_deleted.emit(url)
                 
@@ -391,27 +691,68 @@ class PasswordManager(QWidget):
 
     def setup_encryption(self):
         try:
-            # Generar o cargar clave de encriptación
-            if not self.settings.contains("encryption_key"):
-                key = Fernet.generate_key()
-                self.settings.setValue("encryption_key", key.decode())
-            self.fernet = Fernet(self.settings.value("encryption_key").encode())
+            # Sin contraseña maestra la sesión queda abierta con la clave guardada;
+            # con ella la bóveda empieza bloqueada y se pide al primer uso
+            self.vault.load()
+            self._update_vault_buttons()
         except Exception as e:
             print(f"Error setting up encryption: {str(e)}")
 
+    def ensure_unlocked(self):
+        """Pide la contraseña maestra si la bóveda está bloqueada; True si queda desbloqueada"""
+        if self.vault.is_unlocked():
+            return True
+        prompt = "Contraseña maestra:"
+        for _ in range(3):
+            master_password, ok = QInputDialog.getText(self, "Desbloquear contraseñas", prompt,
+                                                       QLineEdit.Password)
+            if not ok:
+                return False
+            if self.vault.unlock(master_password):
+                return True
+            prompt = "Contraseña incorrecta. Contraseña maestra:"
+        return False
+
+    def change_master_password(self):
+        """Activa, cambia o quita la contraseña maestra (la clave de datos no cambia)"""
+        try:
+            if not self.ensure_unlocked():
+                return
+            new_password, ok = QInputDialog.getText(
+                self, "Contraseña maestra",
+                "Nueva contraseña maestra (vacía para quitarla):", QLineEdit.Password)
+            if not ok:
+                return
+            if not new_password:
+                if self.vault.has_master_password():
+                    self.vault.remove_master_password()
+                    QMessageBox.information(self, "Contraseña maestra", "Contraseña maestra eliminada.")
+                self._update_vault_buttons()
+                return
+            confirmation, ok = QInputDialog.getText(self, "Contraseña maestra", "Repite la contraseña maestra:",
+                                                    QLineEdit.Password)
+            if not ok:
+                return
+            if confirmation != new_password:
+                QMessageBox.warning(self, "Contraseña maestra", "Las contraseñas no coinciden.")
+                return
+            self.vault.set_master_password(new_password)
+            self._update_vault_buttons()
+            QMessageBox.information(self, "Contraseña maestra", "Contraseña maestra guardada.")
+        except Exception as e:
+            print(f"Error cambiando la contraseña maestra: {str(e)}")
+
+    def _update_vault_buttons(self):
+        if hasattr(self, 'lock_button'):
+            self.lock_button.setEnabled(self.vault.has_master_password() and self.vault.is_unlocked())
+
     def save_password(self, url, username, password):
         try:
+            if not self.ensure_unlocked():
+                return False
             # Encriptar la contraseña
-            encrypted_password = self.fernet.encrypt(password.encode())
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO passwords (url, username, password)
-                VALUES (?, ?, ?)
-            ''', (url, username, encrypted_password.decode()))
-            conn.commit()
-            conn.close()
+            self._upsert_password(url, username, self._encrypt(password))
+            self.plaintext_cache.put((normalize_origin(url), username), password)
             
             print(f"Password saved for {url}")
             return True
@@ -419,45 +760,87 @@ class PasswordManager(QWidget):
             print(f"Error saving password: {str(e)}")
             return False
 
+    def _encrypt(self, password):
+        return self.vault.cipher().encrypt(password.encode()).decode()
+
+    def _decrypt(self, stored):
+        """Contraseña en claro, o None si es un token que no se puede descifrar"""
+        try:
+            return self.vault.cipher().decrypt(stored.encode()).decode()
+        except InvalidToken:
+            if stored.startswith(FERNET_TOKEN_PREFIX):
+                # Clave incorrecta o token dañado: nunca devolver el texto cifrado como contraseña
+                print("⚠️ No se puede descifrar una contraseña guardada (clave incorrecta o dato dañado)")
+                return None
+            return stored  # Fila antigua guardada sin cifrar desde el panel
+
     def get_password(self, url, username):
+        """Descifra solo la credencial pedida (rellenar o mostrar), pasando por la caché"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
+            key = (normalize_origin(url), username)
+            cached = self.plaintext_cache.get(key)
+            if cached is not None:
+                return cached
+            if not self.ensure_unlocked():
+                return None
+            result = self.conn.execute('''
                 SELECT password FROM passwords
-                WHERE url = ? AND username = ?
-            ''', (url, username))
-            result = cursor.fetchone()
-            conn.close()
+                WHERE origin = ? AND username = ?
+            ''', key).fetchone()
             
             if result:
                 # Desencriptar la contraseña
-                decrypted_password = self.fernet.decrypt(result[0].encode())
-                return decrypted_password.decode()
+                password = self._decrypt(result[0])
+                if password is not None:
+                    self.plaintext_cache.put(key, password)
+                return password
             return None
         except Exception as e:
             print(f"Error getting password: {str(e)}")
             return None
 
+    def get_credentials_for_url(self, url):
+        """Usuarios guardados para el origen de `url` (sin descifrar): una consulta por el índice único"""
+        try:
+            rows = self.conn.execute('''
+                SELECT username FROM passwords
+                WHERE origin = ?
+                ORDER BY updated_at DESC
+            ''', (normalize_origin(url),)).fetchall()
+            return [{'url': url, 'username': row[0]} for row in rows]
+        except Exception as e:
+            print(f"Error getting credentials: {str(e)}")
+            return []
+
+    def list_credentials(self):
+        """URL y usuario de todas las credenciales, sin descifrar ninguna contraseña"""
+        try:
+            rows = self.conn.execute('SELECT url, username FROM passwords ORDER BY url').fetchall()
+            return [{'url': url, 'username': username} for url, username in rows]
+        except Exception as e:
+            print(f"Error listing passwords: {str(e)}")
+            return []
+
+    def lock(self):
+        """Olvida las contraseñas descifradas y, con contraseña maestra, también la clave"""
+        self.plaintext_cache.clear()
+        self.vault.lock()
+
     def get_all_passwords(self):
+        """Todas las credenciales descifradas (solo para exportar: listar usa list_credentials)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT url, username, password FROM passwords')
-            results = cursor.fetchall()
-            conn.close()
+            results = self.conn.execute('SELECT url, username, password FROM passwords').fetchall()
             
             passwords = []
             for url, username, encrypted_password in results:
-                try:
-                    decrypted_password = self.fernet.decrypt(encrypted_password.encode())
-                    passwords.append({
-                        'url': url,
-                        'username': username,
-                        'password': decrypted_password.decode()
-                    })
-                except:
+                password = self._decrypt(encrypted_password)
+                if password is None:
                     continue
+                passwords.append({
+                    'url': url,
+                    'username': username,
+                    'password': password
+                })
             return passwords
         except Exception as e:
             print(f"Error getting all passwords: {str(e)}")
@@ -465,19 +848,209 @@ class PasswordManager(QWidget):
 
     def delete_password(self, url, username):
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                DELETE FROM passwords
-                WHERE url = ? AND username = ?
-            ''', (url, username))
-            conn.commit()
-            conn.close()
+            with self.conn:
+                self.conn.execute('''
+                    DELETE FROM passwords
+                    WHERE origin = ? AND username = ?
+                ''', (normalize_origin(url), username))
+            self.plaintext_cache.discard((normalize_origin(url), username))
             return True
         except Exception as e:
             print(f"Error deleting password: {str(e)}")
             return False
 
+    @staticmethod
+    def _match_field(keys, names):
+        """Primera clave de `keys` que corresponde a `names` (sin mayúsculas, espacios ni "_")"""
+        for key in keys:
+            if key and key.lower().replace(" ", "").replace("_", "") in names:
+                return key
+        return None
+
+    @staticmethod
+    def _report_rate(action, rows, started):
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        rate = rows / elapsed
+        print(f"🔑 Contraseñas {action}: {rows} en {elapsed:.1f} s ({rate:.0f} filas/s)")
+        return {"rows": rows, "seconds": elapsed, "rows_per_sec": rate}
+
+    def import_passwords(self, path, progress=None, batch_size=IMPORT_BATCH):
+        """Importa un CSV de contraseñas exportado por otro navegador o gestor.
+
+        Se puede llamar desde un hilo de trabajo: usa su propia conexión. El fichero se
+        lee en streaming y cada fila se cifra al leerla, así que en memoria solo hay un
+        lote de `batch_size` contraseñas ya cifradas. Cada lote es una transacción; las
+        credenciales con el mismo (origen, usuario) que una existente se omiten.
+        `progress(filas_leídas)` se llama por lote. Devuelve filas, nuevas, omitidas,
+        segundos y filas/s, y `error` si la importación se cortó a medias (los lotes ya
+        guardados se quedan).
+        """
+        started = time.perf_counter()
+        rows = added = skipped = 0
+        error = None
+        conn = None
+        insert = '''
+            INSERT INTO passwords (url, origin, username, password, notes)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (origin, username) DO NOTHING
+        '''
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            with open(path, "r", encoding="utf-8-sig", newline="") as f:
+                reader = csv.DictReader(f)
+                keys = reader.fieldnames or []
+                url_key = self._match_field(keys, self.IMPORT_URL_FIELDS)
+                username_key = self._match_field(keys, self.IMPORT_USERNAME_FIELDS)
+                password_key = self._match_field(keys, self.IMPORT_PASSWORD_FIELDS)
+                notes_key = self._match_field(keys, self.IMPORT_NOTES_FIELDS)
+                if not url_key or not password_key:
+                    raise ValueError(f"no se reconocen las columnas del CSV: {keys}")
+                batch = []
+                for record in reader:
+                    rows += 1
+                    url = (record.get(url_key) or "").strip()
+                    password = record.get(password_key) or ""
+                    if not url or not password:
+                        skipped += 1
+                        continue
+                    username = (record.get(username_key) or "").strip() if username_key else ""
+                    notes = (record.get(notes_key) or None) if notes_key else None
+                    batch.append((url, normalize_origin(url), username, self._encrypt(password), notes))
+                    if len(batch) >= batch_size:
+                        before = conn.total_changes
+                        with conn:
+                            conn.executemany(insert, batch)
+                        added += conn.total_changes - before
+                        batch = []
+                        if progress:
+                            progress(rows)
+                if batch:
+                    before = conn.total_changes
+                    with conn:
+                        conn.executemany(insert, batch)
+                    added += conn.total_changes - before
+                    if progress:
+                        progress(rows)
+        except VaultLocked:
+            error = "la bóveda se bloqueó durante la importación"
+            print(f"Error importing passwords: {error}")
+        except Exception as e:
+            error = str(e)
+            print(f"Error importing passwords: {error}")
+        finally:
+            if conn is not None:
+                conn.close()
+        stats = self._report_rate("importadas", rows, started)
+        stats.update(added=added, skipped=skipped)
+        if error:
+            stats["error"] = error
+            print(f"📥 {added} contraseñas nuevas antes del error, {skipped} omitidas")
+        else:
+            print(f"📥 {added} contraseñas nuevas, {rows - skipped - added} ya existentes, {skipped} omitidas")
+        return stats
+
+    def export_passwords(self, path, progress=None, chunk_size=EXPORT_CHUNK):
+        """Exporta las credenciales a CSV en el formato de Chrome (name,url,username,password,note).
+
+        Ese formato lo importan Chrome, Edge, Firefox, Safari y los gestores habituales.
+        Se lee por páginas de `chunk_size` filas por id y cada contraseña se descifra
+        justo antes de escribirla: nunca están todas en claro en memoria. Se puede
+        llamar desde un hilo de trabajo. El fichero resultante NO va cifrado.
+        """
+        started = time.perf_counter()
+        rows = undecryptable = 0
+        error = None
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["name", "url", "username", "password", "note"])
+                last_id = 0
+                while True:
+                    page = conn.execute('''
+                        SELECT id, url, origin, username, password, notes FROM passwords
+                        WHERE id > ? ORDER BY id LIMIT ?
+                    ''', (last_id, chunk_size)).fetchall()
+                    if not page:
+                        break
+                    for row_id, url, origin, username, stored, notes in page:
+                        password = self._decrypt(stored)
+                        if password is None:
+                            undecryptable += 1
+                            continue
+                        name = urlsplit(origin).hostname or url
+                        writer.writerow([name, url, username, password, notes or ""])
+                    rows += len(page)
+                    last_id = page[-1][0]
+                    if progress:
+                        progress(rows)
+        except VaultLocked:
+            error = "la bóveda se bloqueó durante la exportación"
+            print(f"Error exporting passwords: {error}")
+        except Exception as e:
+            error = str(e)
+            print(f"Error exporting passwords: {error}")
+        finally:
+            if conn is not None:
+                conn.close()
+        if undecryptable:
+            print(f"⚠️ {undecryptable} contraseñas no se han exportado: no se pueden descifrar")
+        stats = self._report_rate("exportadas", rows - undecryptable, started)
+        if error:
+            stats["error"] = error
+        return stats
+
+    def _run_transfer(self, label, job):
+        """Ejecuta una importación/exportación en segundo plano mostrando el progreso"""
+        self.import_button.setEnabled(False)
+        self.export_button.setEnabled(False)
+        self.transfer_label.setText(f"{label}...")
+        self.transfer_label.show()
+
+        def emit(signal, message):
+            try:
+                signal.emit(message)
+            except RuntimeError:
+                pass  # El panel ya no existe: el trabajo sigue hasta terminar
+
+        def worker():
+            stats = job(lambda rows: emit(self.transfer_progress, f"{label}: {rows} contraseñas"))
+            message = f"{label}: {stats['rows']} contraseñas en {stats['seconds']:.1f} s"
+            if "added" in stats:
+                message += f", {stats['added']} nuevas, {stats['skipped']} omitidas"
+            if "error" in stats:
+                message = f"⚠️ {message}. Interrumpido: {stats['error']}"
+            emit(self.transfer_finished, message)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_transfer_finished(self, message):
+        self.transfer_label.setText(message)
+        self.import_button.setEnabled(True)
+        self.export_button.setEnabled(True)
+        self.load_passwords()
+
+    def import_passwords_dialog(self):
+        """Importa un CSV exportado por Chrome, Firefox, Safari, Bitwarden, KeePass..."""
+        if not self.ensure_unlocked():
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Importar contraseñas", "", "CSV (*.csv);;Todos (*)")
+        if path:
+            self._run_transfer("Importando", lambda progress: self.import_passwords(path, progress=progress))
+
+    def export_passwords_dialog(self):
+        """Exporta todas las contraseñas a CSV (sin cifrar) tras confirmarlo"""
+        reply = QMessageBox.warning(
+            self, "Exportar contraseñas",
+            "El fichero CSV contendrá todas las contraseñas sin cifrar. ¿Continuar?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes or not self.ensure_unlocked():
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar contraseñas", "passwords.csv", "CSV (*.csv)")
+        if path:
+            self._run_transfer("Exportando", lambda progress: self.export_passwords(path, progress=progress))
+
     def show_password_dialog(self, url, username, password):
         try:
             dialog = QDialog(self.parent)
@@ -516,13 +1089,21 @@ class PasswordManager(QWidget):
             table.setHorizontalHeaderLabels(["URL", "Username", "Password"])
             table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
             
-            # Llenar tabla
-            passwords = self.get_all_passwords()
+            # Llenar tabla solo con metadatos: la contraseña se descifra al hacer doble clic en ella
+            passwords = self.list_credentials()
             table.setRowCount(len(passwords))
             for i, pwd in enumerate(passwords):
                 table.setItem(i, 0, QTableWidgetItem(pwd['url']))
                 table.setItem(i, 1, QTableWidgetItem(pwd['username']))
-                table.setItem(i, 2, QTableWidgetItem(pwd['password']))
+                table.setItem(i, 2, QTableWidgetItem("••••••••"))
+
+            def reveal(row, column):
+                if column == 2:
+                    password = self.get_password(passwords[row]['url'], passwords[row]['username'])
+                    table.item(row, 2).setText(password or "")
+            table.setEditTriggers(QTableWidget.NoEditTriggers)
+            table.cellDoubleClicked.connect(reveal)
+            table.setToolTip("Doble clic en una contraseña para mostrarla")
             
             layout.addWidget(table)
             
@@ -539,317 +1120,10 @@ class PasswordManager(QWidget):
     def closeEvent(self, event):
         """Maneja el cierre del widget"""
         try:
+            self.lock()
             if hasattr(self, 'conn'):
                 self.conn.close()
         except Exception as e:
             print(f"Error cerrando conexión: {str(e)}")
         finally:
             super().closeEvent(event)
-
-    def setup_browser(self, browser):
-        try:
-            if browser and hasattr(browser, 'page'):
-                # QWebChannel y bridge
-                page = browser.page()
-                channel = QWebChannel(page)
-                bridge = PasswordBridge(self)
-                channel.registerObject('passwordBridge', bridge)
-                page.setWebChannel(channel)
-                self._webchannels[id(page)] = (channel, bridge)
-
-                # Script de QWebChannel
-                qwebchannel_script = '''
-                (function() {
-                    function QWebChannel(transport, initCallback) {
-                        if (typeof transport !== "object" || typeof transport.send !== "function") {
-                            console.error("The QWebChannel expects a transport object with a send function and onmessage callback property.");
-                            return;
-                        }
-
-                        var channel = this;
-                        channel.transport = transport;
-                        transport.onmessage = function(message) {
-                            var data = JSON.parse(message.data);
-                            channel.handleMessage(data);
-                        }
-                        channel.execCallbacks = {};
-                        channel.execId = 0;
-                        channel.exec = function(data, callback) {
-                            if (!callback) {
-                                callback = function() {};
-                            }
-                            channel.execId++;
-                            channel.execCallbacks[channel.execId] = callback;
-                            data.id = channel.execId;
-                            channel.transport.send(JSON.stringify(data));
-                        };
-                        channel.execWithPromise = function(data) {
-                            return new Promise(function(resolve, reject) {
-                                channel.exec(data, function(response) {
-                                    if (response.error) {
-                                        reject(response.error);
-                                    } else {
-                                        resolve(response.data);
-                                    }
-                                });
-                            });
-                        };
-                        channel.handleMessage = function(message) {
-                            var callback = channel.execCallbacks[message.id];
-                            if (callback) {
-                                callback(message.data);
-                                delete channel.execCallbacks[message.id];
-                            }
-                        };
-                        channel.registerObjects = function(objects) {
-                            channel.objects = objects;
-                        };
-                        channel.registerObject = function(name, object) {
-                            if (!channel.objects) {
-                                channel.objects = {};
-                            }
-                            channel.objects[name] = object;
-                        };
-                        channel.destroy = function() {
-                            if (channel.transport) {
-                                channel.transport.onmessage = undefined;
-                            }
-                            for (var i in channel.execCallbacks) {
-                                channel.execCallbacks[i]({error: "Channel destroyed"});
-                            }
-                        };
-                        channel.exec({type: "init"}, function(data) {
-                            for (var i in data) {
-                                var object = new QObject(this, i, data[i], function(name, data) {
-                                    channel.exec({type: "invokeMethod", object: name, method: data.method, args: data.args});
-                                });
-                                channel.objects[i] = object;
-                            }
-                            if (initCallback) {
-                                initCallback(channel);
-                            }
-                        });
-                    }
-
-                    function QObject(webChannel, name, data, callback) {
-                        function QObject() {}
-                        QObject.prototype = {
-                            _id: name,
-                            _webChannel: webChannel,
-                            _data: data,
-                            _callback: callback,
-                            _signals: {},
-                            _propertyUpdateVersion: {},
-                            _methodReturnValues: {},
-                            _invokableProperties: data.invokableProperties,
-                            _invokableMethods: data.invokableMethods,
-                            _propertyUpdateVersionTimeout: 0,
-                            _notifyAboutNewProperties: false,
-                            _signalEmitted: signalEmitted,
-                            _invokeMethod: invokeMethod,
-                            _connectNotify: connectNotify,
-                            _disconnectNotify: disconnectNotify
-                        };
-                        return new QObject();
-                    }
-
-                    function signalEmitted(signalName, signalData) {
-                        var signal = this._signals[signalName];
-                        if (signal) {
-                            signal.emit(signalData);
-                        }
-                    }
-
-                    function invokeMethod(methodName, args) {
-                        return this._callback(this._id, {method: methodName, args: args});
-                    }
-
-                    function connectNotify(signalName, callback) {
-                        if (!this._signals[signalName]) {
-                            this._signals[signalName] = new Signal();
-                        }
-                        this._signals[signalName].connect(callback);
-                    }
-
-                    function disconnectNotify(signalName, callback) {
-                        if (this._signals[signalName]) {
-                            this._signals[signalName].disconnect(callback);
-                        }
-                    }
-
-                    function Signal() {
-                        this.connect = function(callback) {
-                            if (typeof callback !== "function") {
-                                console.error("Signal.connect: Cannot connect to non-function");
-                                return;
-                            }
-                            this.callbacks.push(callback);
-                        };
-                        this.disconnect = function(callback) {
-                            var index = this.callbacks.indexOf(callback);
-                            if (index !== -1) {
-                                this.callbacks.splice(index, 1);
-                            }
-                        };
-                        this.emit = function(data) {
-                            for (var i = 0; i < this.callbacks.length; ++i) {
-                                this.callbacks[i](data);
-                            }
-                        };
-                        this.callbacks = [];
-                    }
-
-                    window.QWebChannel = QWebChannel;
-                })();
-                '''
-
-                # Script de detección de formularios
-                form_script = '''
-                (function() {
-                    // Función para configurar el bridge
-                    function setupBridge() {
-                        try {
-                            if (typeof qt === 'undefined' || !qt.webChannelTransport) {
-                                console.error('QWebChannel not available');
-                                return;
-                            }
-                            
-                            new QWebChannel(qt.webChannelTransport, function(channel) {
-                                window.passwordBridge = channel.objects.passwordBridge;
-                                setupFormHandlers();
-                            });
-                        } catch (e) {
-                            console.error('Error setting up bridge:', e);
-                        }
-                    }
-
-                    // Función para encontrar campos de formulario
-                    function findFormFields(form) {
-                        var fields = { username: null, password: null };
-                        
-                        // Buscar campo de usuario
-                        var usernameInputs = form.querySelectorAll('input[type="text"], input[type="email"], input[name*="user"], input[name*="email"], input[id*="user"], input[id*="email"]');
-                        for (var i = 0; i < usernameInputs.length; i++) {
-                            var input = usernameInputs[i];
-                            var name = (input.name || '').toLowerCase();
-                            var id = (input.id || '').toLowerCase();
-                            var placeholder = (input.placeholder || '').toLowerCase();
-                            if (name.includes('user') || name.includes('email') || id.includes('user') || id.includes('email') || placeholder.includes('user') || placeholder.includes('email')) {
-                                fields.username = input;
-                                break;
-                            }
-                        }
-                        
-                        // Buscar campo de contraseña
-                        var passwordInputs = form.querySelectorAll('input[type="password"], input[name*="pass"], input[id*="pass"]');
-                        if (passwordInputs.length > 0) {
-                            fields.password = passwordInputs[0];
-                        }
-                        
-                        return fields;
-                    }
-
-                    // Función para configurar un formulario
-                    function setupForm(form) {
-                        var isLoginForm = false;
-                        var formHtml = form.outerHTML.toLowerCase();
-                        var formAction = (form.action || '').toLowerCase();
-                        var formId = (form.id || '').toLowerCase();
-                        var formClass = (form.className || '').toLowerCase();
-                        
-                        if (formHtml.includes('login') || formHtml.includes('signin') || 
-                            formHtml.includes('register') || formHtml.includes('signup') || 
-                            formAction.includes('login') || formAction.includes('signin') || 
-                            formAction.includes('register') || formAction.includes('signup') || 
-                            formId.includes('login') || formId.includes('signin') || 
-                            formId.includes('register') || formId.includes('signup') || 
-                            formClass.includes('login') || formClass.includes('signin') || 
-                            formClass.includes('register') || formClass.includes('signup')) {
-                            isLoginForm = true;
-                        }
-                        
-                        var fields = findFormFields(form);
-                        if (isLoginForm || (fields.username && fields.password)) {
-                            form.removeEventListener('submit', form._submitHandler);
-                            form._submitHandler = function(e) {
-                                setTimeout(function() {
-                                    var fields = findFormFields(form);
-                                    if (fields.username && fields.username.value && 
-                                        fields.password && fields.password.value) {
-                                        if (window.passwordBridge && window.passwordBridge.saveCredentials) {
-                                            window.passwordBridge.saveCredentials(
-                                                window.location.href,
-                                                fields.username.value,
-                                                fields.password.value
-                                            );
-                                        }
-                                    }
-                                }, 100);
-                            };
-                            form.addEventListener('submit', form._submitHandler);
-                        }
-                    }
-
-                    // Función para configurar todos los manejadores
-                    function setupFormHandlers() {
-                        // Configurar formularios existentes
-                        document.querySelectorAll('form').forEach(setupForm);
-
-                        // Observar cambios en el DOM para nuevos formularios
-                        var observer = new MutationObserver(function(mutations) {
-                            mutations.forEach(function(mutation) {
-                                if (mutation.addedNodes) {
-                                    mutation.addedNodes.forEach(function(node) {
-                                        if (node.nodeName === 'FORM') {
-                                            setupForm(node);
-                                        }
-                                    });
-                                }
-                            });
-                        });
-                        observer.observe(document.body, { childList: true, subtree: true });
-
-                        // Observar cambios en campos de entrada
-                        document.addEventListener('input', function(e) {
-                            if (e.target.tagName === 'INPUT') {
-                                var form = e.target.form;
-                                if (form) {
-                                    setupForm(form);
-                                }
-                            }
-                        });
-                    }
-
-                    // Esperar a que el documento esté listo
-                    if (document.readyState === 'loading') {
-                        document.addEventListener('DOMContentLoaded', setupBridge);
-                    } else {
-                        setupBridge();
-                    }
-                })();
-                '''
-                
-                # Crear y configurar los scripts
-                qwebchannel_script_obj = QWebEngineScript()
-                qwebchannel_script_obj.setSourceCode(qwebchannel_script)
-                qwebchannel_script_obj.setInjectionPoint(QWebEngineScript.DocumentCreation)
-                qwebchannel_script_obj.setWorldId(QWebEngineScript.MainWorld)
-                qwebchannel_script_obj.setRunsOnSubFrames(True)
-
-                form_script_obj = QWebEngineScript()
-                form_script_obj.setSourceCode(form_script)
-                form_script_obj.setInjectionPoint(QWebEngineScript.DocumentCreation)
-                form_script_obj.setWorldId(QWebEngineScript.MainWorld)
-                form_script_obj.setRunsOnSubFrames(True)
-                
-                # Asegurarse de que los scripts se ejecuten después de que la página esté cargada
-                def insert_scripts(ok):
-                    if ok:
-                        page.scripts().insert(qwebchannel_script_obj)
-                        page.scripts().insert(form_script_obj)
-                
-                page.loadFinished.connect(insert_scripts)
-                
-                print("Gestor de contraseñas configurado correctamente")
-        except Exception as e:
-            print(f"Error setting up browser: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""Bóveda del gestor de contraseñas: clave de datos envuelta con una contraseña maestra.
+
+Las credenciales se cifran con una clave de datos Fernet que nunca cambia. Sin
+contraseña maestra esa clave se guarda tal cual en QSettings (modo clásico). En modo
+bóveda solo se guarda envuelta: cifrada con una clave derivada de la contraseña
+maestra con scrypt o PBKDF2 y los parámetros de coste guardados junto a la sal.
+
+La derivación es lenta a propósito, así que se hace una vez por desbloqueo:
+VaultSession guarda el Fernet desbloqueado y lo olvida tras IDLE_TIMEOUT segundos
+sin usarse (o al llamar a lock()). Activar la bóveda o cambiar la contraseña
+maestra solo vuelve a envolver la clave de datos; las filas no se recifran.
+"""
+import base64
+import json
+import os
+import time
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+from PySide6.QtCore import QObject, Signal, QTimer
+
+# Coste por defecto: ~0,1-0,3 s por desbloqueo en un equipo de escritorio
+# (véase benchmark_kdf.py para ajustarlo)
+DEFAULT_KDF = {"algorithm": "scrypt", "n": 2 ** 15, "r": 8, "p": 1}
+DEFAULT_PBKDF2 = {"algorithm": "pbkdf2-sha256", "iterations": 600_000}
+SALT_BYTES = 16
+
+
+class VaultLocked(Exception):
+    """La bóveda está bloqueada: hay que pedir la contraseña maestra"""
+
+
+def derive_key(master_password, salt, params):
+    """Clave Fernet derivada de la contraseña maestra con los parámetros dados"""
+    algorithm = params.get("algorithm")
+    if algorithm == "scrypt":
+        kdf = Scrypt(salt=salt, length=32, n=int(params["n"]), r=int(params["r"]), p=int(params["p"]))
+    elif algorithm == "pbkdf2-sha256":
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt,
+                         iterations=int(params["iterations"]))
+    else:
+        raise ValueError(f"Algoritmo de derivación desconocido: {algorithm}")
+    return base64.urlsafe_b64encode(kdf.derive(master_password.encode("utf-8")))
+
+
+def wrap_key(data_key, master_password, params=None):
+    """Envuelve la clave de datos; devuelve (parámetros con la sal, clave envuelta)"""
+    params = dict(params or DEFAULT_KDF)
+    salt = os.urandom(SALT_BYTES)
+    params["salt"] = base64.b64encode(salt).decode()
+    wrapped = Fernet(derive_key(master_password, salt, params)).encrypt(data_key)
+    return params, wrapped.decode()
+
+
+def unwrap_key(wrapped, master_password, params):
+    """Clave de datos desenvuelta, o None si la contraseña maestra no es correcta"""
+    salt = base64.b64decode(params["salt"])
+    try:
+        return Fernet(derive_key(master_password, salt, params)).decrypt(wrapped.encode())
+    except InvalidToken:
+        return None
+
+
+class VaultSession(QObject):
+    """Clave de datos desbloqueada durante la sesión, con bloqueo por inactividad.
+
+    cipher() puede llamarse desde hilos de trabajo (importar/exportar): solo apunta
+    la hora de uso; el temporizador vive en el hilo de la GUI y comprueba esa hora.
+    """
+
+    IDLE_TIMEOUT = 15 * 60  # segundos sin usar la bóveda antes de bloquearla
+    locked = Signal()
+    unlocked = Signal()
+
+    def __init__(self, settings):
+        super().__init__()
+        self.settings = settings
+        self._fernet = None
+        self._data_key = None
+        self._last_used = 0.0
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self._check_idle)
+        self.last_unlock_seconds = None
+
+    # --- Estado guardado ---
+
+    def has_master_password(self):
+        return self.settings.contains("vault/wrapped_key")
+
+    def load(self):
+        """Modo clásico: abre la sesión con la clave guardada (creándola la primera vez)"""
+        if self.has_master_password():
+            return
+        if not self.settings.contains("encryption_key"):
+            self.settings.setValue("encryption_key", Fernet.generate_key().decode())
+        self._open(self.settings.value("encryption_key").encode(), timeout=False)
+
+    def _params(self):
+        return json.loads(self.settings.value("vault/kdf"))
+
+    # --- Sesión ---
+
+    def is_unlocked(self):
+        return self._fernet is not None
+
+    def cipher(self):
+        """Fernet de la clave de datos; lanza VaultLocked si la bóveda está bloqueada"""
+        fernet = self._fernet
+        if fernet is None:
+            raise VaultLocked("La bóveda de contraseñas está bloqueada")
+        self._last_used = time.monotonic()
+        return fernet
+
+    def unlock(self, master_password):
+        """Deriva la clave una vez y desbloquea la sesión; False si la contraseña no es correcta"""
+        if not self.has_master_password():
+            return self.is_unlocked()
+        started = time.perf_counter()
+        data_key = unwrap_key(self.settings.value("vault/wrapped_key"), master_password, self._params())
+        self.last_unlock_seconds = time.perf_counter() - started
+        if data_key is None:
+            print(f"🔒 Contraseña maestra incorrecta ({self.last_unlock_seconds * 1000:.0f} ms)")
+            return False
+        self._open(data_key, timeout=True)
+        print(f"🔓 Bóveda desbloqueada en {self.last_unlock_seconds * 1000:.0f} ms")
+        return True
+
+    def lock(self):
+        """Olvida la clave de datos (solo en modo bóveda: sin contraseña maestra no hay qué pedir)"""
+        if not self.has_master_password() or self._fernet is None:
+            return
+        self._fernet = None
+        self._data_key = None
+        self.idle_timer.stop()
+        print("🔒 Bóveda de contraseñas bloqueada")
+        self.locked.emit()
+
+    def _open(self, data_key, timeout):
+        self._fernet = Fernet(data_key)
+        self._data_key = data_key
+        self._last_used = time.monotonic()
+        if timeout:
+            self.idle_timer.start(self.IDLE_TIMEOUT * 1000)
+        self.unlocked.emit()
+
+    def _check_idle(self):
+        idle = time.monotonic() - self._last_used
+        if idle >= self.IDLE_TIMEOUT:
+            self.lock()
+        else:
+            self.idle_timer.start(int((self.IDLE_TIMEOUT - idle) * 1000) + 50)
+
+    # --- Contraseña maestra ---
+
+    def set_master_password(self, master_password, params=None):
+        """Activa la bóveda o cambia la contraseña maestra (la sesión debe estar desbloqueada)"""
+        if self._fernet is None:
+            raise VaultLocked("Desbloquea la bóveda antes de cambiar la contraseña maestra")
+        params, wrapped = wrap_key(self._data_key, master_password, params)
+        self.settings.setValue("vault/kdf", json.dumps(params))
+        self.settings.setValue("vault/wrapped_key", wrapped)
+        self.settings.remove("encryption_key")  # La clave en claro ya no se guarda
+        self.settings.sync()
+        self._last_used = time.monotonic()
+        self.idle_timer.start(self.IDLE_TIMEOUT * 1000)
+
+    def remove_master_password(self):
+        """Vuelve al modo clásico guardando la clave de datos sin envolver"""
+        if self._fernet is None:
+            raise VaultLocked("Desbloquea la bóveda antes de quitar la contraseña maestra")
+        self.settings.setValue("encryption_key", self._data_key.decode())
+        self.settings.remove("vault/kdf")
+        self.settings.remove("vault/wrapped_key")
+        self.settings.sync()
+        self.idle_timer.stop()
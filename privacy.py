@@ -2,13 +2,16 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                               QLabel, QComboBox, QCheckBox, QDialog, QSlider,
                               QGroupBox, QScrollArea, QFrame, QListWidget, QMessageBox,
                               QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView,
-                              QSizePolicy, QDialogButtonBox, QLineEdit, QTreeWidget,
-                              QTreeWidgetItem, QMenu, QInputDialog, QApplication)
-from PySide6.QtCore import Qt, Signal, QSettings, QUrl, QObject, QDateTime, QTimer
+                              QSizePolicy, QDialogButtonBox, QLineEdit,
+                              QTreeView, QMenu, QApplication, QFileDialog, QSpinBox)
+from PySide6.QtCore import (Qt, Signal, QSettings, QUrl, QObject, QDateTime, QTimer,
+                            QAbstractItemModel, QAbstractTableModel, QModelIndex)
 from PySide6.QtWebEngineCore import (QWebEngineProfile, QWebEngineSettings, 
                                     QWebEngineUrlRequestInterceptor, QWebEngineUrlRequestInfo,
                                     QWebEngineScript)
 from PySide6.QtWebEngineWidgets import QWebEngineView
+import csv
+import gzip
 import json
 import os
 import urllib.request
@@ -17,7 +20,6 @@ import time
 from datetime import datetime, timedelta
 import sqlite3
 import shutil
-import requests
 import re
 from dataclasses import dataclass
 from typing import Optional, Pattern, Set
@@ -348,6 +350,8 @@ class AdBlockerInterceptor(QWebEngineUrlRequestInterceptor):
     def update_filter_lists(self):
         """Actualiza las listas de filtros desde las fuentes en línea"""
         try:
+            import requests  # Solo aquí (cada 24 h): no retrasar el arranque con su importación
+
             # URLs de las listas de filtros
             easylist_url = "https://easylist.to/easylist/easylist.txt"
             easyprivacy_url = "https://easylist.to/easylist/easyprivacy.txt"
@@ -698,115 +702,209 @@ class HistoryManager:
         self.profile = QWebEngineProfile.defaultProfile()
         self.history_db = os.path.join(self.profile.persistentStoragePath(), "History")
         self.last_visit_time = None
+        self.fts_available = False
         self.init_history_db()
 
     def init_history_db(self):
         """Inicializa la base de datos del historial si no existe"""
         try:
-            if not os.path.exists(self.history_db):
-                conn = sqlite3.connect(self.history_db)
-                cursor = conn.cursor()
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS urls (
-                        id INTEGER PRIMARY KEY,
-                        url TEXT NOT NULL,
-                        title TEXT,
-                        visit_count INTEGER DEFAULT 1,
-                        last_visit_time INTEGER,
-                        created_time INTEGER
-                    )
-                ''')
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS visits (
-                        id INTEGER PRIMARY KEY,
-                        url_id INTEGER,
-                        visit_time INTEGER,
-                        FOREIGN KEY (url_id) REFERENCES urls(id)
-                    )
-                ''')
-                conn.commit()
-                conn.close()
+            conn = sqlite3.connect(self.history_db)
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS urls (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    title TEXT,
+                    visit_count INTEGER DEFAULT 1,
+                    last_visit_time INTEGER,
+                    created_time INTEGER
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS visits (
+                    id INTEGER PRIMARY KEY,
+                    url_id INTEGER,
+                    visit_time INTEGER,
+                    FOREIGN KEY (url_id) REFERENCES urls(id)
+                )
+            ''')
+            # Índices para la paginación por clave (visit_time, id) y el JOIN con urls
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_visits_time ON visits(visit_time, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_visits_url_id ON visits(url_id)")
+            try:
+                cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_urls_url ON urls(url)")
+            except sqlite3.IntegrityError:
+                # Historial antiguo con URLs duplicadas: al menos indexar la búsqueda por URL
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_urls_url_dup ON urls(url)")
+            conn.commit()
+            self.fts_available = self._init_fts(cursor)
+            conn.commit()
+            conn.close()
         except Exception as e:
             print(f"Error initializing history database: {str(e)}")
 
+    @staticmethod
+    def _host_sql(column):
+        """Expresión SQL que extrae el host de una URL (sin depender de funciones Python)"""
+        rest = f"substr({column}, instr({column}, '://') + 3)"
+        return (f"CASE WHEN instr({column}, '://') > 0 "
+                f"THEN lower(substr({rest}, 1, instr({rest} || '/', '/') - 1)) ELSE '' END")
+
+    def _init_fts(self, cursor):
+        """Crea el índice FTS5 (url, título, host) y los triggers que lo sincronizan con urls.
+
+        El índice no guarda contenido propio (content=''): los resultados se cruzan con
+        urls por rowid. Devuelve False si el SQLite disponible no trae FTS5.
+        """
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'urls_fts'")
+            exists = cursor.fetchone() is not None
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS urls_fts
+                USING fts5(url, title, host, content='', prefix='2 3 4 6')
+            """)
+            new_host, old_host = self._host_sql("new.url"), self._host_sql("old.url")
+            self._create_fts_insert_trigger(cursor)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS urls_fts_ad AFTER DELETE ON urls BEGIN
+                    INSERT INTO urls_fts(urls_fts, rowid, url, title, host)
+                    VALUES ('delete', old.id, old.url, old.title, {old_host});
+                END
+            """)
+            # add_url reescribe el título en cada visita: solo reindexar si cambia de verdad
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS urls_fts_au AFTER UPDATE OF url, title ON urls
+                WHEN old.url IS NOT new.url OR old.title IS NOT new.title BEGIN
+                    INSERT INTO urls_fts(urls_fts, rowid, url, title, host)
+                    VALUES ('delete', old.id, old.url, old.title, {old_host});
+                    INSERT INTO urls_fts(rowid, url, title, host)
+                    VALUES (new.id, new.url, new.title, {new_host});
+                END
+            """)
+            if not exists:
+                # El host pesa más que el título, y este más que la URL completa
+                cursor.execute("INSERT INTO urls_fts(urls_fts, rank) VALUES ('rank', 'bm25(1.0, 2.0, 4.0)')")
+                # Migración: indexar el historial que ya existía
+                cursor.execute(f"""
+                    INSERT INTO urls_fts(rowid, url, title, host)
+                    SELECT id, url, title, {self._host_sql("url")} FROM urls
+                """)
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 no disponible, la búsqueda del historial usará LIKE: {e}")
+            return False
+
+    def _create_fts_insert_trigger(self, cursor):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS urls_fts_ai AFTER INSERT ON urls BEGIN
+                INSERT INTO urls_fts(rowid, url, title, host)
+                VALUES (new.id, new.url, new.title, {self._host_sql("new.url")});
+            END
+        """)
+
+    @staticmethod
+    def _time_range_bounds(time_range):
+        """Convierte un rango de tiempo en límites (inicio, fin) en microsegundos.
+
+        Devuelve None en los extremos abiertos, p. ej. (None, None) para "all_history".
+        """
+        current_time = int(time.time() * 1000000)
+        day = 24 * 60 * 60 * 1000000
+        if time_range == "today":
+            return current_time - day, None
+        if time_range == "yesterday":
+            return current_time - 2 * day, current_time - day
+        if time_range == "last_week":
+            return current_time - 7 * day, None
+        if time_range == "last_month":
+            return current_time - 30 * day, None
+        return None, None
+
     def add_url(self, url, title=""):
         """Añade una URL al historial"""
+        current_time = int(time.time() * 1000000)  # Microsegundos
+        self.add_visits([(url, title, current_time)])
+
+    def add_visits(self, visits):
+        """Añade varias visitas [(url, title, visit_time)] en una única transacción.
+
+        Un título vacío no sobrescribe el que ya tuviera la URL.
+        """
+        if not visits:
+            return
+        conn = None
         try:
             conn = sqlite3.connect(self.history_db)
             cursor = conn.cursor()
-            current_time = int(time.time() * 1000000)  # Microsegundos
+            for url, title, visit_time in visits:
+                # Verificar si la URL ya existe
+                cursor.execute("SELECT id FROM urls WHERE url = ?", (url,))
+                result = cursor.fetchone()
 
-            # Verificar si la URL ya existe
-            cursor.execute("SELECT id, visit_count FROM urls WHERE url = ?", (url,))
-            result = cursor.fetchone()
+                if result:
+                    url_id = result[0]
+                    cursor.execute("""
+                        UPDATE urls 
+                        SET visit_count = visit_count + 1, last_visit_time = ?,
+                            title = COALESCE(NULLIF(?, ''), title)
+                        WHERE id = ?
+                    """, (visit_time, title, url_id))
+                else:
+                    cursor.execute("""
+                        INSERT INTO urls (url, title, visit_count, last_visit_time, created_time)
+                        VALUES (?, ?, 1, ?, ?)
+                    """, (url, title, visit_time, visit_time))
+                    url_id = cursor.lastrowid
 
-            if result:
-                url_id, visit_count = result
+                # Añadir visita
                 cursor.execute("""
-                    UPDATE urls 
-                    SET visit_count = ?, last_visit_time = ?, title = ?
-                    WHERE id = ?
-                """, (visit_count + 1, current_time, title, url_id))
-            else:
-                cursor.execute("""
-                    INSERT INTO urls (url, title, visit_count, last_visit_time, created_time)
-                    VALUES (?, ?, 1, ?, ?)
-                """, (url, title, current_time, current_time))
-                url_id = cursor.lastrowid
+                    INSERT INTO visits (url_id, visit_time)
+                    VALUES (?, ?)
+                """, (url_id, visit_time))
 
-            # Añadir visita
-            cursor.execute("""
-                INSERT INTO visits (url_id, visit_time)
-                VALUES (?, ?)
-            """, (url_id, current_time))
+            conn.commit()
+            self.last_visit_time = visits[-1][2]
+        except Exception as e:
+            print(f"Error adding URL to history: {str(e)}")
+        finally:
+            if conn is not None:
+                conn.close()
 
+    def update_titles(self, titles):
+        """Actualiza los títulos [(url, title)] de URLs ya existentes en una transacción"""
+        if not titles:
+            return
+        try:
+            conn = sqlite3.connect(self.history_db)
+            conn.executemany("UPDATE urls SET title = ? WHERE url = ?",
+                             [(title, url) for url, title in titles])
             conn.commit()
             conn.close()
-            self.last_visit_time = current_time
         except Exception as e:
-            print(f"Error adding URL to history: {str(e)}")
+            print(f"Error updating history titles: {str(e)}")
+
+    def _range_clause(self, time_range):
+        """Cláusula SQL (y parámetros) que limita visits.visit_time al rango dado"""
+        start_time, end_time = self._time_range_bounds(time_range)
+        if start_time is not None and end_time is not None:
+            return "v.visit_time BETWEEN ? AND ?", [start_time, end_time]
+        if start_time is not None:
+            return "v.visit_time > ?", [start_time]
+        return "1", []
 
     def get_history(self, time_range=None):
         """Obtiene el historial organizado por tiempo"""
         try:
             conn = sqlite3.connect(self.history_db)
             cursor = conn.cursor()
-            
-            if time_range:
-                current_time = int(time.time() * 1000000)
-                if time_range == "today":
-                    start_time = current_time - (24 * 60 * 60 * 1000000)
-                elif time_range == "yesterday":
-                    start_time = current_time - (48 * 60 * 60 * 1000000)
-                    end_time = current_time - (24 * 60 * 60 * 1000000)
-                elif time_range == "last_week":
-                    start_time = current_time - (7 * 24 * 60 * 60 * 1000000)
-                elif time_range == "last_month":
-                    start_time = current_time - (30 * 24 * 60 * 60 * 1000000)
-                
-                if time_range == "yesterday":
-                    cursor.execute("""
-                        SELECT u.url, u.title, v.visit_time
-                        FROM urls u
-                        JOIN visits v ON u.id = v.url_id
-                        WHERE v.visit_time BETWEEN ? AND ?
-                        ORDER BY v.visit_time DESC
-                    """, (start_time, end_time))
-                else:
-                    cursor.execute("""
-                        SELECT u.url, u.title, v.visit_time
-                        FROM urls u
-                        JOIN visits v ON u.id = v.url_id
-                        WHERE v.visit_time > ?
-                        ORDER BY v.visit_time DESC
-                    """, (start_time,))
-            else:
-                cursor.execute("""
-                    SELECT u.url, u.title, v.visit_time
-                    FROM urls u
-                    JOIN visits v ON u.id = v.url_id
-                    ORDER BY v.visit_time DESC
-                """)
+            where, params = self._range_clause(time_range)
+            cursor.execute(f"""
+                SELECT u.url, u.title, v.visit_time
+                FROM urls u
+                JOIN visits v ON u.id = v.url_id
+                WHERE {where}
+                ORDER BY v.visit_time DESC
+            """, params)
 
             history = cursor.fetchall()
             conn.close()
@@ -815,34 +913,160 @@ class HistoryManager:
             print(f"Error getting history: {str(e)}")
             return []
 
+    @staticmethod
+    def _local_day_bounds(visit_time):
+        """Devuelve (medianoche, medianoche siguiente) locales del día de visit_time"""
+        day = datetime.fromtimestamp(visit_time / 1000000).date()
+        start = datetime.combine(day, datetime.min.time())
+        end = datetime.combine(day + timedelta(days=1), datetime.min.time())
+        return int(start.timestamp() * 1000000), int(end.timestamp() * 1000000)
+
+    def get_day_groups(self, before=None, time_range=None, limit=30):
+        """Devuelve hasta `limit` días con visitas anteriores a `before`, del más reciente al más antiguo.
+
+        Cada día es una tupla (desde, hasta) en microsegundos, con desde <= visit_time < hasta,
+        ya recortada al rango de tiempo. Cada día cuesta un único salto por el índice de
+        visit_time, así que el coste no depende del tamaño total del historial.
+        """
+        start_time, end_time = self._time_range_bounds(time_range)
+        upper = before
+        if upper is None and end_time is not None:
+            upper = end_time + 1
+        lower = start_time + 1 if start_time is not None else None
+        groups = []
+        try:
+            conn = sqlite3.connect(self.history_db)
+            cursor = conn.cursor()
+            while len(groups) < limit:
+                clauses, params = ["1"], []
+                if upper is not None:
+                    clauses.append("v.visit_time < ?")
+                    params.append(upper)
+                if lower is not None:
+                    clauses.append("v.visit_time >= ?")
+                    params.append(lower)
+                cursor.execute(f"""
+                    SELECT v.visit_time
+                    FROM visits v
+                    JOIN urls u ON u.id = v.url_id
+                    WHERE {" AND ".join(clauses)}
+                    ORDER BY v.visit_time DESC
+                    LIMIT 1
+                """, params)
+                row = cursor.fetchone()
+                if not row:
+                    break
+                day_start, day_end = self._local_day_bounds(row[0])
+                group_start = max(day_start, lower) if lower is not None else day_start
+                group_end = min(day_end, upper) if upper is not None else day_end
+                groups.append((group_start, group_end))
+                upper = group_start
+            conn.close()
+        except Exception as e:
+            print(f"Error getting history days: {str(e)}")
+        return groups
+
+    def get_visits_page(self, start, end, after=None, limit=200):
+        """Devuelve una página de visitas con start <= visit_time < end, de la más reciente a la más antigua.
+
+        Paginación por clave: `after` es la clave (visit_time, id) de la última fila de la
+        página anterior. Cada fila es (url, title, visit_time, visit_id).
+        """
+        clauses, params = ["v.visit_time >= ?", "v.visit_time < ?"], [start, end]
+        if after is not None:
+            after_time, after_id = after
+            clauses.append("v.visit_time <= ? AND NOT (v.visit_time = ? AND v.id >= ?)")
+            params.extend([after_time, after_time, after_id])
+        try:
+            conn = sqlite3.connect(self.history_db)
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT u.url, u.title, v.visit_time, v.id
+                FROM visits v
+                JOIN urls u ON u.id = v.url_id
+                WHERE {" AND ".join(clauses)}
+                ORDER BY v.visit_time DESC, v.id DESC
+                LIMIT ?
+            """, params + [limit])
+            rows = cursor.fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"Error getting history page: {str(e)}")
+            return []
+
+    @staticmethod
+    def _fts_query(text):
+        """Convierte el texto tecleado en una consulta FTS5 de prefijos: 'git hub' -> "git"* "hub"*"""
+        return " ".join(f'"{term}"*' for term in re.findall(r"\w+", text.lower()))
+
+    # Coincidencias más recientes que se puntúan con bm25. Puntuar todas las coincidencias
+    # de un término muy común ("https", "com") cuesta cientos de ms con 1M de visitas.
+    SEARCH_CANDIDATES = 1000
+
+    def search_history(self, text, limit=500):
+        """Devuelve los `limit` mejores resultados para `text` como [(url, title, last_visit_time)].
+
+        Con FTS5 se toman las SEARCH_CANDIDATES URLs coincidentes más recientes y se
+        ordenan por bm25. Las filas se leen de una vez y la conexión se cierra antes de
+        volver: un cursor abierto entre páginas bloquearía las escrituras del historial.
+        """
+        query = self._fts_query(text)
+        if not query:
+            return []
+        try:
+            conn = sqlite3.connect(self.history_db)
+        except Exception as e:
+            print(f"Error searching history: {str(e)}")
+            return []
+        try:
+            cursor = conn.cursor()
+            if self.fts_available:
+                cursor.execute("""
+                    SELECT u.url, u.title, u.last_visit_time
+                    FROM (
+                        SELECT rowid, rank FROM urls_fts
+                        WHERE urls_fts MATCH ?
+                        ORDER BY rowid DESC
+                        LIMIT ?
+                    ) AS f
+                    JOIN urls u ON u.id = f.rowid
+                    ORDER BY f.rank, u.last_visit_time DESC
+                    LIMIT ?
+                """, (query, self.SEARCH_CANDIDATES, limit))
+            else:
+                pattern = f"%{text}%"
+                cursor.execute("""
+                    SELECT url, title, last_visit_time
+                    FROM urls
+                    WHERE url LIKE ? OR title LIKE ?
+                    ORDER BY last_visit_time DESC
+                    LIMIT ?
+                """, (pattern, pattern, limit))
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Error searching history: {str(e)}")
+            return []
+        finally:
+            conn.close()
+
     def clear_history(self, time_range=None):
         """Limpia el historial según el rango de tiempo especificado"""
         try:
             conn = sqlite3.connect(self.history_db)
             cursor = conn.cursor()
             
-            if time_range:
-                current_time = int(time.time() * 1000000)
-                if time_range == "today":
-                    start_time = current_time - (24 * 60 * 60 * 1000000)
-                elif time_range == "yesterday":
-                    start_time = current_time - (48 * 60 * 60 * 1000000)
-                    end_time = current_time - (24 * 60 * 60 * 1000000)
-                elif time_range == "last_week":
-                    start_time = current_time - (7 * 24 * 60 * 60 * 1000000)
-                elif time_range == "last_month":
-                    start_time = current_time - (30 * 24 * 60 * 60 * 1000000)
-                
-                if time_range == "yesterday":
-                    cursor.execute("""
-                        DELETE FROM visits 
-                        WHERE visit_time BETWEEN ? AND ?
-                    """, (start_time, end_time))
-                else:
-                    cursor.execute("""
-                        DELETE FROM visits 
-                        WHERE visit_time > ?
-                    """, (start_time,))
+            start_time, end_time = self._time_range_bounds(time_range)
+            if start_time is not None and end_time is not None:
+                cursor.execute("""
+                    DELETE FROM visits 
+                    WHERE visit_time BETWEEN ? AND ?
+                """, (start_time, end_time))
+            elif start_time is not None:
+                cursor.execute("""
+                    DELETE FROM visits 
+                    WHERE visit_time > ?
+                """, (start_time,))
             else:
                 cursor.execute("DELETE FROM visits")
                 cursor.execute("DELETE FROM urls")
@@ -852,7 +1076,561 @@ class HistoryManager:
         except Exception as e:
             print(f"Error clearing history: {str(e)}")
 
+    # --- Exportación e importación en streaming ---
+
+    EXPORT_CHUNK = 5000
+    IMPORT_BATCH = 20000
+
+    # Nombres de columna aceptados al importar (en minúsculas, sin espacios ni "_")
+    IMPORT_URL_FIELDS = ("url", "uri", "href", "link")
+    IMPORT_TITLE_FIELDS = ("title", "name")
+    IMPORT_TIME_FIELDS = ("visittime", "timeusec", "visitdate", "lastvisittime",
+                          "lastvisitdate", "timestamp", "date", "time")
+    WEBKIT_EPOCH_OFFSET = 11644473600 * 1000000  # 1601-01-01 -> 1970-01-01 en µs
+
+    @staticmethod
+    def _transfer_format(path, fmt=None):
+        """Devuelve (formato, comprimido) a partir de la extensión si no se indica formato"""
+        name = path.lower()
+        compressed = name.endswith(".gz")
+        if compressed:
+            name = name[:-3]
+        if fmt is None:
+            ext = os.path.splitext(name)[1]
+            fmt = {".csv": "csv", ".tsv": "csv"}.get(ext, "jsonl")
+        return fmt, compressed
+
+    @staticmethod
+    def _open_text(path, mode, compressed):
+        if compressed:
+            return gzip.open(path, mode + "t", compresslevel=6, encoding="utf-8", newline="")
+        return open(path, mode, encoding="utf-8", newline="")
+
+    @staticmethod
+    def _report_rate(action, rows, started):
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        rate = rows / elapsed
+        print(f"📦 Historial {action}: {rows} visitas en {elapsed:.1f} s ({rate:.0f} filas/s)")
+        return {"rows": rows, "seconds": elapsed, "rows_per_sec": rate}
+
+    def export_history(self, path, fmt=None, time_range=None, progress=None, chunk_size=EXPORT_CHUNK):
+        """Exporta las visitas a JSONL o CSV (".gz" para comprimir) con memoria constante.
+
+        Las visitas se leen en orden cronológico en páginas de `chunk_size` filas por
+        clave (visit_time, id), cada una en su propia consulta: la exportación nunca
+        retiene un bloqueo de lectura que impida escribir al hilo del historial.
+        `progress(filas)` se llama tras cada página. Devuelve filas, segundos y filas/s.
+        """
+        fmt, compressed = self._transfer_format(path, fmt)
+        started = time.perf_counter()
+        rows = 0
+        where, params = self._range_clause(time_range)
+        try:
+            conn = sqlite3.connect(self.history_db)
+            with self._open_text(path, "w", compressed) as f:
+                writer = None
+                if fmt == "csv":
+                    writer = csv.writer(f)
+                    writer.writerow(["url", "title", "visit_time"])
+                last = None
+                while True:
+                    page_where, page_params = where, list(params)
+                    if last is not None:
+                        page_where += " AND (v.visit_time, v.id) > (?, ?)"
+                        page_params += list(last)
+                    page = conn.execute(f"""
+                        SELECT u.url, u.title, v.visit_time, v.id
+                        FROM visits v
+                        JOIN urls u ON u.id = v.url_id
+                        WHERE {page_where}
+                        ORDER BY v.visit_time, v.id
+                        LIMIT ?
+                    """, page_params + [chunk_size]).fetchall()
+                    if not page:
+                        break
+                    if writer is not None:
+                        writer.writerows((url, title or "", visit_time) for url, title, visit_time, _ in page)
+                    else:
+                        f.write("".join(
+                            json.dumps({"url": url, "title": title or "", "visit_time": visit_time},
+                                       ensure_ascii=False) + "\n"
+                            for url, title, visit_time, _ in page))
+                    rows += len(page)
+                    last = page[-1][2:]
+                    if progress:
+                        progress(rows)
+            conn.close()
+        except Exception as e:
+            print(f"Error exporting history: {str(e)}")
+        return self._report_rate("exportado", rows, started)
+
+    @classmethod
+    def _normalize_visit_time(cls, value):
+        """Convierte un instante exportado por cualquier navegador a µs desde 1970.
+
+        Acepta segundos, milisegundos, microsegundos, el epoch de Chrome/WebKit (1601)
+        y fechas ISO 8601. Devuelve None si no se puede interpretar.
+        """
+        if value is None or value == "":
+            return None
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            try:
+                moment = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+                return int(moment.timestamp() * 1000000)
+            except ValueError:
+                return None
+        if number > 1e16:
+            return int(number) - cls.WEBKIT_EPOCH_OFFSET
+        if number > 1e14:
+            return int(number)
+        if number > 1e11:
+            return int(number * 1000)
+        return int(number * 1000000)
+
+    @staticmethod
+    def _match_field(keys, names):
+        """Primera clave de `keys` que corresponde a `names` (sin mayúsculas, espacios ni "_")"""
+        for key in keys:
+            if key and key.lower().replace(" ", "").replace("_", "") in names:
+                return key
+        return None
+
+    def _match_fields(self, keys):
+        return tuple(self._match_field(keys, names) for names in
+                     (self.IMPORT_URL_FIELDS, self.IMPORT_TITLE_FIELDS, self.IMPORT_TIME_FIELDS))
+
+    def _iter_import_records(self, path, fmt=None):
+        """Lee un historial exportado fila a fila y produce (url, title, visit_time_µs).
+
+        Admite JSONL y CSV/TSV (opcionalmente .gz) con columnas de nombre flexible, y las
+        bases de datos de historial de Chrome (History) y Firefox (places.sqlite).
+        """
+        with open(path, "rb") as f:
+            header = f.read(16)
+        if header.startswith(b"SQLite format 3"):
+            yield from self._iter_sqlite_records(path)
+            return
+
+        fmt, compressed = self._transfer_format(path, fmt)
+        with self._open_text(path, "r", compressed) as f:
+            if fmt == "csv":
+                sample = f.read(4096)
+                f.seek(0)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+                except csv.Error:
+                    dialect = csv.excel
+                reader = csv.reader(f, dialect)
+                header = next(reader, [])
+                # Columnas resueltas una sola vez por fichero
+                positions = {key: i for i, key in enumerate(header)}
+                url_col, title_col, time_col = (positions.get(key) for key in self._match_fields(header))
+                if url_col is None:
+                    raise ValueError("El CSV no tiene columna de URL")
+                for row in reader:
+                    if len(row) <= url_col:
+                        continue
+                    yield (row[url_col],
+                           row[title_col] if title_col is not None and title_col < len(row) else "",
+                           self._normalize_visit_time(row[time_col]) if time_col is not None
+                           and time_col < len(row) else None)
+                return
+
+            fields_by_keys = {}
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    continue
+                keys = tuple(record)
+                fields = fields_by_keys.get(keys)
+                if fields is None:
+                    fields = fields_by_keys[keys] = self._match_fields(keys)
+                url_key, title_key, time_key = fields
+                yield record.get(url_key), record.get(title_key), self._normalize_visit_time(record.get(time_key))
+
+    def _iter_sqlite_records(self, path):
+        """Recorre las visitas de otra base de datos de historial sin cargarlas en memoria"""
+        if os.path.abspath(path) == os.path.abspath(self.history_db):
+            raise ValueError("No se puede importar el historial sobre sí mismo")
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if "moz_historyvisits" in tables:
+                # Firefox: visit_date ya está en µs desde 1970
+                query = """SELECT p.url, p.title, v.visit_date FROM moz_historyvisits v
+                           JOIN moz_places p ON p.id = v.place_id"""
+            elif {"urls", "visits"} <= tables:
+                # Chrome enlaza con visits.url; el historial de este navegador, con visits.url_id
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(visits)")}
+                url_column = "url_id" if "url_id" in columns else "url"
+                query = f"""SELECT u.url, u.title, v.visit_time FROM visits v
+                            JOIN urls u ON u.id = v.{url_column}"""
+            else:
+                raise ValueError("Base de datos de historial no reconocida")
+            for url, title, visit_time in conn.execute(query):
+                yield url, title, self._normalize_visit_time(visit_time)
+        finally:
+            conn.close()
+
+    def _import_batch(self, cursor, batch, known_range):
+        """Inserta un lote de visitas y devuelve cuántas eran nuevas.
+
+        Las URLs se deduplican contra el índice único de urls y las visitas ya presentes
+        (misma URL y mismo instante) se descartan, así reimportar un fichero no duplica.
+        Solo se consulta visits para las visitas dentro de `known_range`, el intervalo
+        [mín, máx] de visit_time ya guardado, que se amplía con cada lote.
+        """
+        if not cursor.connection.in_transaction:
+            cursor.execute("BEGIN")  # También el DROP TRIGGER de abajo debe ir en la transacción
+        # Agrupar por URL: [título, instantes de visita]
+        by_url = {}
+        for url, title, visit_time in batch:
+            entry = by_url.get(url)
+            if entry is None:
+                by_url[url] = [title, {visit_time}]
+            else:
+                entry[1].add(visit_time)
+                if title and not entry[0]:
+                    entry[0] = title
+
+        ids = {}
+        urls = list(by_url)
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            cursor.execute(f"SELECT url, id FROM urls WHERE url IN ({','.join('?' * len(chunk))})", chunk)
+            ids.update(cursor.fetchall())
+
+        # URLs nuevas: todas sus visitas son nuevas, se insertan ya con el recuento final.
+        # FTS5 vuelca su índice en cada disparo del trigger; durante el lote se retira (dentro
+        # de la transacción, nadie más lo ve) y las URLs nuevas se indexan con una sola sentencia
+        new_urls = [url for url in urls if url not in ids]
+        if self.fts_available:
+            cursor.execute("DROP TRIGGER IF EXISTS urls_fts_ai")
+        max_id = cursor.execute("SELECT MAX(id) FROM urls").fetchone()[0] or 0
+        cursor.executemany("""
+            INSERT INTO urls (url, title, visit_count, last_visit_time, created_time)
+            VALUES (?, ?, ?, ?, ?)
+        """, [(url, by_url[url][0], len(by_url[url][1]), max(by_url[url][1]), min(by_url[url][1]))
+              for url in new_urls])
+        if self.fts_available:
+            cursor.execute(f"""
+                INSERT INTO urls_fts(rowid, url, title, host)
+                SELECT id, url, title, {self._host_sql("url")} FROM urls WHERE id > ?
+            """, (max_id,))
+            self._create_fts_insert_trigger(cursor)
+        for i in range(0, len(new_urls), 500):
+            chunk = new_urls[i:i + 500]
+            cursor.execute(f"SELECT url, id FROM urls WHERE url IN ({','.join('?' * len(chunk))})", chunk)
+            for url, url_id in cursor.fetchall():
+                by_url[url].append(url_id)
+
+        low, high = known_range
+        visits = []
+        updates = []
+        for url, url_id in ids.items():
+            title, times = by_url[url]
+            fresh = [visit_time for visit_time in times
+                     if low is None or not low <= visit_time <= high
+                     or cursor.execute("SELECT 1 FROM visits WHERE visit_time = ? AND url_id = ?",
+                                       (visit_time, url_id)).fetchone() is None]
+            if fresh:
+                visits.extend((url_id, visit_time) for visit_time in fresh)
+                updates.append((len(fresh), max(fresh), title, url_id))
+        for url in new_urls:
+            title, times, url_id = by_url[url]
+            visits.extend((url_id, visit_time) for visit_time in times)
+
+        cursor.executemany("INSERT INTO visits (url_id, visit_time) VALUES (?, ?)", visits)
+        cursor.executemany("""
+            UPDATE urls SET visit_count = COALESCE(visit_count, 0) + ?,
+                            last_visit_time = MAX(COALESCE(last_visit_time, 0), ?),
+                            title = COALESCE(NULLIF(title, ''), NULLIF(?, ''))
+            WHERE id = ?
+        """, updates)
+
+        batch_low = min(visit_time for _, visit_time in visits) if visits else None
+        if batch_low is not None:
+            batch_high = max(visit_time for _, visit_time in visits)
+            known_range[0] = batch_low if low is None else min(low, batch_low)
+            known_range[1] = batch_high if high is None else max(high, batch_high)
+        return len(visits)
+
+    def import_history(self, path, fmt=None, progress=None, batch_size=IMPORT_BATCH):
+        """Importa un historial exportado (propio o de otro navegador) en lotes grandes.
+
+        El fichero se lee en streaming y cada lote de `batch_size` visitas va en una
+        transacción, así que la memoria no depende del tamaño del historial. Las filas
+        sin URL o sin fecha válida se omiten. `progress(filas_leídas)` se llama por lote.
+        Devuelve filas leídas, visitas nuevas, omitidas, segundos y filas/s.
+        """
+        started = time.perf_counter()
+        rows = added = skipped = 0
+        try:
+            conn = sqlite3.connect(self.history_db, timeout=30)
+            cursor = conn.cursor()
+            known_range = list(cursor.execute(
+                "SELECT (SELECT MIN(visit_time) FROM visits), (SELECT MAX(visit_time) FROM visits)").fetchone())
+            batch = []
+            for url, title, visit_time in self._iter_import_records(path, fmt):
+                rows += 1
+                if not url or visit_time is None or url.startswith("about:"):
+                    skipped += 1
+                    continue
+                batch.append((url, title or "", visit_time))
+                if len(batch) >= batch_size:
+                    added += self._import_batch(cursor, batch, known_range)
+                    conn.commit()
+                    batch = []
+                    if progress:
+                        progress(rows)
+            if batch:
+                added += self._import_batch(cursor, batch, known_range)
+                conn.commit()
+                if progress:
+                    progress(rows)
+            conn.close()
+        except Exception as e:
+            print(f"Error importing history: {str(e)}")
+        stats = self._report_rate("importado", rows, started)
+        stats.update(added=added, skipped=skipped)
+        print(f"📥 {added} visitas nuevas, {rows - skipped - added} ya existentes, {skipped} omitidas")
+        return stats
+
+
+class HistoryModel(QAbstractItemModel):
+    """Modelo perezoso del historial: días como nodos raíz y visitas como hijos.
+
+    Los días y las visitas se cargan por páginas (canFetchMore/fetchMore) con paginación
+    por clave, y las horas solo se formatean al pintar las filas visibles, así que abrir
+    el diálogo cuesta lo mismo con 100 visitas que con 100.000.
+    """
+
+    COLUMNS = ["Title", "URL", "Visit Time"]
+    DAY_PAGE_SIZE = 30
+    VISIT_PAGE_SIZE = 200
+
+    class _DayGroup:
+        __slots__ = ("row", "start", "end", "label", "rows", "exhausted")
+
+        def __init__(self, row, start, end):
+            self.row = row
+            self.start = start
+            self.end = end
+            self.label = datetime.fromtimestamp(start / 1000000).strftime("%Y-%m-%d")
+            self.rows = []
+            self.exhausted = False
+
+    def __init__(self, history_manager, parent=None):
+        super().__init__(parent)
+        self.history_manager = history_manager
+        self.time_range = None
+        self._groups = []
+        self._days_exhausted = False
+
+    def reload(self, time_range=None):
+        """Descarta lo cargado y vuelve a empezar con otro rango de tiempo"""
+        self.beginResetModel()
+        self.time_range = time_range
+        self._groups = []
+        self._days_exhausted = False
+        self.endResetModel()
+
+    def _group_of(self, index):
+        """Devuelve el día de un índice de día (o None si es una visita)"""
+        if index.isValid() and index.internalPointer() is None:
+            return self._groups[index.row()]
+        return None
+
+    def url_for_index(self, index):
+        """URL de una fila de visita, o None para filas de día"""
+        group = index.internalPointer() if index.isValid() else None
+        if group is None:
+            return None
+        return group.rows[index.row()][0]
+
+    # --- Estructura ---
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, None)
+        return self.createIndex(row, column, self._groups[parent.row()])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        group = index.internalPointer()
+        if group is None:
+            return QModelIndex()
+        return self.createIndex(group.row, 0, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self._groups)
+        if parent.column() != 0:
+            return 0
+        group = self._group_of(parent)
+        return len(group.rows) if group else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self._groups) or not self._days_exhausted
+        group = self._group_of(parent)
+        return group is not None and parent.column() == 0 and (bool(group.rows) or not group.exhausted)
+
+    # --- Carga por páginas ---
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return not self._days_exhausted
+        group = self._group_of(parent)
+        return group is not None and not group.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            before = self._groups[-1].start if self._groups else None
+            days = self.history_manager.get_day_groups(
+                before, self.time_range, self.DAY_PAGE_SIZE)
+            if len(days) < self.DAY_PAGE_SIZE:
+                self._days_exhausted = True
+            if days:
+                first = len(self._groups)
+                self.beginInsertRows(QModelIndex(), first, first + len(days) - 1)
+                self._groups.extend(self._DayGroup(first + i, start, end)
+                                    for i, (start, end) in enumerate(days))
+                self.endInsertRows()
+            return
+
+        group = self._group_of(parent)
+        if group is None or group.exhausted:
+            return
+        after = None
+        if group.rows:
+            last = group.rows[-1]
+            after = (last[2], last[3])
+        rows = self.history_manager.get_visits_page(
+            group.start, group.end, after, self.VISIT_PAGE_SIZE)
+        if len(rows) < self.VISIT_PAGE_SIZE:
+            group.exhausted = True
+        if rows:
+            first = len(group.rows)
+            self.beginInsertRows(parent, first, first + len(rows) - 1)
+            group.rows.extend(rows)
+            self.endInsertRows()
+
+    # --- Datos ---
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        group = index.internalPointer()
+        if group is None:
+            if role == Qt.DisplayRole and index.column() == 0:
+                return self._groups[index.row()].label
+            return None
+
+        url, title, visit_time, _ = group.rows[index.row()]
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return title or url
+            if index.column() == 1:
+                return url
+            # Formatear solo cuando la vista pinta la fila
+            return datetime.fromtimestamp(visit_time / 1000000).strftime("%H:%M:%S")
+        if role == Qt.ToolTipRole and index.column() < 2:
+            return url
+        if role == Qt.UserRole:
+            return url
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+class HistorySearchModel(QAbstractTableModel):
+    """Resultados de búsqueda del historial, ordenados por relevancia.
+
+    HistoryManager.search_history devuelve como mucho `limit` filas ya leídas (sin
+    dejar la base de datos abierta); la vista las inserta por páginas según hace scroll.
+    """
+
+    COLUMNS = ["Title", "URL", "Last Visit"]
+    PAGE_SIZE = 50
+
+    def __init__(self, history_manager, parent=None):
+        super().__init__(parent)
+        self.history_manager = history_manager
+        self._rows = []
+        self._results = []
+
+    def search(self, text, limit=500):
+        """Lanza una nueva búsqueda y muestra su primera página"""
+        self.beginResetModel()
+        self._rows = []
+        self._results = self.history_manager.search_history(text, limit)
+        self.endResetModel()
+        self.fetchMore()
+
+    def url_for_index(self, index):
+        return self._rows[index.row()][0] if index.isValid() else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and len(self._rows) < len(self._results)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        first = len(self._rows)
+        rows = self._results[first:first + self.PAGE_SIZE]
+        if rows:
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        url, title, last_visit_time = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return title or url
+            if index.column() == 1:
+                return url
+            if last_visit_time:
+                return datetime.fromtimestamp(last_visit_time / 1000000).strftime("%Y-%m-%d %H:%M:%S")
+            return ""
+        if role == Qt.ToolTipRole and index.column() < 2:
+            return url
+        if role == Qt.UserRole:
+            return url
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+
 class HistoryDialog(QDialog):
+    # Progreso y resultado de exportar/importar, emitidos desde el hilo de trabajo
+    transfer_progress = Signal(str)
+    transfer_finished = Signal(str)
+
     def __init__(self, history_manager, parent=None):
         super().__init__(parent)
         self.history_manager = history_manager
@@ -880,87 +1658,102 @@ class HistoryDialog(QDialog):
         toolbar.addWidget(QLabel("Show:"))
         toolbar.addWidget(self.time_range_combo)
         
-        # Botón de búsqueda
-        self.search_btn = QPushButton("Search")
-        self.search_btn.clicked.connect(self.search_history)
-        toolbar.addWidget(self.search_btn)
+        # Búsqueda mientras se escribe (con un pequeño retardo para no consultar por tecla)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search history...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(lambda _: self.search_timer.start())
+        self.search_edit.returnPressed.connect(self.search_history)
+        toolbar.addWidget(self.search_edit)
+        
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.search_history)
         
         # Botón de limpiar
         self.clear_btn = QPushButton("Clear History")
         self.clear_btn.clicked.connect(self.clear_history)
         toolbar.addWidget(self.clear_btn)
         
+        # Exportar / importar (en un hilo: pueden ser millones de visitas)
+        self.export_btn = QPushButton("Export...")
+        self.export_btn.clicked.connect(self.export_history)
+        toolbar.addWidget(self.export_btn)
+        self.import_btn = QPushButton("Import...")
+        self.import_btn.clicked.connect(self.import_history)
+        toolbar.addWidget(self.import_btn)
+        
         toolbar.addStretch()
         layout.addLayout(toolbar)
         
-        # Árbol de historial
-        self.history_tree = QTreeWidget()
-        self.history_tree.setHeaderLabels(["Title", "URL", "Visit Time"])
+        self.transfer_label = QLabel()
+        self.transfer_label.hide()
+        layout.addWidget(self.transfer_label)
+        self.transfer_progress.connect(self.transfer_label.setText)
+        self.transfer_finished.connect(self._on_transfer_finished)
+        
+        # Árbol de historial (modelo perezoso: solo carga lo que se ve)
+        self.history_model = HistoryModel(self.history_manager, self)
+        self.search_model = HistorySearchModel(self.history_manager, self)
+        self.history_tree = QTreeView()
+        self.history_tree.setModel(self.history_model)
+        self.history_tree.setUniformRowHeights(True)
         self.history_tree.setColumnWidth(0, 300)
         self.history_tree.setColumnWidth(1, 300)
-        self.history_tree.itemDoubleClicked.connect(self.open_url)
+        self.history_tree.doubleClicked.connect(self.open_url)
         self.history_tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.history_tree.customContextMenuRequested.connect(self.show_context_menu)
+        self.history_model.rowsInserted.connect(self._expand_first_day)
         layout.addWidget(self.history_tree)
         
         self.setLayout(layout)
         self.update_history()
 
+    def _current_time_range(self):
+        return self.time_range_combo.currentText().lower().replace(" ", "_")
+
+    def _expand_first_day(self, parent, first, last):
+        """Despliega el día más reciente en cuanto llega la primera página de días"""
+        if not parent.isValid() and first == 0:
+            self.history_tree.expand(self.history_model.index(0, 0))
+
+    def _show_model(self, model):
+        if self.history_tree.model() is not model:
+            self.history_tree.setModel(model)
+            self.history_tree.setRootIsDecorated(model is self.history_model)
+            self.history_tree.setColumnWidth(0, 300)
+            self.history_tree.setColumnWidth(1, 300)
+
     def update_history(self):
         """Actualiza el árbol de historial"""
-        self.history_tree.clear()
-        
-        time_range = self.time_range_combo.currentText().lower().replace(" ", "_")
-        history = self.history_manager.get_history(time_range)
-        
-        # Organizar por fecha
-        current_date = None
-        current_date_item = None
-        
-        for url, title, visit_time in history:
-            visit_datetime = datetime.fromtimestamp(visit_time / 1000000)
-            date_str = visit_datetime.strftime("%Y-%m-%d")
-            
-            if date_str != current_date:
-                current_date = date_str
-                current_date_item = QTreeWidgetItem(self.history_tree, [date_str])
-                current_date_item.setExpanded(True)
-            
-            time_str = visit_datetime.strftime("%H:%M:%S")
-            item = QTreeWidgetItem(current_date_item, [title or url, url, time_str])
-            item.setData(0, Qt.UserRole, url)
-
-    def open_url(self, item, column):
+        if self.search_edit.text().strip():
+            # Sin textChanged: el temporizador de búsqueda volvería a llamar a update_history
+            self.search_edit.blockSignals(True)
+            self.search_edit.clear()
+            self.search_edit.blockSignals(False)
+            self.search_timer.stop()
+        self._show_model(self.history_model)
+        self.history_model.reload(self._current_time_range())
+        if self.history_model.canFetchMore():
+            self.history_model.fetchMore()
+
+    def open_url(self, index):
         """Abre la URL seleccionada"""
-        if item.parent():  # Si no es un elemento de fecha
-            url = item.data(0, Qt.UserRole)
-            if url:
-                self.parent().load_url(QUrl(url))
-                self.accept()
+        url = self.history_tree.model().url_for_index(index)
+        if url:  # Si no es un elemento de fecha
+            self.parent().load_url(url)
+            self.accept()
 
     def search_history(self):
-        """Busca en el historial"""
-        text, ok = QInputDialog.getText(self, "Search History", "Enter search term:")
-        if ok and text:
-            self.history_tree.clear()
-            history = self.history_manager.get_history()
-            
-            current_date = None
-            current_date_item = None
-            
-            for url, title, visit_time in history:
-                if text.lower() in url.lower() or (title and text.lower() in title.lower()):
-                    visit_datetime = datetime.fromtimestamp(visit_time / 1000000)
-                    date_str = visit_datetime.strftime("%Y-%m-%d")
-                    
-                    if date_str != current_date:
-                        current_date = date_str
-                        current_date_item = QTreeWidgetItem(self.history_tree, [date_str])
-                        current_date_item.setExpanded(True)
-                    
-                    time_str = visit_datetime.strftime("%H:%M:%S")
-                    item = QTreeWidgetItem(current_date_item, [title or url, url, time_str])
-                    item.setData(0, Qt.UserRole, url)
+        """Busca en el historial (índice FTS5) y muestra los resultados por relevancia"""
+        self.search_timer.stop()
+        text = self.search_edit.text().strip()
+        if not text:
+            self.update_history()
+            return
+        self._show_model(self.search_model)
+        self.search_model.search(text)
 
     def clear_history(self):
         """Limpia el historial"""
@@ -972,14 +1765,63 @@ class HistoryDialog(QDialog):
         )
         
         if reply == QMessageBox.Yes:
-            time_range = self.time_range_combo.currentText().lower().replace(" ", "_")
-            self.history_manager.clear_history(time_range)
+            self.history_manager.clear_history(self._current_time_range())
             self.update_history()
 
+    def _run_transfer(self, label, job):
+        """Ejecuta una exportación/importación en segundo plano mostrando el progreso"""
+        self.export_btn.setEnabled(False)
+        self.import_btn.setEnabled(False)
+        self.transfer_label.setText(f"{label}...")
+        self.transfer_label.show()
+
+        def emit(signal, message):
+            try:
+                signal.emit(message)
+            except RuntimeError:
+                pass  # El diálogo se cerró: el trabajo sigue hasta terminar
+
+        def worker():
+            stats = job(lambda rows: emit(self.transfer_progress, f"{label}: {rows} visitas"))
+            message = f"{label}: {stats['rows']} visitas en {stats['seconds']:.1f} s ({stats['rows_per_sec']:.0f} filas/s)"
+            if "added" in stats:
+                message += f", {stats['added']} nuevas, {stats['skipped']} omitidas"
+            emit(self.transfer_finished, message)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_transfer_finished(self, message):
+        self.transfer_label.setText(message)
+        self.export_btn.setEnabled(True)
+        self.import_btn.setEnabled(True)
+        if self.history_tree.model() is self.history_model:
+            self.update_history()
+
+    def export_history(self):
+        """Exporta el rango mostrado a JSONL o CSV, opcionalmente comprimido con gzip"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export History", "history.jsonl.gz",
+            "JSON Lines (*.jsonl *.jsonl.gz);;CSV (*.csv *.csv.gz)")
+        if path:
+            time_range = self._current_time_range()
+            self._run_transfer("Exportando",
+                               lambda progress: self.history_manager.export_history(
+                                   path, time_range=time_range, progress=progress))
+
+    def import_history(self):
+        """Importa un historial exportado por este u otro navegador"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import History", "",
+            "History files (*.jsonl *.json *.csv *.tsv *.gz *.sqlite *.db History);;All files (*)")
+        if path:
+            self._run_transfer("Importando",
+                               lambda progress: self.history_manager.import_history(path, progress=progress))
+
     def show_context_menu(self, position):
         """Muestra el menú contextual"""
-        item = self.history_tree.itemAt(position)
-        if item and item.parent():  # Si no es un elemento de fecha
+        index = self.history_tree.indexAt(position)
+        url = self.history_tree.model().url_for_index(index)
+        if url:  # Si no es un elemento de fecha
             menu = QMenu()
             open_action = menu.addAction("Open")
             copy_action = menu.addAction("Copy URL")
@@ -988,9 +1830,8 @@ class HistoryDialog(QDialog):
             action = menu.exec(self.history_tree.mapToGlobal(position))
             
             if action == open_action:
-                self.open_url(item, 0)
+                self.open_url(index)
             elif action == copy_action:
-                url = item.data(0, Qt.UserRole)
                 QApplication.clipboard().setText(url)
             elif action == delete_action:
                 # Implementar eliminación de URL específica
@@ -1010,15 +1851,32 @@ class PrivacyManager(QWidget):
         self.history_manager = HistoryManager()
         self.auto_clear = AutoClearSettings()
         self.ad_blocker = AdBlockerInterceptor()
-        self.init_ui()
-        self.load_privacy_presets()
-        self.load_auto_clear_settings()
+        # Las pestañas solo usan los ajustes, el historial y el bloqueador: la interfaz
+        # del panel se construye la primera vez que se abre (ensure_ui)
+        self._ui_built = False
+        self.http_cache = None
+        if self.settings.get_setting("auto_clear_enabled"):
+            self.start_auto_clear_timer()
         
         # Configurar actualización periódica de listas de filtros
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_filter_lists)
         self.update_timer.start(24 * 60 * 60 * 1000)  # 24 horas en milisegundos
 
+    def ensure_ui(self):
+        """Construye la interfaz del panel y carga en ella los valores guardados (una vez)"""
+        if self._ui_built:
+            return
+        self._ui_built = True
+        self.init_ui()
+        # Cargar lo guardado no es un cambio: sin settings_changed no se reaplica a las pestañas
+        self.blockSignals(True)
+        try:
+            self.load_privacy_presets()
+            self.load_auto_clear_settings()
+        finally:
+            self.blockSignals(False)
+
     def init_ui(self):
         layout = QVBoxLayout()
         layout.setSpacing(5)
@@ -1122,6 +1980,33 @@ class PrivacyManager(QWidget):
         clear_data_group.setMaximumHeight(50)
         data_layout.addWidget(clear_data_group)
 
+        # Política de la caché HTTP y su tamaño en disco
+        self.http_cache = getattr(self.parent, 'http_cache', None)
+        if self.http_cache is not None:
+            cache_group = QGroupBox("HTTP Cache")
+            cache_layout = QHBoxLayout()
+            cache_layout.setContentsMargins(5, 5, 5, 5)
+            self.cache_mode_combo = QComboBox()
+            self.cache_mode_combo.addItems(["Disk", "Memory", "None"])
+            self.cache_mode_combo.setCurrentIndex(self.http_cache.MODES.index(self.http_cache.mode))
+            self.cache_mode_combo.currentIndexChanged.connect(self.on_cache_policy_changed)
+            cache_layout.addWidget(self.cache_mode_combo)
+            self.cache_size_spin = QSpinBox()
+            self.cache_size_spin.setRange(16, 16384)
+            self.cache_size_spin.setSuffix(" MB")
+            self.cache_size_spin.setValue(self.http_cache.max_mb)
+            self.cache_size_spin.setEnabled(self.http_cache.mode == "disk")
+            self.cache_size_spin.editingFinished.connect(self.on_cache_policy_changed)
+            cache_layout.addWidget(self.cache_size_spin)
+            self.cache_usage_label = QLabel("")
+            cache_layout.addWidget(self.cache_usage_label)
+            cache_layout.addStretch()
+            cache_group.setLayout(cache_layout)
+            cache_group.setMaximumHeight(60)
+            data_layout.addWidget(cache_group)
+            self.http_cache.size_ready.connect(self.on_cache_size_ready)
+            self.http_cache.cleared.connect(self.on_cache_cleared)
+
         # Grupo de opciones de borrado automático
         auto_clear_group = QGroupBox("Auto-Clear Settings")
         auto_clear_layout = QVBoxLayout()
@@ -1312,8 +2197,13 @@ class PrivacyManager(QWidget):
             QMessageBox.critical(self, "Error", f"Error clearing cookies: {str(e)}")
 
     def clear_cache(self):
-        """Borra la caché del navegador"""
+        """Borra la caché del navegador sin bloquear la GUI (el aviso llega con on_cache_cleared)"""
         try:
+            if self.http_cache is not None:
+                self.clear_cache_btn.setEnabled(False)
+                self.cache_usage_label.setText("Clearing...")
+                self.http_cache.clear()
+                return
             profile = QWebEngineProfile.defaultProfile()
             profile.clearHttpCache()
             self.data_cleared.emit("cache")
@@ -1321,6 +2211,34 @@ class PrivacyManager(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error clearing cache: {str(e)}")
 
+    def on_cache_cleared(self, freed):
+        self.clear_cache_btn.setEnabled(True)
+        self.data_cleared.emit("cache")
+        QMessageBox.information(self, "Success",
+                                f"Cache cleared successfully ({freed / (1024 * 1024):.1f} MB freed)")
+
+    def on_cache_size_ready(self, size):
+        limit = f" / {self.http_cache.max_mb} MB" if self.http_cache.mode == "disk" else ""
+        self.cache_usage_label.setText(f"On disk: {size / (1024 * 1024):.1f} MB{limit}")
+
+    def on_cache_policy_changed(self):
+        """Aplica el modo y el tamaño elegidos para la caché HTTP"""
+        try:
+            mode = self.http_cache.MODES[self.cache_mode_combo.currentIndex()]
+            self.cache_size_spin.setEnabled(mode == "disk")
+            if mode != self.http_cache.mode or self.cache_size_spin.value() != self.http_cache.max_mb:
+                self.http_cache.set_policy(mode, self.cache_size_spin.value())
+                self.http_cache.measure()
+        except Exception as e:
+            print(f"Error cambiando la política de caché: {e}")
+
+    def showEvent(self, event):
+        self.ensure_ui()
+        # Medir la caché al abrir el panel (en segundo plano)
+        if self.http_cache is not None:
+            self.http_cache.measure()
+        super().showEvent(event)
+
     def clear_all_data(self):
         """Borra todos los datos de navegación"""
         reply = QMessageBox.question(self, "Confirm Clear All",
@@ -1553,8 +2471,8 @@ class PrivacyManager(QWidget):
                 check.setChecked(bool(value))
                 check.setEnabled(enabled)
             
-            # Iniciar temporizador si está habilitado
-            if enabled:
+            # Iniciar temporizador si está habilitado (sin reiniciar el que ya corre desde el arranque)
+            if enabled and not (hasattr(self, 'auto_clear_timer') and self.auto_clear_timer.isActive()):
                 self.start_auto_clear_timer()
                 
             print("Auto-clear settings loaded")
@@ -0,0 +1,217 @@
+import json
+import os
+import time
+from PySide6.QtCore import QObject, QTimer
+
+
+class SessionJournal(QObject):
+    """Diario de sesión de pestañas: instantánea atómica + registro de eventos solo-anexar.
+
+    Cada apertura, cierre, navegación, reordenación o cambio de pestaña activa se anota
+    como una línea JSON en `journal_path`. Las escrituras se agrupan: como mucho un
+    write+fsync cada FLUSH_INTERVAL ms, y los cambios repetidos de una misma pestaña en
+    ese intervalo se funden en un único evento. Cada COMPACT_EVENTS eventos (o cada
+    COMPACT_INTERVAL ms) el estado completo se escribe en `snapshot_path` con un
+    os.replace atómico y el diario se vacía, así que restaurar nunca reproduce más de
+    unos pocos cientos de eventos.
+
+    Instantánea y diario llevan un número de generación: si la aplicación muere entre
+    reemplazar la instantánea y vaciar el diario, las líneas antiguas se ignoran.
+    """
+
+    FLUSH_INTERVAL = 1000       # ms: como mucho un fsync por segundo
+    COMPACT_EVENTS = 500        # Eventos en el diario antes de compactar
+    COMPACT_INTERVAL = 300000   # ms entre compactaciones aunque haya pocos eventos
+
+    def __init__(self, tab_manager, snapshot_path, journal_path):
+        super().__init__()
+        self.tab_manager = tab_manager
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.generation = 0
+        self._next_id = 1
+        self._pending = []      # Eventos aún no escritos
+        self._dirty = {}        # id de pestaña -> (widget, campos a volver a leer)
+        self._journal_events = 0
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(self.FLUSH_INTERVAL)
+        self.flush_timer.timeout.connect(self.flush)
+        self.compact_timer = QTimer(self)
+        self.compact_timer.setInterval(self.COMPACT_INTERVAL)
+        self.compact_timer.timeout.connect(self._compact_if_needed)
+        self.compact_timer.start()
+
+    # --- Registro de eventos ---
+
+    def tab_id(self, widget):
+        """Identificador estable de la pestaña dentro de la sesión (se asigna la primera vez)"""
+        tab_id = getattr(widget, "session_id", None)
+        if tab_id is None:
+            tab_id = widget.session_id = self._next_id
+            self._next_id += 1
+        return tab_id
+
+    def _record(self, event):
+        event["g"] = self.generation
+        self._pending.append(event)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def tab_opened(self, widget, index):
+        tab_id = self.tab_id(widget)
+        self._record({"op": "open", "id": tab_id, "index": index,
+                      **self.tab_manager.tab_state(widget, ("url", "title"))})
+        self.tab_changed(widget, "history", "icon")
+
+    def tab_closed(self, widget):
+        tab_id = self.tab_id(widget)
+        self._dirty.pop(tab_id, None)
+        self._record({"op": "close", "id": tab_id})
+
+    def tab_moved(self, widget, index):
+        self._record({"op": "move", "id": self.tab_id(widget), "index": index})
+
+    def current_changed(self, widget):
+        self._record({"op": "current", "id": self.tab_id(widget), "last_active": time.time()})
+
+    def tab_changed(self, widget, *fields):
+        """Marca campos de la pestaña para releerlos en la próxima escritura.
+
+        Leer el estado (serializar el historial, el icono) se aplaza hasta flush(): una
+        página que cambia de título o hace scroll veinte veces en un segundo cuesta una
+        sola lectura y un solo evento.
+        """
+        tab_id = self.tab_id(widget)
+        entry = self._dirty.get(tab_id)
+        if entry is None:
+            self._dirty[tab_id] = (widget, set(fields))
+        else:
+            entry[1].update(fields)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        """Escribe los eventos pendientes en el diario con un único write + fsync"""
+        try:
+            for tab_id, (widget, fields) in self._dirty.items():
+                if self.tab_manager.tabs.indexOf(widget) != -1:
+                    self._pending.append({"op": "update", "id": tab_id, "g": self.generation,
+                                          **self.tab_manager.tab_state(widget, fields)})
+            self._dirty.clear()
+            if not self._pending:
+                return
+            data = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in self._pending)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_events += len(self._pending)
+            self._pending = []
+            if self._journal_events >= self.COMPACT_EVENTS:
+                self.compact()
+        except Exception as e:
+            print(f"Error escribiendo el diario de sesión: {e}")
+
+    # --- Instantánea ---
+
+    def _compact_if_needed(self):
+        if self._journal_events or self._pending or self._dirty:
+            self.compact()
+
+    def compact(self):
+        """Escribe el estado completo en la instantánea (reemplazo atómico) y vacía el diario"""
+        try:
+            session = self.tab_manager.session_state()
+            session["generation"] = self.generation + 1
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(session, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            self.generation += 1
+            # Las líneas que queden de la generación anterior se ignorarán al restaurar
+            with open(self.journal_path, "w", encoding="utf-8") as f:
+                os.fsync(f.fileno())
+            self._pending = []
+            self._dirty.clear()
+            self._journal_events = 0
+            self.flush_timer.stop()
+            return True
+        except Exception as e:
+            print(f"Error compactando la sesión: {e}")
+            return False
+
+    # --- Restauración ---
+
+    def load(self):
+        """Lee la instantánea y reproduce el diario encima.
+
+        Devuelve {"tabs": [...], "current": índice} o None si no hay sesión. Una última
+        línea truncada (caída a mitad de escritura) se descarta.
+        """
+        session = None
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    session = json.load(f)
+            except Exception as e:
+                print(f"Error leyendo la instantánea de sesión: {e}")
+        if isinstance(session, list):  # Formato antiguo: solo lista de URLs
+            session = {"tabs": session, "current": len(session) - 1}
+        session = session or {"tabs": [], "current": 0}
+        self.generation = session.get("generation", 0)
+        for event in self._pending:  # Eventos anotados antes de conocer la generación
+            event["g"] = self.generation
+
+        tabs = [tab for tab in session.get("tabs", []) if isinstance(tab, dict)]
+        by_id = {}
+        for tab in tabs:
+            tab["id"] = tab.get("id") or self._next_id
+            self._next_id = max(self._next_id, tab["id"]) + 1
+            by_id[tab["id"]] = tab
+        current = session.get("current", 0)
+        current_id = tabs[current]["id"] if 0 <= current < len(tabs) else None
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        break  # Línea incompleta: lo que sigue no llegó a disco
+                    if event.get("g") != self.generation:
+                        continue
+                    replayed += 1
+                    op, tab_id = event.get("op"), event.get("id")
+                    tab = by_id.get(tab_id)
+                    if op == "current":
+                        current_id = tab_id
+                        if tab is not None:
+                            tab["last_active"] = event.get("last_active", tab.get("last_active", 0.0))
+                    elif op == "open":
+                        tab = by_id[tab_id] = {"id": tab_id}
+                        tab.update((k, v) for k, v in event.items() if k not in ("op", "g", "index"))
+                        tabs.insert(min(max(event.get("index", len(tabs)), 0), len(tabs)), tab)
+                        self._next_id = max(self._next_id, tab_id + 1)
+                    elif tab is None:
+                        continue
+                    elif op == "close":
+                        tabs.remove(by_id.pop(tab_id))
+                    elif op == "move":
+                        tabs.remove(tab)
+                        tabs.insert(min(max(event.get("index", 0), 0), len(tabs)), tab)
+                    elif op == "update":
+                        tab.update((k, v) for k, v in event.items() if k not in ("op", "g", "id"))
+        self._journal_events = replayed
+
+        tabs = [tab for tab in tabs if tab.get("url")]
+        if not tabs:
+            return None
+        current = next((i for i, tab in enumerate(tabs) if tab["id"] == current_id), len(tabs) - 1)
+        if replayed:
+            print(f"Diario de sesión: {replayed} eventos reproducidos.")
+        return {"tabs": tabs, "current": current}
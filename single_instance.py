@@ -0,0 +1,125 @@
+"""Modo de instancia única sobre un socket local (QLocalServer / QLocalSocket).
+
+La primera instancia escucha en server_name(). Las siguientes solo importan QtCore y
+QtNetwork, mandan sus argumentos como una línea JSON y terminan sin crear la
+QApplication ni cargar Qt WebEngine:
+
+    {"cmd": "open", "urls": ["https://...", "file:///..."]}
+    {"cmd": "activate"}
+
+Las rutas locales se resuelven en el proceso que las recibe por línea de órdenes,
+porque el directorio de trabajo de la instancia principal puede ser otro.
+"""
+import getpass
+import hashlib
+import json
+import os
+from pathlib import Path
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+CONNECT_TIMEOUT = 300   # ms esperando a la instancia principal
+MAX_MESSAGE = 64 * 1024
+
+
+def server_name():
+    """Nombre del socket, distinto por usuario (en Unix, un fichero en el directorio temporal)"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = str(os.getuid()) if hasattr(os, "getuid") else "default"
+    return "tron-browser-" + hashlib.sha1(user.encode("utf-8")).hexdigest()[:12]
+
+
+def command_from_args(args):
+    """Convierte los argumentos de la línea de órdenes en el mensaje a reenviar"""
+    urls = []
+    for arg in args:
+        if not arg or arg.startswith("--"):
+            continue    # Opciones del propio navegador (--startup-trace, --new-instance...)
+        if os.path.exists(arg):
+            urls.append(Path(arg).resolve().as_uri())
+        else:
+            urls.append(arg)
+    return {"cmd": "open", "urls": urls} if urls else {"cmd": "activate"}
+
+
+def forward_to_running_instance(args, name=None):
+    """Manda los argumentos a la instancia en marcha; True si la hay y los ha recibido"""
+    socket = QLocalSocket()
+    socket.connectToServer(name or server_name())
+    if not socket.waitForConnected(CONNECT_TIMEOUT):
+        return False
+    data = (json.dumps(command_from_args(args)) + "\n").encode("utf-8")
+    socket.write(data)
+    ok = socket.waitForBytesWritten(CONNECT_TIMEOUT)
+    socket.disconnectFromServer()
+    if socket.state() != QLocalSocket.UnconnectedState:
+        socket.waitForDisconnected(CONNECT_TIMEOUT)
+    return ok
+
+
+class InstanceServer(QObject):
+    """Servidor de la instancia principal: emite command_received(dict) por cada mensaje"""
+
+    command_received = Signal(dict)
+
+    def __init__(self, name=None, parent=None):
+        super().__init__(parent)
+        self.name = name or server_name()
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._buffers = {}
+
+    def listen(self):
+        """Empieza a escuchar; False si ya hay otra instancia atendiendo ese nombre"""
+        # En Unix listen() se quedaría el nombre aunque otra instancia viva lo use: probar antes
+        probe = QLocalSocket()
+        probe.connectToServer(self.name)
+        if probe.waitForConnected(CONNECT_TIMEOUT):
+            probe.disconnectFromServer()
+            return False
+        QLocalServer.removeServer(self.name)  # Socket de una instancia que murió sin cerrarlo
+        if self.server.listen(self.name):
+            return True
+        print(f"Error escuchando en el socket de instancia única: {self.server.errorString()}")
+        return False
+
+    def close(self):
+        self.server.close()
+
+    def _on_new_connection(self):
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            self._buffers[connection] = b""
+            connection.readyRead.connect(lambda c=connection: self._on_ready_read(c))
+            connection.disconnected.connect(lambda c=connection: self._on_disconnected(c))
+            if connection.bytesAvailable():
+                self._on_ready_read(connection)
+
+    def _on_ready_read(self, connection):
+        buffer = self._buffers.get(connection, b"") + bytes(connection.readAll())
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            self._dispatch(line)
+        if len(buffer) > MAX_MESSAGE:
+            print("Mensaje de instancia demasiado grande, conexión cerrada")
+            buffer = b""
+            connection.abort()
+        self._buffers[connection] = buffer
+
+    def _on_disconnected(self, connection):
+        rest = self._buffers.pop(connection, b"")
+        if rest.strip():
+            self._dispatch(rest)
+        connection.deleteLater()
+
+    def _dispatch(self, line):
+        try:
+            command = json.loads(line.decode("utf-8"))
+        except ValueError as e:
+            print(f"Mensaje de instancia no válido: {e}")
+            return
+        if isinstance(command, dict):
+            self.command_received.emit(command)
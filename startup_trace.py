@@ -0,0 +1,197 @@
+"""Traza de arranque en formato Chrome Trace (chrome://tracing, Perfetto).
+
+Se activa con `--startup-trace[=FICHERO]` o con la variable de entorno
+TRON_STARTUP_TRACE=FICHERO (por defecto startup_trace.json). Registra con
+time.perf_counter:
+
+- cada fase de inicialización marcada con `phase()`,
+- cada módulo importado por primera vez (con sus importaciones anidadas),
+- cada línea impresa por stdout durante el arranque (los print de los módulos),
+- el primer pintado de la ventana y el primer loadFinished de la pestaña activa.
+
+La traza se escribe cuando ya hay primer pintado y primer loadFinished (o a los
+TIMEOUT segundos).
+Con `--startup-trace-exit` o TRON_STARTUP_TRACE_EXIT=1 la aplicación se cierra
+después de escribirla, para poder medir arranques en serie (benchmark_startup.py).
+
+Este módulo solo usa la biblioteca estándar: se importa antes que Qt.
+"""
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+DEFAULT_FILE = "startup_trace.json"
+TIMEOUT = 30  # Segundos máximos esperando el primer loadFinished
+FINAL_MARKS = ("first_paint", "first_load_finished")  # La traza termina cuando están todos
+
+_state = None
+
+
+class _TraceState:
+    def __init__(self, path, exit_after, started_at):
+        self.path = path
+        self.exit_after = exit_after
+        self.started_at = started_at
+        self.started_epoch = time.time() - (time.perf_counter() - started_at)
+        self.events = []
+        self.marks = {}
+        self.finished = False
+        self.lock = threading.Lock()
+        self.original_import = builtins.__import__
+        self.original_stdout = sys.stdout
+
+    def ts(self, moment=None):
+        """Microsegundos desde el arranque"""
+        return ((moment if moment is not None else time.perf_counter()) - self.started_at) * 1e6
+
+    def add(self, event):
+        event.setdefault("pid", os.getpid())
+        event.setdefault("tid", threading.get_ident())
+        with self.lock:
+            self.events.append(event)
+
+
+class _TracedStdout:
+    """Reenvía stdout y anota cada línea impresa como evento instantáneo"""
+
+    def __init__(self, state, stream):
+        self._state = state
+        self._stream = stream
+
+    def write(self, text):
+        for line in text.splitlines():
+            if line.strip():
+                self._state.add({"name": "print", "cat": "print", "ph": "i", "s": "t",
+                                 "ts": self._state.ts(), "args": {"text": line[:200]}})
+        return self._stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _traced_import(name, globals=None, locals=None, fromlist=(), level=0):
+    state = _state
+    if state.finished or level or name in sys.modules:
+        return state.original_import(name, globals, locals, fromlist, level)
+    start = time.perf_counter()
+    try:
+        return state.original_import(name, globals, locals, fromlist, level)
+    finally:
+        end = time.perf_counter()
+        state.add({"name": name, "cat": "import", "ph": "X",
+                   "ts": state.ts(start), "dur": (end - start) * 1e6})
+
+
+def _options(argv, environ):
+    """Devuelve (fichero, salir_después) o None si la traza no está pedida"""
+    path = environ.get("TRON_STARTUP_TRACE") or None
+    exit_after = environ.get("TRON_STARTUP_TRACE_EXIT") == "1"
+    for arg in argv[1:]:
+        if arg == "--startup-trace":
+            path = path or DEFAULT_FILE
+        elif arg.startswith("--startup-trace="):
+            path = arg.split("=", 1)[1] or DEFAULT_FILE
+        elif arg == "--startup-trace-exit":
+            exit_after = True
+            path = path or DEFAULT_FILE
+    if path is None:
+        return None
+    if path == "1":
+        path = DEFAULT_FILE
+    return path, exit_after
+
+
+def install(started_at=None, argv=None, environ=None):
+    """Empieza a trazar si se ha pedido; devuelve True si la traza está activa"""
+    global _state
+    options = _options(argv if argv is not None else sys.argv, environ if environ is not None else os.environ)
+    if options is None or _state is not None:
+        return _state is not None
+    _state = _TraceState(options[0], options[1], started_at if started_at is not None else time.perf_counter())
+    _state.add({"name": "process_name", "ph": "M", "args": {"name": "Tron Browser"}})
+    builtins.__import__ = _traced_import
+    sys.stdout = _TracedStdout(_state, sys.stdout)
+    mark("trace_installed")
+    return True
+
+
+def enabled():
+    return _state is not None and not _state.finished
+
+
+def phase(name):
+    """Context manager que mide una fase de inicialización (no hace nada sin traza)"""
+    if not enabled():
+        return nullcontext()
+    return _phase(name)
+
+
+@contextmanager
+def _phase(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if enabled():
+            _state.add({"name": name, "cat": "phase", "ph": "X",
+                        "ts": _state.ts(start), "dur": (time.perf_counter() - start) * 1e6})
+
+
+def mark(name):
+    """Anota un instante del arranque (la primera vez que ocurre)"""
+    if not enabled() or name in _state.marks:
+        return
+    ts = _state.ts()
+    _state.marks[name] = ts / 1000.0
+    _state.add({"name": name, "cat": "mark", "ph": "i", "s": "g", "ts": ts})
+    if all(final in _state.marks for final in FINAL_MARKS):
+        finish()
+
+
+def watch_first_load(tab_widget):
+    """Anota el primer loadFinished de la pestaña activa y pone el límite de TIMEOUT s"""
+    if not enabled():
+        return
+    from PySide6.QtCore import QTimer
+    browser = tab_widget.currentWidget()
+    if browser is not None and hasattr(browser, "loadFinished"):
+        def on_load_finished(ok):
+            browser.loadFinished.disconnect(on_load_finished)
+            mark("first_load_finished")
+        browser.loadFinished.connect(on_load_finished)
+    QTimer.singleShot(TIMEOUT * 1000, finish)
+
+
+def finish():
+    """Deja de trazar y escribe el fichero; con exit_after, cierra la aplicación"""
+    state = _state
+    if state is None or state.finished:
+        return
+    # Marcar como terminada antes de anotar: mark() llamaría otra vez a finish()
+    state.finished = True
+    ts = state.ts()
+    state.marks["trace_finished"] = ts / 1000.0
+    state.add({"name": "trace_finished", "cat": "mark", "ph": "i", "s": "g", "ts": ts})
+    if builtins.__import__ is _traced_import:
+        builtins.__import__ = state.original_import
+    if isinstance(sys.stdout, _TracedStdout):
+        sys.stdout = state.original_stdout
+    try:
+        with open(state.path, "w", encoding="utf-8") as f:
+            json.dump({
+                "traceEvents": state.events,
+                "displayTimeUnit": "ms",
+                "otherData": {"started_epoch": state.started_epoch, "marks_ms": state.marks},
+            }, f)
+        print(f"⏱️ Traza de arranque guardada en {state.path} ({len(state.events)} eventos)")
+    except Exception as e:
+        print(f"Error guardando la traza de arranque: {e}")
+    if state.exit_after:
+        from PySide6.QtWidgets import QApplication
+        app = QApplication.instance()
+        if app is not None:
+            app.quit()
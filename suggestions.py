@@ -0,0 +1,364 @@
+import bisect
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+class _Entry:
+    __slots__ = ("url", "url_key", "title", "visit_count", "last_visit", "bookmarked", "open_tab", "score")
+
+    def __init__(self, url, title="", visit_count=0, last_visit=0.0, bookmarked=False):
+        self.url = url
+        self.url_key = SuggestionIndex._url_key(url)
+        self.title = title or ""
+        self.visit_count = visit_count
+        self.last_visit = last_visit
+        self.bookmarked = bookmarked
+        self.open_tab = False
+        self.score = 0
+
+
+class SuggestionIndex:
+    """Índice en memoria para las sugerencias de la barra de direcciones.
+
+    Mantiene un array ordenado de claves (URL sin esquema ni "www.", sus sufijos de
+    dominio y cada palabra del título) sobre el que se busca por prefijo con bisect, y
+    ordena los candidatos por frecencia (visitas ponderadas por antigüedad, con extra
+    para marcadores y pestañas abiertas). Se actualiza con cada visita y se construye en
+    segundo plano desde el historial, opcionalmente arrancando desde una instantánea.
+    """
+
+    MAX_RESULTS = 8
+    SCAN_LIMIT = 600        # Claves examinadas como máximo en prefijos largos
+    SHORT_PREFIX = 2        # Prefijos de hasta 2 letras: mejores resultados precalculados
+    SNAPSHOT_VERSION = 2    # v2: JSON (la v1 era pickle y no se vuelve a leer)
+
+    # (días de antigüedad, peso) al estilo de la frecencia de Firefox
+    RECENCY_BUCKETS = ((4, 100), (14, 70), (31, 50), (90, 30))
+    OLD_WEIGHT = 10
+
+    _SCHEME_RE = re.compile(r"^[a-z][a-z0-9+.-]*://(www\.)?")
+    _WORD_RE = re.compile(r"\w{2,}")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}       # url -> _Entry
+        self._keys = []          # lista ordenada de (clave, url)
+        self._short_cache = {}   # prefijo corto -> mejores URLs
+        self._open_urls = set()
+        self._touched = set()    # URLs modificadas durante la sesión
+        self.snapshot_path = None
+        self.ready = False
+
+    # --- Claves y puntuación ---
+
+    @classmethod
+    def _url_key(cls, url):
+        return cls._SCHEME_RE.sub("", url.lower())
+
+    @classmethod
+    def _keys_for(cls, entry):
+        keys = {entry.url_key}
+        # Sufijos de dominio: "docs.python.org/3" también se encuentra tecleando "python"
+        host = entry.url_key.split("/", 1)[0]
+        dot = host.find(".")
+        while dot != -1 and host.find(".", dot + 1) != -1:
+            keys.add(entry.url_key[dot + 1:])
+            dot = host.find(".", dot + 1)
+        keys.update(cls._WORD_RE.findall(entry.title.lower()))
+        return keys
+
+    def _short_prefixes(self, keys):
+        return {key[:n] for key in keys for n in range(1, self.SHORT_PREFIX + 1) if len(key) >= n}
+
+    def _rescore(self, entry, now=None):
+        """Recalcula la frecencia guardada en la entrada"""
+        age_days = ((now or time.time()) - entry.last_visit) / 86400
+        weight = self.OLD_WEIGHT
+        for max_days, bucket_weight in self.RECENCY_BUCKETS:
+            if age_days < max_days:
+                weight = bucket_weight
+                break
+        entry.score = (entry.visit_count + (5 if entry.bookmarked else 0)) * weight
+        if entry.open_tab:
+            entry.score += 200
+
+    @staticmethod
+    def _score(entry, prefix):
+        # Coincide el principio de la URL: candidato a autocompletar, puntúa doble
+        return entry.score * 2 if entry.url_key.startswith(prefix) else entry.score
+
+    def _top(self, scores):
+        return sorted(scores, key=scores.get, reverse=True)[:self.MAX_RESULTS]
+
+    def _scan(self, entries, keys, prefix, max_keys=None):
+        """Puntúa las URLs con alguna clave que empiece por `prefix`"""
+        scores = {}
+        i = bisect.bisect_left(keys, (prefix,))
+        end = len(keys) if max_keys is None else min(len(keys), i + max_keys)
+        while i < end:
+            key, url = keys[i]
+            if not key.startswith(prefix):
+                break
+            if url not in scores:
+                entry = entries[url]
+                scores[url] = entry.score * 2 if entry.url_key.startswith(prefix) else entry.score
+            i += 1
+        return scores
+
+    def _build_short_cache(self, entries, keys):
+        """Mejores URLs de cada prefijo corto, en una sola pasada por las claves"""
+        scores = {}
+        for key, url in keys:
+            entry = entries[url]
+            for n in range(1, min(len(key), self.SHORT_PREFIX) + 1):
+                prefix = key[:n]
+                bucket = scores.get(prefix)
+                if bucket is None:
+                    bucket = scores[prefix] = {}
+                if url not in bucket:
+                    bucket[url] = entry.score * 2 if entry.url_key.startswith(prefix) else entry.score
+        return {prefix: self._top(bucket) for prefix, bucket in scores.items()}
+
+    # --- Actualización incremental ---
+
+    def _insert_keys(self, url, keys):
+        for key in keys:
+            bisect.insort(self._keys, (key, url))
+
+    def _remove_keys(self, url, keys):
+        for key in keys:
+            i = bisect.bisect_left(self._keys, (key, url))
+            if i < len(self._keys) and self._keys[i] == (key, url):
+                del self._keys[i]
+        # La URL puede seguir en resultados cacheados a los que ya no corresponde
+        for prefix in self._short_prefixes(keys):
+            self._short_cache.pop(prefix, None)
+
+    def _entry_changed(self, entry):
+        """Recalcula la frecencia y reordena los prefijos cortos afectados por la entrada"""
+        self._touched.add(entry.url)
+        self._rescore(entry)
+        for prefix in self._short_prefixes(self._keys_for(entry)):
+            urls = self._short_cache.get(prefix)
+            if urls is None:
+                continue
+            if entry.url not in urls:
+                urls = urls + [entry.url]
+            self._short_cache[prefix] = self._top(
+                {url: self._score(self._entries[url], prefix) for url in urls})
+
+    def _set_title(self, entry, title):
+        old_keys = self._keys_for(entry)
+        entry.title = title
+        new_keys = self._keys_for(entry)
+        self._remove_keys(entry.url, old_keys - new_keys)
+        self._insert_keys(entry.url, new_keys - old_keys)
+
+    def _new_entry(self, url, title):
+        entry = self._entries[url] = _Entry(url, title)
+        entry.open_tab = url in self._open_urls
+        self._insert_keys(url, self._keys_for(entry))
+        return entry
+
+    def add_visit(self, url, title="", when=None):
+        """Registra una visita (llamado por history.HistoryManager en cada visita nueva)"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                entry = self._new_entry(url, title)
+            elif title and title != entry.title:
+                self._set_title(entry, title)
+            entry.visit_count += 1
+            entry.last_visit = when or time.time()
+            self._entry_changed(entry)
+
+    def set_title(self, url, title):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and title and title != entry.title:
+                self._set_title(entry, title)
+                self._entry_changed(entry)
+
+    def set_bookmarked(self, url, title="", bookmarked=True):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                if not bookmarked:
+                    return
+                entry = self._new_entry(url, title)
+            entry.bookmarked = bookmarked
+            self._entry_changed(entry)
+
+    def set_open_tabs(self, urls):
+        """Marca como pestaña abierta exactamente las URLs dadas"""
+        urls = set(urls)
+        with self._lock:
+            if urls == self._open_urls:
+                return
+            changed = self._open_urls ^ urls
+            self._open_urls = urls
+            for url in changed:
+                entry = self._entries.get(url)
+                if entry is not None:
+                    entry.open_tab = url in urls
+                    self._entry_changed(entry)
+
+    # --- Consulta ---
+
+    def suggest(self, text, limit=MAX_RESULTS):
+        """Devuelve hasta `limit` sugerencias [(url, title)] para lo tecleado.
+
+        La primera palabra se busca por prefijo en el índice; las demás tienen que
+        aparecer en la URL o en el título de cada candidato.
+        """
+        words = text.lower().split()
+        if not words:
+            return []
+        prefix = self._url_key(words[0])
+        extra = words[1:]
+        if not prefix:
+            return []
+        with self._lock:
+            entries = self._entries
+            if len(prefix) <= self.SHORT_PREFIX and not extra:
+                urls = self._short_cache.get(prefix)
+                if urls is None:
+                    urls = self._short_cache[prefix] = self._top(self._scan(entries, self._keys, prefix))
+                return [(url, entries[url].title) for url in urls[:limit]]
+
+            scores = self._scan(entries, self._keys, prefix, self.SCAN_LIMIT)
+            if extra:
+                scores = {url: score for url, score in scores.items()
+                          if all(word in entries[url].url_key or word in entries[url].title.lower()
+                                 for word in extra)}
+            return [(url, entries[url].title) for url in self._top(scores)[:limit]]
+
+    # --- Construcción en segundo plano ---
+
+    def load_in_background(self, history_db, bookmarks_db=None, snapshot_path=None):
+        """Carga la instantánea (si existe) y reconstruye el índice desde el historial en un hilo"""
+        self.snapshot_path = snapshot_path
+        threading.Thread(target=self._load, args=(history_db, bookmarks_db), daemon=True).start()
+
+    def _entries_from_rows(self, rows):
+        """Crea las entradas a partir de filas (url, title, visit_count, last_visit, bookmarked)"""
+        now = time.time()
+        entries = {}
+        for url, title, visit_count, last_visit, bookmarked in rows:
+            entry = entries[url] = _Entry(url, title, visit_count, last_visit, bookmarked)
+            self._rescore(entry, now)
+        return entries
+
+    def _parse_snapshot(self, data):
+        """Valida la instantánea leída del JSON y devuelve (filas, claves, caché de prefijos).
+
+        Lanza ValueError si la versión o la forma no son las esperadas (p. ej. un fichero
+        antiguo o editado a mano): en ese caso se ignora y se reconstruye desde el historial.
+        """
+        if not isinstance(data, dict) or data.get("version") != self.SNAPSHOT_VERSION:
+            raise ValueError("versión de instantánea no compatible")
+        rows, keys, short_cache = data.get("rows"), data.get("keys"), data.get("short_cache")
+        if not isinstance(rows, list) or not isinstance(keys, list) or not isinstance(short_cache, dict):
+            raise ValueError("instantánea con formato no válido")
+        parsed_rows = []
+        for row in rows:
+            if not (isinstance(row, list) and len(row) == 5 and isinstance(row[0], str)
+                    and isinstance(row[1], str) and isinstance(row[2], int)
+                    and isinstance(row[3], (int, float)) and isinstance(row[4], bool)):
+                raise ValueError("fila de instantánea no válida")
+            parsed_rows.append(tuple(row))
+        urls = {row[0] for row in parsed_rows}
+        parsed_keys = []
+        for key in keys:
+            if not (isinstance(key, list) and len(key) == 2 and isinstance(key[0], str) and key[1] in urls):
+                raise ValueError("clave de instantánea no válida")
+            parsed_keys.append((key[0], key[1]))
+        if any(parsed_keys[i] > parsed_keys[i + 1] for i in range(len(parsed_keys) - 1)):
+            raise ValueError("claves de instantánea sin ordenar")
+        for prefix, cached in short_cache.items():
+            if not isinstance(cached, list) or not all(url in urls for url in cached):
+                raise ValueError("caché de prefijos no válida")
+        return parsed_rows, parsed_keys, short_cache
+
+    def _load(self, history_db, bookmarks_db):
+        started = time.perf_counter()
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    rows, keys, short_cache = self._parse_snapshot(json.load(f))
+                self._swap_in(self._entries_from_rows(rows), keys, short_cache)
+                print(f"Sugerencias: instantánea cargada ({len(rows)} URLs) "
+                      f"en {(time.perf_counter() - started) * 1000:.0f} ms")
+            except Exception as e:
+                print(f"Error cargando instantánea de sugerencias: {e}")
+
+        rows = {}
+        try:
+            conn = sqlite3.connect(history_db)
+            for url, title, visit_count, last_visit_time in conn.execute(
+                    "SELECT url, title, visit_count, last_visit_time FROM urls"):
+                rows[url] = (url, title, visit_count or 0, (last_visit_time or 0) / 1000000, False)
+            conn.close()
+        except Exception as e:
+            print(f"Error leyendo historial para sugerencias: {e}")
+            return  # Se mantiene lo cargado de la instantánea
+        if bookmarks_db and os.path.exists(bookmarks_db):
+            try:
+                conn = sqlite3.connect(bookmarks_db)
+                for url, title in conn.execute("SELECT url, title FROM bookmarks"):
+                    _, old_title, visit_count, last_visit, _ = rows.get(url, (url, "", 0, 0, False))
+                    rows[url] = (url, old_title or title, visit_count, last_visit, True)
+                conn.close()
+            except Exception as e:
+                print(f"Error leyendo marcadores para sugerencias: {e}")
+
+        entries = self._entries_from_rows(rows.values())
+        keys = sorted((key, url) for url, entry in entries.items() for key in self._keys_for(entry))
+        self._swap_in(entries, keys, self._build_short_cache(entries, keys))
+        print(f"Sugerencias: índice construido con {len(entries)} URLs "
+              f"en {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def _swap_in(self, entries, keys, short_cache):
+        """Sustituye el índice por uno recién construido, conservando lo registrado en la sesión"""
+        with self._lock:
+            touched = [self._entries[url] for url in self._touched if url in self._entries]
+            self._entries = entries
+            self._keys = keys
+            self._short_cache = short_cache
+            for url in self._open_urls:
+                if url in entries:
+                    entries[url].open_tab = True
+                    self._entry_changed(entries[url])
+            for entry in touched:
+                current = entries.get(entry.url)
+                if current is None:
+                    current = self._new_entry(entry.url, entry.title)
+                elif entry.title and entry.title != current.title:
+                    self._set_title(current, entry.title)
+                current.visit_count = max(current.visit_count, entry.visit_count)
+                current.last_visit = max(current.last_visit, entry.last_visit)
+                current.bookmarked = current.bookmarked or entry.bookmarked
+                self._entry_changed(current)
+            self.ready = True
+
+    def save_snapshot(self):
+        """Guarda el índice en disco para tenerlo disponible al instante en el próximo arranque"""
+        if not self.snapshot_path or not self.ready:
+            return
+        try:
+            with self._lock:
+                rows = [(e.url, e.title, e.visit_count, e.last_visit, e.bookmarked)
+                        for e in self._entries.values()]
+                keys = list(self._keys)
+                short_cache = dict(self._short_cache)
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.SNAPSHOT_VERSION, "rows": rows, "keys": keys,
+                           "short_cache": short_cache}, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"Error guardando instantánea de sugerencias: {e}")
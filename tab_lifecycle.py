@@ -0,0 +1,213 @@
+import time
+import weakref
+from PySide6.QtCore import QObject, QTimer, Signal, QSettings
+from PySide6.QtWebEngineCore import QWebEnginePage
+
+# psutil está en requirements.txt; si falta, no se mide la memoria de los renderers y
+# solo se congela (se avisa una vez en la primera revisión)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class TabLifecycleInfo:
+    """Estado de ciclo de vida y contadores de una pestaña"""
+    __slots__ = ("hidden_since", "freezes", "discards", "reclaimed_bytes")
+
+    def __init__(self):
+        self.hidden_since = None
+        self.freezes = 0
+        self.discards = 0
+        self.reclaimed_bytes = 0
+
+
+class TabLifecycleManager(QObject):
+    """Congela y descarta pestañas en segundo plano según QWebEnginePage.lifecycleState.
+
+    - Una pestaña oculta más de `freeze_after` segundos pasa a Frozen (sin JS ni timers).
+    - Si la memoria total de los renderers supera `memory_budget_mb`, las pestañas
+      congeladas menos usadas pasan a Discarded (se libera el renderer).
+    Nunca se baja de lo que recomienda recommendedState (audio, DevTools, etc.). Una
+    pestaña descartada conserva URL, título e historial y se recarga al activarla.
+    """
+
+    FREEZE_AFTER = 300          # Segundos oculta antes de congelar
+    MEMORY_BUDGET_MB = 1500     # Memoria total de renderers antes de descartar
+    CHECK_INTERVAL = 15000      # ms entre revisiones
+
+    STATE_NAMES = {
+        QWebEnginePage.LifecycleState.Active: "Active",
+        QWebEnginePage.LifecycleState.Frozen: "Frozen",
+        QWebEnginePage.LifecycleState.Discarded: "Discarded",
+    }
+
+    state_changed = Signal(object, str)  # navegador, nuevo estado
+
+    def __init__(self, tab_manager, settings=None):
+        super().__init__()
+        self.tab_manager = tab_manager
+        settings = settings or QSettings("TronBrowser", "Settings")
+        self.freeze_after = int(settings.value("tab_freeze_after", self.FREEZE_AFTER))
+        self.memory_budget_mb = int(settings.value("tab_memory_budget_mb", self.MEMORY_BUDGET_MB))
+        self._info = weakref.WeakKeyDictionary()  # navegador -> TabLifecycleInfo
+        self._current = None
+        self._memory_warning_shown = False
+        self.total_freezes = 0
+        self.total_discards = 0
+        self.total_reclaimed_bytes = 0
+
+        tab_manager.tabs.currentChanged.connect(self._on_current_changed)
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.CHECK_INTERVAL)
+        self.timer.timeout.connect(self.check)
+        self.timer.start()
+
+    def _browsers(self):
+        tabs = self.tab_manager.tabs
+        for i in range(tabs.count()):
+            browser = tabs.widget(i)
+            if hasattr(browser, "page"):  # Los marcadores de sesión aún no tienen navegador
+                yield browser
+
+    def info(self, browser):
+        info = self._info.get(browser)
+        if info is None:
+            info = self._info[browser] = TabLifecycleInfo()
+            if browser is not self.tab_manager.tabs.currentWidget():
+                info.hidden_since = time.time()
+        return info
+
+    def _on_current_changed(self, index):
+        if self._current is not None and self._current() is not None:
+            self.info(self._current()).hidden_since = time.time()
+        browser = self.tab_manager.tabs.widget(index)
+        if not hasattr(browser, "page"):
+            self._current = None
+            return
+        self._current = weakref.ref(browser)
+        self.info(browser).hidden_since = None
+        # Una pestaña descartada se recarga sola al volver a Active, con su URL e historial
+        self._set_state(browser, QWebEnginePage.LifecycleState.Active)
+
+    def _set_state(self, browser, state):
+        page = browser.page()
+        if page.lifecycleState() == state:
+            return
+        page.setLifecycleState(state)
+        self.state_changed.emit(browser, self.STATE_NAMES.get(state, str(state)))
+        self._update_tooltip(browser)
+
+    def _update_tooltip(self, browser):
+        index = self.tab_manager.tabs.indexOf(browser)
+        if index != -1:
+            state = self.STATE_NAMES.get(browser.page().lifecycleState(), "")
+            tooltip = browser.title() or browser.url().toString()
+            if state != "Active":
+                tooltip += f"\n({state})"
+            self.tab_manager.tabs.setTabToolTip(index, tooltip)
+
+    @staticmethod
+    def _allows(page, state):
+        # Los estados van Active < Frozen < Discarded: no bajar de lo recomendado
+        return page.recommendedState().value >= state.value
+
+    def _renderer_memory(self):
+        """Devuelve (bytes totales, {pid: rss}) de los renderers de las pestañas, o None sin psutil"""
+        if psutil is None:
+            if self.memory_budget_mb > 0 and not self._memory_warning_shown:
+                self._memory_warning_shown = True
+                print(f"⚠️ Presupuesto de memoria de pestañas ({self.memory_budget_mb} MB) sin efecto: "
+                      "falta psutil para medir los renderers (pip install psutil)")
+            return None
+        usage = {}
+        for browser in self._browsers():
+            pid = browser.page().renderProcessPid()
+            if pid and pid not in usage:
+                try:
+                    usage[pid] = psutil.Process(pid).memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    usage[pid] = 0
+        return sum(usage.values()), usage
+
+    def check(self):
+        """Congela las pestañas ocultas hace tiempo y descarta si se supera el presupuesto"""
+        try:
+            now = time.time()
+            for browser in self._browsers():
+                info = self.info(browser)
+                page = browser.page()
+                if (info.hidden_since is not None and now - info.hidden_since >= self.freeze_after
+                        and page.lifecycleState() == QWebEnginePage.LifecycleState.Active
+                        and self._allows(page, QWebEnginePage.LifecycleState.Frozen)):
+                    self._set_state(browser, QWebEnginePage.LifecycleState.Frozen)
+                    info.freezes += 1
+                    self.total_freezes += 1
+            self._enforce_memory_budget()
+        except Exception as e:
+            print(f"Error revisando el ciclo de vida de las pestañas: {e}")
+
+    def _enforce_memory_budget(self):
+        memory = self._renderer_memory()
+        if memory is None:
+            return
+        total, usage = memory
+        budget = self.memory_budget_mb * 1024 * 1024
+        if total <= budget:
+            return
+
+        # Cuántas pestañas comparten cada renderer, para repartir lo que se libera
+        sharing = {}
+        for browser in self._browsers():
+            pid = browser.page().renderProcessPid()
+            sharing[pid] = sharing.get(pid, 0) + 1
+
+        frozen = [browser for browser in self._browsers()
+                  if browser.page().lifecycleState() == QWebEnginePage.LifecycleState.Frozen
+                  and self._allows(browser.page(), QWebEnginePage.LifecycleState.Discarded)]
+        frozen.sort(key=lambda browser: getattr(browser, "last_active", 0.0))
+        for browser in frozen:
+            if total <= budget:
+                break
+            pid = browser.page().renderProcessPid()
+            reclaimed = usage.get(pid, 0) // max(sharing.get(pid, 1), 1)
+            self._set_state(browser, QWebEnginePage.LifecycleState.Discarded)
+            info = self.info(browser)
+            info.discards += 1
+            info.reclaimed_bytes += reclaimed
+            self.total_discards += 1
+            self.total_reclaimed_bytes += reclaimed
+            total -= reclaimed
+            print(f"💤 Pestaña descartada ({reclaimed // (1024 * 1024)} MB): {browser.url().toString()[:60]}")
+
+    def tab_states(self):
+        """Estado de ciclo de vida y contadores de cada pestaña, en el orden de las pestañas"""
+        states = []
+        tabs = self.tab_manager.tabs
+        now = time.time()
+        for i in range(tabs.count()):
+            browser = tabs.widget(i)
+            entry = {"index": i, "url": browser.url().toString(), "title": browser.title()}
+            if hasattr(browser, "page"):
+                info = self.info(browser)
+                entry.update(
+                    state=self.STATE_NAMES.get(browser.page().lifecycleState(), ""),
+                    hidden_for=now - info.hidden_since if info.hidden_since is not None else 0.0,
+                    freezes=info.freezes,
+                    discards=info.discards,
+                    reclaimed_bytes=info.reclaimed_bytes,
+                )
+            else:
+                entry.update(state="Unloaded", hidden_for=0.0, freezes=0, discards=0, reclaimed_bytes=0)
+            states.append(entry)
+        return states
+
+    def stats(self):
+        """Totales de la sesión: congelaciones, descartes y memoria recuperada (estimada)"""
+        memory = self._renderer_memory()
+        return {
+            "freezes": self.total_freezes,
+            "discards": self.total_discards,
+            "reclaimed_bytes": self.total_reclaimed_bytes,
+            "renderer_bytes": memory[0] if memory else None,
+        }
@@ -1,91 +1,89 @@
-import json
-import os
-from PySide6.QtWidgets import QTabWidget, QMenu
+import base64
+import time
+from collections import deque
+from PySide6.QtWidgets import QTabWidget, QMenu, QWidget
 from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import QUrl, Qt, QSettings
-from PySide6.QtGui import QIcon
+from PySide6.QtCore import QUrl, Qt, QSettings, QTimer, QBuffer, QByteArray, QIODevice, QDataStream
+from PySide6.QtGui import QIcon, QPixmap, QShortcut, QKeySequence
 from PySide6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage
+from tab_lifecycle import TabLifecycleManager
+from session_journal import SessionJournal
+
+
+class TabPlaceholder(QWidget):
+    """Pestaña restaurada que aún no tiene navegador: URL, título, icono, historial y scroll.
+
+    Expone url() y title() como QWebEngineView para que quien recorra las pestañas no
+    tenga que distinguirlas. El navegador real se crea al activarla (o al precargarla).
+    """
+
+    def __init__(self, url, title="", icon=None, last_active=0.0, history="", scroll=None):
+        super().__init__()
+        self._url = QUrl(url)
+        self._title = title or ""
+        self.icon = icon or QIcon()
+        self.last_active = last_active
+        self.history = history or ""  # QWebEngineHistory serializado, en base64
+        self.scroll = scroll
+
+    def url(self):
+        return self._url
+
+    def title(self):
+        return self._title
+
 
 class TabManager:
     SESSION_FILE = "tab_session.json"
+    JOURNAL_FILE = "tab_session.journal"
+    PRELOAD_COUNT = 3          # Pestañas restauradas más recientes que se cargan en segundo plano
+    PRELOAD_INTERVAL = 1500    # ms entre precargas, para no lanzar varios renderers a la vez
+    RECENTLY_CLOSED_MAX = 10   # Pestañas cerradas que se pueden reabrir
 
     def __init__(self, history_manager, parent):
         self.history_manager = history_manager
         self.parent = parent
+        self._preload_queue = []
+        self._preload_timer = QTimer()
+        self._preload_timer.setSingleShot(True)
+        self._preload_timer.setInterval(self.PRELOAD_INTERVAL)
+        self._preload_timer.timeout.connect(self._preload_next)
+        # Pestañas cerradas: solo su estado de navegación serializado, sin navegador vivo
+        self.recently_closed = deque(maxlen=self.RECENTLY_CLOSED_MAX)
         self.tabs = QTabWidget()
         self.tabs.setDocumentMode(True)  # Pestañas planas estilo 2016
         self.tabs.setTabsClosable(True)
+        self.tabs.setMovable(True)
         self.tabs.tabCloseRequested.connect(self.close_tab)
         self.tabs.currentChanged.connect(self.on_tab_changed)
+        self.tabs.tabBar().tabMoved.connect(self._on_tab_moved)
+        
+        # Diario de sesión: cada cambio de pestañas se anota y sobrevive a una caída
+        self.journal = SessionJournal(self, self.SESSION_FILE, self.JOURNAL_FILE)
         
         # Configurar menú contextual de pestañas
         self.tabs.tabBar().setContextMenuPolicy(Qt.CustomContextMenu)
         self.tabs.tabBar().customContextMenuRequested.connect(self._tab_context_menu)
         
+        # Congelar/descartar pestañas en segundo plano (después de on_tab_changed en currentChanged)
+        self.lifecycle = TabLifecycleManager(self)
+        
+        if isinstance(parent, QWidget):
+            QShortcut(QKeySequence("Ctrl+Shift+T"), parent, self.reopen_closed_tab)
+        
         self.add_new_tab()
 
-    def _inject_dark_scrollbar_css(self, browser):
-        """Inyecta CSS de scrollbar oscuro si el tema es dark"""
-        try:
-            theme = "light"
-            if hasattr(self.parent, 'settings'):
-                theme = self.parent.settings.value("theme", "light")
-            if theme == "dark":
-                css = """
-                ::-webkit-scrollbar { width: 12px; background: #23272f; }
-                ::-webkit-scrollbar-thumb { background: #5a5f6a; border-radius: 6px; }
-                ::-webkit-scrollbar-thumb:hover { background: #6c7a89; }
-                """
-                js = f"""
-                (function() {{
-                    var style = document.getElementById('tron-scrollbar-style');
-                    if (!style) {{
-                        style = document.createElement('style');
-                        style.id = 'tron-scrollbar-style';
-                        style.innerHTML = `{css}`;
-                        document.head.appendChild(style);
-                    }}
-                }})();
-                """
-                browser.page().runJavaScript(js)
-        except Exception as e:
-            print(f"Error inyectando CSS de scrollbar oscuro: {e}")
-
     def add_new_tab(self, url="https://duckduckgo.com"):
         """Crea una nueva pestaña y la devuelve"""
         try:
             if not isinstance(url, str) or not url.strip():
                 url = "https://duckduckgo.com"
 
-            # Crear el navegador
-            browser = QWebEngineView()
-            browser.setUrl(QUrl(url))
-            
-            # Configurar el perfil
-            profile = browser.page().profile()
-            profile.setPersistentCookiesPolicy(QWebEngineProfile.AllowPersistentCookies)
-            profile.setHttpCacheType(QWebEngineProfile.MemoryHttpCache)
-            
-            # Conectar señales
-            browser.urlChanged.connect(self.on_url_changed)
-            browser.urlChanged.connect(self.history_manager.record_history)
-            browser.titleChanged.connect(lambda title: self.update_tab_title(title, browser))
-            browser.iconChanged.connect(lambda icon: self.update_tab_icon(icon, browser))
-            
-            # Configurar menú contextual
-            browser.setContextMenuPolicy(Qt.CustomContextMenu)
-            browser.customContextMenuRequested.connect(lambda pos: self.show_context_menu(pos, browser))
-
-            # Configurar descargas
-            if hasattr(self.parent, 'navigation_manager'):
-                self.parent.navigation_manager.setup_downloads(browser)
-
-            # Configurar gestor de contraseñas
-            if hasattr(self.parent, 'password_manager'):
-                self.parent.password_manager.setup_browser(browser)
+            browser = self._create_browser(url)
 
             # Añadir la pestaña
             index = self.tabs.addTab(browser, "New Tab")
+            self.journal.tab_opened(browser, index)
             self.tabs.setCurrentIndex(index)
             
             # Actualizar la barra de URL si está disponible
@@ -95,13 +93,128 @@ class TabManager:
             # TODO V2: Aplicar profile del grupo aquí si la pestaña va a un grupo específico
                 
             print(f"Pestaña creada exitosamente con URL: {url}")
-            # Inyectar CSS de scrollbar oscuro si aplica
-            self._inject_dark_scrollbar_css(browser)
             return browser
         except Exception as e:
             print(f"Error al crear una nueva pestaña: {str(e)}")
             return None
 
+    def add_background_tab(self, url, title=""):
+        """Añade una pestaña sin activarla ni crear su navegador (se carga al activarla) y devuelve su índice"""
+        placeholder = TabPlaceholder(url, title)
+        label = title or url
+        index = self.tabs.addTab(placeholder, label[:27] + "..." if len(label) > 30 else label)
+        self.journal.tab_opened(placeholder, index)
+        return index
+
+    @staticmethod
+    def is_placeholder(widget):
+        return isinstance(widget, TabPlaceholder)
+
+    def _create_browser(self, url, history=None, scroll=None):
+        """Crea el navegador de una pestaña, con sus señales conectadas, y empieza a cargar `url`.
+
+        Con `history` (bytes de un QWebEngineHistory serializado) se restaura el historial
+        atrás/adelante y se carga su entrada actual en lugar de `url`; `scroll` ([x, y])
+        se aplica al terminar la primera carga.
+        """
+        # Crear el navegador
+        browser = QWebEngineView()
+        browser.last_active = time.time()
+        if not history or not self._load_history(browser, history):
+            browser.setUrl(QUrl(url))
+        
+        # Configurar el perfil
+        profile = browser.page().profile()
+        profile.setPersistentCookiesPolicy(QWebEngineProfile.AllowPersistentCookies)
+        if hasattr(self.parent, 'http_cache'):
+            self.parent.http_cache.apply(profile)  # Una sola vez por perfil
+        if hasattr(self.parent, 'page_theme'):
+            self.parent.page_theme.apply(profile)
+        
+        # Conectar señales
+        browser.urlChanged.connect(self.on_url_changed)
+        browser.urlChanged.connect(self.history_manager.record_history)
+        browser.titleChanged.connect(lambda title: self.update_tab_title(title, browser))
+        browser.titleChanged.connect(lambda title: self.history_manager.record_title(browser.url(), title))
+        browser.iconChanged.connect(lambda icon: self.update_tab_icon(icon, browser))
+        
+        # Anotar en el diario de sesión (se agrupa y se escribe como mucho una vez por segundo)
+        browser.urlChanged.connect(lambda url: self.journal.tab_changed(browser, "url", "history"))
+        browser.titleChanged.connect(lambda title: self.journal.tab_changed(browser, "title", "history"))
+        browser.iconChanged.connect(lambda icon: self.journal.tab_changed(browser, "icon"))
+        browser.page().scrollPositionChanged.connect(lambda pos: self.journal.tab_changed(browser, "scroll"))
+
+        # Instantáneas de HTML para el scraping: se invalidan en cada carga y se piden bajo demanda
+        if hasattr(self.parent, 'page_snapshots'):
+            self.parent.page_snapshots.track(browser)
+            browser.loadFinished.connect(lambda ok: self._on_load_finished(browser))
+        if scroll:
+            self._restore_scroll(browser, scroll)
+        
+        # Configurar menú contextual
+        browser.setContextMenuPolicy(Qt.CustomContextMenu)
+        browser.customContextMenuRequested.connect(lambda pos: self.show_context_menu(pos, browser))
+
+        # Configurar descargas
+        if hasattr(self.parent, 'navigation_manager'):
+            self.parent.navigation_manager.setup_downloads(browser)
+
+        # Configurar gestor de contraseñas
+        if hasattr(self.parent, 'password_pages'):
+            self.parent.password_pages.setup_browser(browser)
+
+        return browser
+
+    def _on_load_finished(self, browser):
+        if browser is self.tabs.currentWidget() and hasattr(self.parent, 'sync_scraping_snapshot'):
+            self.parent.sync_scraping_snapshot(browser)
+
+    @staticmethod
+    def _restore_scroll(browser, scroll):
+        """Vuelve a la posición de scroll guardada si la página no la recuperó por sí sola"""
+        def restore(ok):
+            browser.loadFinished.disconnect(restore)
+            if ok and browser.page().scrollPosition().isNull():
+                browser.page().runJavaScript(f"window.scrollTo({int(scroll[0])}, {int(scroll[1])});")
+        browser.loadFinished.connect(restore)
+
+    def _materialize(self, index):
+        """Sustituye el marcador de la pestaña `index` por un navegador real y lo devuelve"""
+        placeholder = self.tabs.widget(index)
+        if not isinstance(placeholder, TabPlaceholder):
+            return placeholder
+        if placeholder in self._preload_queue:
+            self._preload_queue.remove(placeholder)
+        history = base64.b64decode(placeholder.history) if placeholder.history else None
+        browser = self._create_browser(placeholder.url().toString(), history, placeholder.scroll)
+        browser.session_id = self.journal.tab_id(placeholder)
+        if hasattr(self.parent, 'privacy_manager'):
+            self.parent.privacy_manager.apply_privacy_settings(browser)
+
+        # Cambiar el widget sin emitir currentChanged: quien llama decide qué pestaña queda activa
+        current = self.tabs.currentWidget()
+        text = self.tabs.tabText(index)
+        self.tabs.blockSignals(True)
+        try:
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, browser, placeholder.icon, text)
+            self.tabs.setCurrentWidget(browser if current is placeholder else current)
+        finally:
+            self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+        return browser
+
+    def _preload_next(self):
+        """Carga en segundo plano la siguiente pestaña restaurada de la cola"""
+        while self._preload_queue:
+            placeholder = self._preload_queue.pop(0)
+            index = self.tabs.indexOf(placeholder)
+            if index != -1:
+                self._materialize(index)
+                break
+        if self._preload_queue:
+            self._preload_timer.start()
+
     def update_tab_icon(self, icon, browser):
         try:
             index = self.tabs.indexOf(browser)
@@ -129,10 +242,87 @@ class TabManager:
         except Exception as e:
             print(f"Error al actualizar el título de la pestaña: {str(e)}")
 
+    @staticmethod
+    def _save_history(browser):
+        """Serializa el historial atrás/adelante de la pestaña (QWebEngineHistory)"""
+        data = QByteArray()
+        stream = QDataStream(data, QIODevice.WriteOnly)
+        stream << browser.history()
+        return bytes(data)
+
+    @staticmethod
+    def _load_history(browser, history):
+        try:
+            stream = QDataStream(QByteArray(history), QIODevice.ReadOnly)
+            stream >> browser.history()
+            return browser.history().count() > 0
+        except Exception as e:
+            print(f"Error restaurando el historial de la pestaña: {e}")
+            return False
+
+    def _remember_closed(self, index, widget):
+        """Guarda lo necesario para reabrir la pestaña: URL, título, icono e historial"""
+        entry = {
+            "index": index,
+            "url": widget.url().toString(),
+            "title": widget.title() or self.tabs.tabText(index),
+            "icon": self.tabs.tabIcon(index),
+            "history": None,
+        }
+        if not isinstance(widget, TabPlaceholder):
+            try:
+                entry["history"] = self._save_history(widget)
+            except Exception as e:
+                print(f"Error guardando el historial de la pestaña: {e}")
+        self.recently_closed.append(entry)
+
+    def _teardown(self, widget):
+        """Destruye el navegador de una pestaña cerrada para liberar su página y su renderer"""
+        if isinstance(widget, TabPlaceholder):
+            if widget in self._preload_queue:
+                self._preload_queue.remove(widget)
+            widget.deleteLater()
+            return
+        if hasattr(self.parent, 'password_pages'):
+            self.parent.password_pages.release_browser(widget)
+        for signal in (widget.urlChanged, widget.titleChanged, widget.iconChanged,
+                       widget.customContextMenuRequested):
+            try:
+                signal.disconnect()
+            except (RuntimeError, TypeError):
+                pass  # Sin conexiones
+        page = widget.page()
+        page.triggerAction(QWebEnginePage.Stop)
+        page.deleteLater()
+        widget.deleteLater()
+
+    def reopen_closed_tab(self):
+        """Reabre la última pestaña cerrada, con su historial atrás/adelante"""
+        if not self.recently_closed:
+            return None
+        entry = self.recently_closed.pop()
+        try:
+            browser = self._create_browser(entry["url"], entry["history"])
+            if hasattr(self.parent, 'privacy_manager'):
+                self.parent.privacy_manager.apply_privacy_settings(browser)
+            index = min(entry["index"], self.tabs.count())
+            self.tabs.insertTab(index, browser, entry["icon"], entry["title"][:30] or "New Tab")
+            self.journal.tab_opened(browser, index)
+            self.tabs.setCurrentIndex(index)
+            return browser
+        except Exception as e:
+            print(f"Error al reabrir la pestaña: {e}")
+            return None
+
     def close_tab(self, index):
         try:
             if self.tabs.count() > 1:
+                widget = self.tabs.widget(index)
+                self._remember_closed(index, widget)
+                self.journal.tab_closed(widget)
                 self.tabs.removeTab(index)
+                self._teardown(widget)
+                self._sync_open_tabs()
                 current_browser = self.tabs.currentWidget()
                 if current_browser:
                     self.update_tab_title(current_browser.page().title(), current_browser)
@@ -181,67 +371,141 @@ class TabManager:
             # Actualizar la barra de URL si está disponible
             if hasattr(self.parent, 'url_bar'):
                 self.parent.url_bar.setText(url.toString())
-            if hasattr(self.parent, 'tabs'):
-                browser = self.tabs.currentWidget()
-                if browser:
-                    self._inject_dark_scrollbar_css(browser)
+            self._sync_open_tabs()
         except Exception as e:
             print(f"Error al actualizar la URL: {str(e)}")
 
+    def _sync_open_tabs(self):
+        """Informa al índice de sugerencias de las URLs abiertas en pestañas"""
+        suggestion_index = getattr(self.parent, 'suggestion_index', None)
+        if suggestion_index is not None:
+            suggestion_index.set_open_tabs(
+                self.tabs.widget(i).url().toString().split("#", 1)[0] for i in range(self.tabs.count()))
+
     def on_tab_changed(self, index):
         try:
             current_browser = self.tabs.widget(index)
+            if isinstance(current_browser, TabPlaceholder):
+                # Primera activación de una pestaña restaurada: ahora sí se crea el navegador
+                current_browser = self._materialize(index)
             if current_browser:
+                current_browser.last_active = time.time()
+                self.journal.current_changed(current_browser)
                 if hasattr(self.parent, 'devtools_dock'):
                     self.parent.devtools_dock.set_browser(current_browser)
                 if hasattr(self.parent, 'url_bar'):
                     self.parent.url_bar.setText(current_browser.url().toString())
-                self.update_tab_title(current_browser.page().title(), current_browser)
+                # Sin título todavía (p. ej. recién restaurada): conservar el de la pestaña
+                self.update_tab_title(current_browser.page().title() or self.tabs.tabText(index), current_browser)
                 
-                # Sincronizar con el módulo de scraping si está disponible
-                if hasattr(self.parent, 'scraping_integration') and self.parent.scraping_integration:
-                    current_url = current_browser.url().toString()
-                    # Actualizar el widget del navegador en el scraping integration
-                    self.parent.scraping_integration.browser_widget = current_browser
-                    
-                    # Actualizar browser_tab en el panel de scraping
-                    if hasattr(self.parent, 'scraping_panel') and self.parent.scraping_panel:
-                        self.parent.scraping_panel.browser_tab = current_browser
-                    
-                    # Obtener el HTML de la página actual
-                    current_browser.page().toHtml(
-                        lambda html_content: self.parent.scraping_integration.update_content(html_content, current_url)
-                    )
+                # Sincronizar con el módulo de scraping (el HTML solo se serializa con el panel abierto)
+                if hasattr(self.parent, 'sync_scraping_snapshot'):
+                    self.parent.sync_scraping_snapshot(current_browser)
         except Exception as e:
             print(f"Error al cambiar de pestaña: {str(e)}")
 
-    def guardar_sesion(self):
-        """Guarda la sesión actual de pestañas (URL) en un archivo JSON"""
-        session = []
+    @staticmethod
+    def _icon_to_text(icon):
+        """Serializa el favicon como PNG 16x16 en base64 (vacío si no hay icono)"""
+        if icon.isNull():
+            return ""
+        buffer = QBuffer()
+        buffer.open(QIODevice.WriteOnly)
+        icon.pixmap(16, 16).save(buffer, "PNG")
+        return base64.b64encode(bytes(buffer.data())).decode("ascii")
+
+    @staticmethod
+    def _icon_from_text(text):
+        if not text:
+            return QIcon()
+        pixmap = QPixmap()
+        pixmap.loadFromData(QByteArray(base64.b64decode(text)), "PNG")
+        return QIcon(pixmap)
+
+    def tab_state(self, widget, fields=("url", "title", "icon", "last_active", "history", "scroll")):
+        """Estado guardable de una pestaña (solo los campos pedidos), navegador o marcador"""
+        index = self.tabs.indexOf(widget)
+        state = {}
+        for field in fields:
+            if field == "url":
+                state["url"] = widget.url().toString()
+            elif field == "title":
+                state["title"] = widget.title() or (self.tabs.tabText(index) if index != -1 else "")
+            elif field == "icon":
+                state["icon"] = self._icon_to_text(self.tabs.tabIcon(index)) if index != -1 else ""
+            elif field == "last_active":
+                state["last_active"] = getattr(widget, "last_active", 0.0)
+            elif isinstance(widget, TabPlaceholder):
+                state[field] = widget.history if field == "history" else widget.scroll
+            elif field == "history":
+                try:
+                    state["history"] = base64.b64encode(self._save_history(widget)).decode("ascii")
+                except Exception as e:
+                    print(f"Error guardando el historial de la pestaña: {e}")
+            elif field == "scroll":
+                pos = widget.page().scrollPosition()
+                state["scroll"] = [round(pos.x()), round(pos.y())]
+        return state
+
+    def session_state(self):
+        """Estado completo de la sesión, en el formato de SESSION_FILE"""
+        tabs = []
         for i in range(self.tabs.count()):
-            browser = self.tabs.widget(i)
-            url = browser.url().toString()
-            session.append({"url": url})
-        try:
-            with open(self.SESSION_FILE, "w", encoding="utf-8") as f:
-                json.dump(session, f, ensure_ascii=False, indent=2)
-            print(f"Sesión guardada con {len(session)} pestañas.")
-        except Exception as e:
-            print(f"Error al guardar la sesión: {e}")
+            widget = self.tabs.widget(i)
+            tabs.append({"id": self.journal.tab_id(widget), **self.tab_state(widget)})
+        return {"tabs": tabs, "current": self.tabs.currentIndex()}
+
+    def _on_tab_moved(self, from_index, to_index):
+        self.journal.tab_moved(self.tabs.widget(to_index), to_index)
+
+    def guardar_sesion(self):
+        """Guarda la sesión completa (instantánea atómica) y vacía el diario"""
+        if self.journal.compact():
+            print(f"Sesión guardada con {self.tabs.count()} pestañas.")
 
     def restaurar_sesion(self):
-        """Restaura la sesión de pestañas desde el archivo JSON"""
-        if not os.path.exists(self.SESSION_FILE):
-            print("No hay sesión guardada para restaurar.")
-            return
+        """Restaura la sesión de pestañas: instantánea más los eventos del diario.
+
+        Las pestañas vuelven como marcadores ligeros (sin navegador ni renderer): solo se
+        carga la activa y, poco a poco, las PRELOAD_COUNT usadas más recientemente.
+        """
         try:
-            with open(self.SESSION_FILE, "r", encoding="utf-8") as f:
-                session = json.load(f)
-            while self.tabs.count() > 0:
-                self.close_tab(0)
-            for tab in session:
-                self.add_new_tab(tab.get("url", "https://duckduckgo.com"))
-            print(f"Sesión restaurada con {len(session)} pestañas.")
+            session = self.journal.load()
+            if session is None:
+                print("No hay sesión guardada para restaurar.")
+                return
+            tabs = session["tabs"]
+
+            previous = [self.tabs.widget(i) for i in range(self.tabs.count())]
+            self.tabs.blockSignals(True)
+            try:
+                for tab in tabs:
+                    placeholder = TabPlaceholder(tab["url"], tab.get("title", ""),
+                                                 self._icon_from_text(tab.get("icon", "")),
+                                                 tab.get("last_active", 0.0),
+                                                 tab.get("history", ""), tab.get("scroll"))
+                    placeholder.session_id = tab["id"]
+                    title = placeholder.title() or tab["url"]
+                    self.tabs.addTab(placeholder, placeholder.icon, title[:27] + "..." if len(title) > 30 else title)
+                for widget in previous:
+                    self.tabs.removeTab(self.tabs.indexOf(widget))
+                    widget.deleteLater()
+            finally:
+                self.tabs.blockSignals(False)
+
+            current = session["current"]
+            self.tabs.setCurrentIndex(current)
+            self.on_tab_changed(current)
+            # Empezar una generación nueva: el diario reproducido ya está en la instantánea
+            self.journal.compact()
+
+            placeholders = [self.tabs.widget(i) for i in range(self.tabs.count())
+                            if isinstance(self.tabs.widget(i), TabPlaceholder)]
+            placeholders.sort(key=lambda tab: tab.last_active, reverse=True)
+            self._preload_queue = placeholders[:self.PRELOAD_COUNT]
+            if self._preload_queue:
+                self._preload_timer.start()
+            print(f"Sesión restaurada con {len(tabs)} pestañas.")
         except Exception as e:
             print(f"Error al restaurar la sesión: {e}")
 
@@ -277,6 +541,8 @@ class TabManager:
         # Acciones básicas
         close_action = menu.addAction("Cerrar pestaña")
         close_others_action = menu.addAction("Cerrar otras pestañas")
+        reopen_action = menu.addAction("Reabrir pestaña cerrada")
+        reopen_action.setEnabled(bool(self.recently_closed))
 
         # Ejecutar menú
         action = menu.exec(self.tabs.tabBar().mapToGlobal(pos))
@@ -285,3 +551,5 @@ class TabManager:
             self.close_tab(index)
         elif action == close_others_action:
             self.close_other_tabs(index)
+        elif action == reopen_action:
+            self.reopen_closed_tab()
@@ -1,14 +1,19 @@
 from PySide6.QtWidgets import (QMainWindow, QToolBar, QPushButton, QLineEdit, 
                               QDockWidget, QMenu, QMessageBox, QWidget, QVBoxLayout,
                               QSplitter, QFrame, QCheckBox, QTabWidget, QTextEdit,
-                              QHBoxLayout, QLabel, QSpinBox, QComboBox, QStackedWidget)
-from PySide6.QtCore import Qt, QUrl, QSettings, QSize
+                              QHBoxLayout, QLabel, QSpinBox, QComboBox, QStackedWidget,
+                              QCompleter)
+from PySide6.QtCore import Qt, QUrl, QSettings, QSize, QTimer
 from PySide6.QtWebEngineCore import QWebEnginePage, QWebEngineProfile
-from PySide6.QtGui import QIcon, QPalette, QColor, QAction, QCursor
+from PySide6.QtGui import QIcon, QPalette, QColor, QAction, QCursor, QStandardItemModel, QStandardItem
 from PySide6.QtWebEngineWidgets import QWebEngineView
 from tabs import TabManager
 from navigation import NavigationManager
 from history import HistoryManager
+from suggestions import SuggestionIndex
+from http_cache import HttpCachePolicy
+from page_theme import PageTheme
+from page_snapshots import PageSnapshotCache
 from devtools import DevToolsDock
 from privacy import PrivacyManager
 from favorites_bar import FavoritesBar
@@ -16,48 +21,35 @@ import socket
 import sqlite3
 import os
 import subprocess
-from contextlib import closing
+from bookmark_store import BookmarkStore
 from maintag import BookmarkManager
-from password_manager import PasswordManager
+from password_manager import PasswordManager, PasswordPageBridge
+import startup_trace
 import urllib.parse
+import importlib.util
 import json
 import time
+from collections import deque
 
-# Importar el módulo de integración de scraping
-try:
-    from scraping_integration import scraping_integration
-    from scraping_panel import ScrapingPanel
-    SCRAPING_AVAILABLE = True
-    print("✅ Módulos de scraping cargados correctamente")
-except ImportError as e:
-    SCRAPING_AVAILABLE = False
-    print(f"Advertencia: Módulo de scraping no disponible - {e}")
-
-# Importar el módulo de gestión de proxies
-try:
-    from proxy_panel import ProxyPanel
-    PROXY_AVAILABLE = True
-    print("✅ Módulo de gestión de proxies cargado correctamente")
-except ImportError as e:
-    PROXY_AVAILABLE = False
-    print(f"Advertencia: Módulo de gestión de proxies no disponible - {e}")
-
-# Importar el módulo de chat con IA
-try:
-    from chat_panel_safe import ChatPanelSafe as ChatPanel
-    CHAT_AVAILABLE = True
-    print("✅ Módulo de chat con IA cargado correctamente")
-except ImportError as e:
-    CHAT_AVAILABLE = False
-    print(f"Advertencia: Módulo de chat con IA no disponible - {e}")
+# Los paneles de scraping, proxies y chat (pandas, bs4, aiohttp, schedule, requests...) no
+# se importan al arrancar: aquí solo se comprueba que sus módulos existan. Se importan y
+# construyen al abrirlos por primera vez; si entonces falla una dependencia, el panel se
+# marca como no disponible.
+SCRAPING_AVAILABLE = all(importlib.util.find_spec(m) for m in ("scraping_integration", "scraping_panel"))
+PROXY_AVAILABLE = importlib.util.find_spec("proxy_panel") is not None
+CHAT_AVAILABLE = importlib.util.find_spec("chat_panel_safe") is not None
 
 class MainWindow(QMainWindow):
     # Constantes de UI
     BTN_BOX = 32  # caja del botón
     ICON_18 = QSize(18, 18)
     
-    def __init__(self):
+    def __init__(self, started_at=None):
         super().__init__()
+        # Instante de arranque (time.perf_counter) para medir el tiempo hasta el primer pintado
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.first_paint_ms = None
+        self._idle_tasks = deque()
         self.setWindowTitle("Tron Browser")
         self.setGeometry(100, 100, 1200, 800)
         
@@ -77,16 +69,40 @@ class MainWindow(QMainWindow):
         """)
         
         # Inicializar componentes en el orden correcto
-        self.history_manager = HistoryManager()
-        self.bookmark_manager = BookmarkManager(self)
-        self.password_manager = PasswordManager()
-        self.navigation_manager = NavigationManager(self)
-        self.tab_manager = TabManager(self.history_manager, self)
-        self.navigation_manager.initialize_tab_manager(self.tab_manager)
+        with startup_trace.phase("HistoryManager"):
+            self.history_manager = HistoryManager()
+            self.suggestion_index = SuggestionIndex()
+            self.history_manager.attach_suggestions(self.suggestion_index)
+        # Caché HTTP compartida del perfil (en disco con tope, configurable)
+        self.http_cache = HttpCachePolicy()
+        self.http_cache.apply(QWebEngineProfile.defaultProfile())
+        # Estilo de las páginas según el tema: un script por perfil, no una inyección por navegación
+        self.page_theme = PageTheme(QSettings("TronBrowser", "Settings").value("theme", "light"))
+        self.page_theme.apply(QWebEngineProfile.defaultProfile())
+        self.page_snapshots = PageSnapshotCache()
+        with startup_trace.phase("BookmarkManager"):
+            # Un solo almacén de marcadores para el gestor, la barra de favoritos y este menú
+            self.bookmark_store = BookmarkStore()
+            # Marcar o desmarcar una URL cambia su puntuación en el omnibox durante la sesión
+            self.bookmark_store.url_bookmarked.connect(self.suggestion_index.set_bookmarked)
+            # El árbol del gestor se construye la primera vez que se muestra
+            self.bookmark_manager = BookmarkManager(self)
+        with startup_trace.phase("PasswordPageBridge"):
+            # Las pestañas solo necesitan el canal y los scripts de página; el panel
+            # (base de datos, bóveda e interfaz) se construye en ensure_password_panel
+            self.password_pages = PasswordPageBridge(self)
+            self.password_pages.save_requested.connect(self.on_password_save_requested)
+            self.password_manager = None
+            self.password_dock = None
+        with startup_trace.phase("TabManager"):
+            self.navigation_manager = NavigationManager(self)
+            self.tab_manager = TabManager(self.history_manager, self)
+            self.navigation_manager.initialize_tab_manager(self.tab_manager)
         
         # Crear la barra de navegación después de tener navigation_manager
-        self.nav_bar = QToolBar("Navigation")
-        self.setup_nav_bar()
+        with startup_trace.phase("setup_nav_bar"):
+            self.nav_bar = QToolBar("Navigation")
+            self.setup_nav_bar()
         
         # Crear contenedor principal con QVBoxLayout para nav_bar y contenido
         main_container = QWidget()
@@ -122,7 +138,8 @@ class MainWindow(QMainWindow):
         self.side_strip.setMovable(False)
         self.side_strip.setFixedWidth(44)
         self.side_strip.setFloatable(False)
-        self.setup_side_strip()
+        with startup_trace.phase("setup_side_strip"):
+            self.setup_side_strip()
         sidebar_layout.addWidget(self.side_strip)
         
         content_splitter.addWidget(sidebar_container)
@@ -136,20 +153,24 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(main_container)
         
         # Configurar paneles dock
-        self.setup_dock_widgets()
+        with startup_trace.phase("setup_dock_widgets"):
+            self.setup_dock_widgets()
         
         # Configurar tema y atajos
-        self.setup_theme()
+        with startup_trace.phase("setup_theme"):
+            self.setup_theme()
         self.setup_shortcuts()
         
         # Restaurar sesión
-        self.tab_manager.restaurar_sesion()
+        with startup_trace.phase("restaurar_sesion"):
+            self.tab_manager.restaurar_sesion()
         
         # Configurar cierre de la aplicación
         self.closeEvent = self.on_close
         
         # Asegurar que haya al menos una pestaña activa al iniciar
-        self.tab_manager.add_new_tab()
+        if self.tab_manager.tabs.count() == 0:
+            self.tab_manager.add_new_tab()
 
     def setup_dock_widgets(self):
         # Configurar DevTools
@@ -186,61 +207,120 @@ class MainWindow(QMainWindow):
         # Conectar señal para aplicar cambios al vuelo
         self.privacy_manager.settings_changed.connect(self.reapply_privacy_to_all_tabs)
         
-        # Configurar Password Manager
-        self.password_dock = QDockWidget("Gestor de Contraseñas", self)
-        self.password_dock.setWidget(self.password_manager)
-        self.password_dock.setAllowedAreas(Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
-        self.addDockWidget(Qt.RightDockWidgetArea, self.password_dock)
-        self.password_dock.hide()
+        # El registro de navegación escribe en el mismo historial persistente
+        self.history_manager.attach_store(self.privacy_manager.history_manager)
+        history_db = self.privacy_manager.history_manager.history_db
+        self.suggestion_index.load_in_background(
+            history_db, "bookmarks.db", os.path.join(os.path.dirname(history_db), "Omnibox Snapshot"))
         
-        # Configurar Scraping Panel (si está disponible)
-        if SCRAPING_AVAILABLE:
-            self.scraping_integration = scraping_integration
-            self.scraping_panel = ScrapingPanel(self.scraping_integration)
-            self.scraping_dock = QDockWidget("🔍 Scrapelillo Completo", self)
-            self.scraping_dock.setWidget(self.scraping_panel)
-            self.scraping_dock.setAllowedAreas(Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
-            self.addDockWidget(Qt.RightDockWidgetArea, self.scraping_dock)
-            self.scraping_dock.hide()
-            print("✅ Panel de scraping configurado correctamente")
-        else:
-            self.scraping_integration = None
-            self.scraping_panel = None
-            self.scraping_dock = None
-            print("❌ Panel de scraping no disponible")
-        
-        # Configurar Proxy Panel (si está disponible)
-        if PROXY_AVAILABLE:
-            # Obtener el proxy manager del scraping integration si está disponible
-            proxy_manager = None
-            if SCRAPING_AVAILABLE and hasattr(scraping_integration, 'proxy_manager'):
-                proxy_manager = scraping_integration.proxy_manager
-            
-            self.proxy_panel = ProxyPanel(proxy_manager)
-            self.proxy_dock = QDockWidget("🌐 Gestión de Proxies", self)
-            self.proxy_dock.setWidget(self.proxy_panel)
-            self.proxy_dock.setAllowedAreas(Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
-            self.addDockWidget(Qt.RightDockWidgetArea, self.proxy_dock)
-            self.proxy_dock.hide()
-            print("✅ Panel de gestión de proxies configurado correctamente")
-        else:
-            self.proxy_panel = None
-            self.proxy_dock = None
-            print("❌ Panel de gestión de proxies no disponible")
-        
-        # Configurar Chat Panel (si está disponible)
-        if CHAT_AVAILABLE:
-            self.chat_panel = ChatPanel()
-            self.chat_dock = QDockWidget("🤖 Chat con IA", self)
-            self.chat_dock.setWidget(self.chat_panel)
-            self.chat_dock.setAllowedAreas(Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
-            self.addDockWidget(Qt.RightDockWidgetArea, self.chat_dock)
-            self.chat_dock.hide()
-            print("✅ Panel de chat con IA configurado correctamente")
-        else:
-            self.chat_panel = None
-            self.chat_dock = None
-            print("❌ Panel de chat con IA no disponible")
+        # Scraping, proxies, chat y contraseñas se construyen al abrirlos (ensure_*_panel)
+        self.scraping_integration = None
+        self.scraping_panel = None
+        self.scraping_dock = None
+        self.proxy_panel = None
+        self.proxy_dock = None
+        self.chat_panel = None
+        self.chat_dock = None
+
+    def _add_panel_dock(self, title, panel):
+        dock = QDockWidget(title, self)
+        dock.setWidget(panel)
+        dock.setAllowedAreas(Qt.RightDockWidgetArea | Qt.LeftDockWidgetArea)
+        self.addDockWidget(Qt.RightDockWidgetArea, dock)
+        dock.hide()
+        return dock
+
+    def ensure_scraping_panel(self):
+        """Importa y construye el panel de scraping la primera vez que se necesita"""
+        global SCRAPING_AVAILABLE
+        if self.scraping_panel is not None or not SCRAPING_AVAILABLE:
+            return self.scraping_panel
+        try:
+            # Importar scraping_integration crea la instancia global y arranca su planificador
+            from scraping_integration import scraping_integration
+            from scraping_panel import ScrapingPanel
+        except ImportError as e:
+            SCRAPING_AVAILABLE = False
+            print(f"Advertencia: Módulo de scraping no disponible - {e}")
+            return None
+        self.scraping_integration = scraping_integration
+        self.scraping_panel = ScrapingPanel(self.scraping_integration)
+        self.scraping_dock = self._add_panel_dock("🔍 Scrapelillo Completo", self.scraping_panel)
+        print("✅ Panel de scraping configurado correctamente")
+        return self.scraping_panel
+
+    def ensure_proxy_panel(self):
+        """Importa y construye el panel de proxies la primera vez que se necesita"""
+        global PROXY_AVAILABLE
+        if self.proxy_panel is not None or not PROXY_AVAILABLE:
+            return self.proxy_panel
+        try:
+            from proxy_panel import ProxyPanel
+        except ImportError as e:
+            PROXY_AVAILABLE = False
+            print(f"Advertencia: Módulo de gestión de proxies no disponible - {e}")
+            return None
+        # Usar el proxy manager del scraping integration si está disponible
+        proxy_manager = None
+        if self.ensure_scraping_panel() is not None and hasattr(self.scraping_integration, 'proxy_manager'):
+            proxy_manager = self.scraping_integration.proxy_manager
+        self.proxy_panel = ProxyPanel(proxy_manager)
+        self.proxy_dock = self._add_panel_dock("🌐 Gestión de Proxies", self.proxy_panel)
+        print("✅ Panel de gestión de proxies configurado correctamente")
+        return self.proxy_panel
+
+    def ensure_chat_panel(self):
+        """Importa y construye el panel de chat la primera vez que se necesita"""
+        global CHAT_AVAILABLE
+        if self.chat_panel is not None or not CHAT_AVAILABLE:
+            return self.chat_panel
+        try:
+            from chat_panel_safe import ChatPanelSafe as ChatPanel
+        except ImportError as e:
+            CHAT_AVAILABLE = False
+            print(f"Advertencia: Módulo de chat con IA no disponible - {e}")
+            return None
+        self.chat_panel = ChatPanel()
+        self.chat_dock = self._add_panel_dock("🤖 Chat con IA", self.chat_panel)
+        print("✅ Panel de chat con IA configurado correctamente")
+        return self.chat_panel
+
+    def ensure_password_panel(self):
+        """Construye el panel de contraseñas (base de datos, bóveda e interfaz) la primera vez que se necesita"""
+        if self.password_manager is None:
+            self.password_manager = PasswordManager(self)
+            self.password_dock = self._add_panel_dock("Gestor de Contraseñas", self.password_manager)
+        return self.password_manager
+
+    def on_password_save_requested(self, url, username, password):
+        """Una página envió un formulario de inicio de sesión: ofrecer guardar la contraseña"""
+        self.ensure_password_panel().show_password_dialog(url, username, password)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.first_paint_ms is None:
+            self.first_paint_ms = (time.perf_counter() - self.started_at) * 1000
+            startup_trace.mark("first_paint")
+            print(f"🖼️ Primer pintado de la ventana: {self.first_paint_ms:.0f} ms desde el arranque")
+            # Lo que no hace falta para ver la ventana y la primera pestaña, en reposo
+            QTimer.singleShot(0, self._run_idle_task)
+
+    def defer_until_idle(self, task):
+        """Encola una tarea de inicialización para después del primer pintado, una por vuelta de eventos"""
+        self._idle_tasks.append(task)
+        if self.first_paint_ms is not None and len(self._idle_tasks) == 1:
+            QTimer.singleShot(0, self._run_idle_task)
+
+    def _run_idle_task(self):
+        if not self._idle_tasks:
+            return
+        task = self._idle_tasks.popleft()
+        try:
+            task()
+        except Exception as e:
+            print(f"Error en tarea de inicialización diferida: {e}")
+        if self._idle_tasks:
+            QTimer.singleShot(0, self._run_idle_task)
 
     def setup_theme(self):
         # Cargar configuración de tema
@@ -252,8 +332,9 @@ class MainWindow(QMainWindow):
         pass
 
     def on_close(self, event):
-        # ... (existing code)
-        pass
+        # Guardar las pestañas para restaurarlas (de forma perezosa) en el próximo arranque
+        self.tab_manager.guardar_sesion()
+        event.accept()
 
     def setup_nav_bar(self):
         # Configurar toolbar moderno con constantes uniformes
@@ -286,8 +367,7 @@ class MainWindow(QMainWindow):
         self.nav_bar.addAction(history_action)
 
         # URL Bar con estilo pill y estrella de favoritos
-        self.url_bar = UrlBar(load_url_callback=self.load_url)
-        self.url_bar.returnPressed.connect(lambda: self.load_url(self.url_bar.text()))
+        self.url_bar = UrlBar(load_url_callback=self.load_url, suggestion_index=self.suggestion_index)
         self.url_bar.setFixedHeight(32)
         if hasattr(self.url_bar, "setClearButtonEnabled"):
             self.url_bar.setClearButtonEnabled(True)
@@ -389,6 +469,10 @@ class MainWindow(QMainWindow):
         else:
             self.set_light_theme()
         self.settings.setValue("theme", theme)
+        if hasattr(self, 'page_theme'):
+            tabs = self.tab_manager.tabs
+            browsers = [tabs.widget(i) for i in range(tabs.count()) if isinstance(tabs.widget(i), QWebEngineView)]
+            self.page_theme.set_theme(theme, browsers)
 
     def set_dark_theme(self):
         """Aplica el tema oscuro con solo 2 tonos de gris"""
@@ -825,11 +909,12 @@ class MainWindow(QMainWindow):
                 self.advanced_panel_stack.isVisible()):
                 self.hide_advanced_panel()
             else:
+                self.privacy_manager.ensure_ui()
                 self.show_advanced_panel(self.privacy_manager)
 
     def toggle_password_manager(self):
         """Alterna la visibilidad del gestor de contraseñas USANDO EL STACK FIJO"""
-        if hasattr(self, 'password_manager') and self.password_manager:
+        if self.ensure_password_panel():
             if (self.advanced_panel_stack.currentWidget() == self.password_manager and 
                 self.advanced_panel_stack.isVisible()):
                 self.hide_advanced_panel()
@@ -928,13 +1013,9 @@ class MainWindow(QMainWindow):
     def on_page_loaded(self, browser_tab, url):
         """Callback cuando se termina de cargar una página"""
         try:
-            # Obtener el HTML de la página cargada
-            browser_tab.page().toHtml(lambda html_content: self.on_html_loaded(html_content, url))
-            
-            # También actualizar el scraping integration con el widget del navegador
-            if SCRAPING_AVAILABLE and self.scraping_integration:
-                self.scraping_integration.browser_widget = browser_tab
-                
+            # El HTML solo se pide si el panel de scraping está abierto (y sale de la caché si no cambió)
+            if browser_tab is self.tab_manager.tabs.currentWidget():
+                self.sync_scraping_snapshot(browser_tab)
         except Exception as e:
             print(f"Error en on_page_loaded: {e}")
     
@@ -946,67 +1027,40 @@ class MainWindow(QMainWindow):
             self.tab_manager.tabs.setTabText(index, title)
 
     def show_save_favorite_menu(self):
-        """Muestra el menú para guardar favoritos con manejo seguro de BD"""
+        """Muestra el menú para guardar favoritos en una categoría"""
         try:
-            with closing(self._get_db_connection()) as conn:
-                if conn is None:
-                    return
-
-                cursor = conn.cursor()
-                cursor.execute("SELECT name FROM categories")
-                categories = [row[0] for row in cursor.fetchall()]
-
-                menu = QMenu(self)
-                for category in categories:
-                    menu.addAction(category, lambda c=category: self.save_favorite_to_category(c))
-
-                # Obtener la posición del botón de favoritos
-                fav_action = self.sender()
-                if isinstance(fav_action, QAction):
-                    # Obtener la posición del botón en la barra de herramientas
-                    button = self.nav_bar.widgetForAction(fav_action)
-                    if button:
-                        menu.exec(button.mapToGlobal(button.rect().bottomLeft()))
-                    else:
-                        # Si no podemos obtener el widget, mostrar el menú en la posición actual del cursor
-                        menu.exec(QCursor.pos())
+            categories = self.bookmark_store.categories()
+
+            menu = QMenu(self)
+            for category in categories:
+                menu.addAction(category, lambda c=category: self.save_favorite_to_category(c))
+
+            # Obtener la posición del botón de favoritos
+            fav_action = self.sender()
+            if isinstance(fav_action, QAction):
+                # Obtener la posición del botón en la barra de herramientas
+                button = self.nav_bar.widgetForAction(fav_action)
+                if button:
+                    menu.exec(button.mapToGlobal(button.rect().bottomLeft()))
+                else:
+                    # Si no podemos obtener el widget, mostrar el menú en la posición actual del cursor
+                    menu.exec(QCursor.pos())
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Error al cargar categorías: {e}")
 
     def save_favorite_to_category(self, category):
-        """Guarda un favorito en la categoría especificada con transacción segura"""
+        """Guarda un favorito en la categoría especificada (una sola fila, en su transacción)"""
         current_url = self.url_bar.text().strip()
         if not current_url:
             self.statusBar().showMessage("Error: No hay URL para guardar", 5000)
             return
 
         try:
-            with closing(self._get_db_connection()) as conn:
-                if conn is None:
-                    return
-
-                with conn:  # Usa el contexto como transacción
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "INSERT INTO bookmarks (title, url, category, notes, tags) VALUES (?, ?, ?, ?, ?)",
-                        ("Untitled", current_url, category, "Guardado desde el navegador", "No tags")
-                    )
-                self.statusBar().showMessage(f"Marcador guardado en '{category}'", 5000)
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(self, "Error", "Esta URL ya existe en la categoría seleccionada")
+            self.bookmark_store.add(current_url, "Untitled", category, "Guardado desde el navegador")
+            self.statusBar().showMessage(f"Marcador guardado en '{category}'", 5000)
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Error al guardar marcador: {e}")
 
-    def _get_db_connection(self):
-        """Obtiene una conexión a la base de datos con manejo seguro"""
-        try:
-            conn = sqlite3.connect("bookmarks.db")
-            conn.execute("PRAGMA foreign_keys = ON")
-            return conn
-        except sqlite3.Error as e:
-            QMessageBox.critical(self, "Database Error", f"No se pudo conectar a la base de datos: {e}")
-            return None
-
     def toggle_devtools(self):
         """Alterna la visibilidad de las DevTools"""
         current_browser = self.tab_manager.tabs.currentWidget()
@@ -1022,7 +1076,7 @@ class MainWindow(QMainWindow):
 
     def toggle_scraping_panel(self):
         """Alterna la visibilidad del panel de scraping USANDO EL STACK FIJO"""
-        if SCRAPING_AVAILABLE and hasattr(self, 'scraping_panel') and self.scraping_panel:
+        if self.ensure_scraping_panel():
             if (self.advanced_panel_stack.currentWidget() == self.scraping_panel and 
                 self.advanced_panel_stack.isVisible()):
                 self.hide_advanced_panel()
@@ -1040,7 +1094,7 @@ class MainWindow(QMainWindow):
     
     def toggle_proxy_panel(self):
         """Alterna la visibilidad del panel de gestión de proxies USANDO EL STACK FIJO"""
-        if PROXY_AVAILABLE and hasattr(self, 'proxy_panel') and self.proxy_panel:
+        if self.ensure_proxy_panel():
             if (self.advanced_panel_stack.currentWidget() == self.proxy_panel and 
                 self.advanced_panel_stack.isVisible()):
                 self.hide_advanced_panel()
@@ -1054,7 +1108,7 @@ class MainWindow(QMainWindow):
     
     def toggle_chat_panel(self):
         """Alterna la visibilidad del panel de chat con IA USANDO EL STACK FIJO"""
-        if CHAT_AVAILABLE and hasattr(self, 'chat_panel') and self.chat_panel:
+        if self.ensure_chat_panel():
             if (self.advanced_panel_stack.currentWidget() == self.chat_panel and 
                 self.advanced_panel_stack.isVisible()):
                 self.hide_advanced_panel()
@@ -1068,22 +1122,38 @@ class MainWindow(QMainWindow):
         if SCRAPING_AVAILABLE and self.scraping_integration:
             current_browser = self.tab_manager.tabs.currentWidget()
             if current_browser:
-                # Obtener la URL actual
-                current_url = current_browser.url().toString()
-                
                 # Actualizar el widget del navegador en el scraping integration
                 self.scraping_integration.browser_widget = current_browser
                 
                 # Conectar eventos de clic para selección interactiva
                 self.setup_interactive_selection(current_browser)
                 
-                # Obtener el HTML de la página actual
-                current_browser.page().toHtml(lambda html_content: self.on_html_loaded(html_content, current_url))
+                # Obtener el HTML de la página actual (de la caché si la carga no cambió)
+                self.page_snapshots.request(current_browser, self.on_html_loaded)
+
+    def scraping_panel_visible(self):
+        return (self.scraping_panel is not None and
+                self.advanced_panel_stack.currentWidget() == self.scraping_panel and
+                self.advanced_panel_stack.isVisible())
+
+    def sync_scraping_snapshot(self, browser):
+        """Apunta el scraping a la pestaña activa; su HTML solo se pide con el panel abierto"""
+        # La primera pestaña se crea antes que los paneles
+        if not (SCRAPING_AVAILABLE and getattr(self, 'scraping_integration', None)) or browser is None:
+            return
+        self.scraping_integration.browser_widget = browser
+        if self.scraping_panel:
+            self.scraping_panel.browser_tab = browser
+        if self.scraping_panel_visible():
+            # Con debounce: al pasar rápido por varias pestañas solo se serializa la última
+            self.page_snapshots.schedule(browser, self.on_html_loaded)
+        else:
+            self.page_snapshots.cancel()
     
     def setup_interactive_selection(self, browser_tab):
         """Configurar selección interactiva para una pestaña del navegador"""
         try:
-            if SCRAPING_AVAILABLE and hasattr(self, 'scraping_panel'):
+            if SCRAPING_AVAILABLE and self.scraping_panel:
                 # Inyectar JavaScript para detectar clics
                 js_code = """
                 // Global variables
@@ -1223,7 +1293,7 @@ class MainWindow(QMainWindow):
     def handle_element_click(self, click_data):
         """Manejar clic en elemento de la página"""
         try:
-            if SCRAPING_AVAILABLE and hasattr(self, 'scraping_panel'):
+            if SCRAPING_AVAILABLE and self.scraping_panel:
                 x = click_data.get('x', 0)
                 y = click_data.get('y', 0)
                 self.scraping_panel.handle_page_click(x, y)
@@ -1242,8 +1312,7 @@ class MainWindow(QMainWindow):
                 self.favorites_bar.hide()
                 self.statusBar().showMessage("Barra de favoritos oculta", 3000)
             else:
-                self.favorites_bar.show()
-                self.favorites_bar.refresh_favorites()  # Actualizar favoritos
+                self.favorites_bar.show()  # Ya sigue al almacén fila a fila: no hay que recargarla
                 self.statusBar().showMessage("Barra de favoritos visible", 3000)
         else:
             QMessageBox.information(self, "Barra de Favoritos", "La barra de favoritos no está disponible.")
@@ -1338,9 +1407,51 @@ class MainWindow(QMainWindow):
 
 
 class UrlBar(QLineEdit):
-    def __init__(self, parent=None, load_url_callback=None):
+    def __init__(self, parent=None, load_url_callback=None, suggestion_index=None):
         super().__init__(parent)
         self.load_url_callback = load_url_callback
+        self.suggestion_index = suggestion_index
+        self._pending_url = None
+        # Enter y la elección de una sugerencia pasan por aquí para cargar una sola vez
+        self.returnPressed.connect(lambda: self._schedule_load(self.text(), from_suggestion=False))
+
+        if suggestion_index is not None:
+            # Sugerencias por frecencia: el índice ya ordena, el completer solo las muestra
+            self.suggestion_model = QStandardItemModel(self)
+            self.completer = QCompleter(self.suggestion_model, self)
+            self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+            self.completer.setCompletionRole(Qt.UserRole)
+            self.setCompleter(self.completer)
+            self.completer.activated[str].connect(lambda url: self._schedule_load(url, from_suggestion=True))
+            self.textEdited.connect(self.update_suggestions)
+
+    def update_suggestions(self, text):
+        """Rellena el desplegable con las mejores URLs para lo tecleado"""
+        try:
+            self.suggestion_model.clear()
+            for url, title in self.suggestion_index.suggest(text):
+                item = QStandardItem(f"{title} — {url}" if title else url)
+                item.setData(url, Qt.UserRole)
+                self.suggestion_model.appendRow(item)
+            if self.suggestion_model.rowCount():
+                self.completer.complete()
+            else:
+                self.completer.popup().hide()
+        except Exception as e:
+            print(f"Error actualizando sugerencias: {e}")
+
+    def _schedule_load(self, url, from_suggestion):
+        # Enter sobre el desplegable emite returnPressed y activated: gana la sugerencia
+        if self._pending_url is None:
+            QTimer.singleShot(0, self._load_pending)
+        elif not from_suggestion:
+            return
+        self._pending_url = url
+
+    def _load_pending(self):
+        url, self._pending_url = self._pending_url, None
+        if url and self.load_url_callback:
+            self.load_url_callback(url)
 
     def insertFromMimeData(self, source):
         # Llama al método original para pegar el texto